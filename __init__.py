@@ -38,74 +38,121 @@ import bpy
 ##################################
 
 import importlib
-from . import developer_utils
-
-importlib.reload(developer_utils)
-modules = developer_utils.setup_addon_modules(__path__, __name__, "bpy" in locals())
+import os
+import sys
+
+# Modules providing operator classes (classes) or app handlers (handlers),
+# in registration order. Everything else is imported by them or on first use,
+# e.g. NumPy only once limits are detected or drivers baked.
+REGISTER_MODULES = (
+    "action_range",
+    "data_path",
+    "menu_state",
+    "enum_items",
+    "constraint_operator",
+    "batch_operator",
+    "bake",
+    "consolidate",
+    "playback_profile",
+    "rbf",
+)
+
+# Set DRIVER_CONSTRAINT_DEV=1 to import and reload every submodule, which
+# picks up new modules without restarting Blender.
+DEV = os.environ.get("DRIVER_CONSTRAINT_DEV", "") not in ("", "0")
+
+
+def load_modules(reload=False):
+    """Imports REGISTER_MODULES, reloading the loaded submodules if reload."""
+    if DEV:
+        from . import developer_utils
+
+        importlib.reload(developer_utils)
+        developer_utils.setup_addon_modules(__path__, __name__, reload)
+    elif reload:
+        prefix = __name__ + "."
+        for name, module in list(sys.modules.items()):
+            if name.startswith(prefix) and module is not None:
+                importlib.reload(module)
+    return [importlib.import_module("." + name, __name__) for name in REGISTER_MODULES]
+
+
+modules = load_modules("modules" in locals())
+_registered = False
 
 
 # register
 ##################################
 
-import traceback
+from . import menu_state
+
+
+def draw_entries(layout, available):
+    layout.operator_context = "INVOKE_DEFAULT"
+    op = layout.operator("object.create_driver_constraint", text="Driver Constraint", icon="DRIVER")
+    op.mode = "DRIVER"
+    if available.action:
+        op = layout.operator("object.create_driver_constraint", text="Action Constraint", icon="ACTION")
+        op.mode = "ACTION"
 
 
 def add_to_specials(self, context):
-    if len(bpy.context.selected_objects) > 0:
-        self.layout.operator_context = "INVOKE_DEFAULT"
+    available = menu_state.availability(context)
+    if available.driver:
         self.layout.separator()
-        op = self.layout.operator(
-            "object.create_driver_constraint", text="Driver Constraint", icon="DRIVER"
-        )
-        op.mode = "DRIVER"
-        if context.active_object.type == "ARMATURE":
-            try:
-                if len(context.selected_pose_bones) > 1:
-                    op = self.layout.operator(
-                        "object.create_driver_constraint",
-                        text="Action Constraint",
-                        icon="ACTION",
-                    )
-                    op.mode = "ACTION"
-            except:
-                pass
+        draw_entries(self.layout, available)
 
 
 def add_pose_tools(self, context):
-    if len(bpy.context.selected_objects) > 0:
-        self.layout.operator_context = "INVOKE_DEFAULT"
+    available = menu_state.availability(context)
+    if available.driver:
         self.layout.separator()
         self.layout.label(text="Driver Tools:")
-        op = self.layout.operator(
-            "object.create_driver_constraint", text="Driver Constraint", icon="DRIVER"
-        )
-        op.mode = "DRIVER"
-        if context.active_object != None and context.active_object.type == "ARMATURE":
-            try:
-                if len(context.selected_pose_bones) > 1:
-                    op = self.layout.operator(
-                        "object.create_driver_constraint",
-                        text="Action Constraint",
-                        icon="ACTION",
-                    )
-                    op.mode = "ACTION"
-            except:
-                pass
+        draw_entries(self.layout, available)
+
+
+DRAW_HOOKS = (
+    ("VIEW3D_MT_pose_context_menu", add_to_specials),
+    ("VIEW3D_MT_object_context_menu", add_to_specials),
+    ("VIEW3D_PT_tools_posemode_options", add_pose_tools),
+    ("VIEW3D_PT_tools_active", add_pose_tools),
+)
 
 
 def register():
-    bpy.types.VIEW3D_MT_pose_context_menu.append(add_to_specials)
-    bpy.types.VIEW3D_MT_object_context_menu.append(add_to_specials)
-    bpy.types.VIEW3D_PT_tools_posemode_options.append(add_pose_tools)
-    bpy.types.VIEW3D_PT_tools_active.append(add_pose_tools)
+    """Registers classes, handlers and menu entries. Calling it again re-registers."""
+    global _registered
+    if _registered:
+        unregister()
 
-    print("Registered {} with {} modules".format(bl_info["name"], len(modules)))
+    from . import app_handlers
+    from .instrumentation import logger
 
+    for module in modules:
+        for cls in getattr(module, "classes", ()):
+            bpy.utils.register_class(cls)
+        app_handlers.add_handlers(getattr(module, "handlers", ()))
+    for type_name, draw in DRAW_HOOKS:
+        getattr(bpy.types, type_name).append(draw)
+    _registered = True
 
-def unregister():
-    bpy.types.VIEW3D_MT_pose_context_menu.remove(add_to_specials)
-    bpy.types.VIEW3D_MT_object_context_menu.remove(add_to_specials)
-    bpy.types.VIEW3D_PT_tools_posemode_options.remove(add_pose_tools)
-    bpy.types.VIEW3D_PT_tools_active.remove(add_pose_tools)
+    logger.info("Registered %s with %d modules", bl_info["name"], len(modules))
 
-    print("Unregistered {}".format(bl_info["name"]))
+
+def unregister():
+    global _registered
+    if not _registered:
+        return
+
+    from . import app_handlers
+    from .instrumentation import logger
+
+    for type_name, draw in reversed(DRAW_HOOKS):
+        getattr(bpy.types, type_name).remove(draw)
+    for module in reversed(modules):
+        app_handlers.remove_handlers(getattr(module, "handlers", ()))
+        for cls in reversed(getattr(module, "classes", ())):
+            bpy.utils.unregister_class(cls)
+    _registered = False
+
+    logger.info("Unregistered %s", bl_info["name"])
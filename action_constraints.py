@@ -0,0 +1,191 @@
+"""
+Action constraint creation shared by the operator and the command line.
+
+An Action constraint is identified by the bone it sits on, the action it
+plays and the target and subtarget driving it. Applying the same setup again
+updates that constraint in place instead of stacking a second one, so
+re-running the operator or a rig spec never multiplies evaluation cost.
+"""
+
+from math import isclose
+
+TRANSFORM_CHANNELS = {
+    "LOC_X": "LOCATION_X",
+    "LOC_Y": "LOCATION_Y",
+    "LOC_Z": "LOCATION_Z",
+    "ROT_X": "ROTATION_X",
+    "ROT_Y": "ROTATION_Y",
+    "ROT_Z": "ROTATION_Z",
+    "SCALE_X": "SCALE_X",
+    "SCALE_Y": "SCALE_Y",
+    "SCALE_Z": "SCALE_Z",
+}
+
+
+def get_target_space(space):
+    if "LOCAL" in space:
+        return "LOCAL"
+    elif "WORLD" in space:
+        return "WORLD"
+    return None
+
+
+# settings written by add_action_constraints besides the identifying ones
+SETTINGS = ("target_space", "transform_channel", "min", "max", "frame_start", "frame_end")
+
+
+def _same(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        # float properties are stored in single precision
+        return isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
+    return a == b
+
+
+def find_managed(bone, target, subtarget, action):
+    """Returns the Action constraint of bone playing action from subtarget, or None."""
+    for const in bone.constraints:
+        if (
+            const.type == "ACTION"
+            and const.action == action
+            and const.target == target
+            and const.subtarget == subtarget
+        ):
+            return const
+    return None
+
+
+def add_action_constraints(
+    bones,
+    target,
+    subtarget,
+    action,
+    transform_type,
+    space,
+    min_value,
+    max_value,
+    frame_start,
+    frame_end,
+    stats=None,
+    changes=None,
+):
+    """
+    Adds an Action constraint to every pose bone in bones, driven by the
+    transform_type channel of subtarget in target, or updates the one it
+    already has. Returns the constraints.
+
+    stats -- Counter, counts "created", "updated" and "unchanged"
+    changes -- list receiving (bone, constraint, previous settings) for
+               every created (previous is None) or updated constraint, see
+               revert_changes
+
+    New constraints are all created first, then new and outdated ones are
+    filled in one tight pass with the ID pointers written last. Nothing is
+    evaluated in between, call update_relations once when the whole batch is
+    done.
+    """
+    target_space = get_target_space(space)
+    settings = (
+        target_space,
+        TRANSFORM_CHANNELS.get(transform_type, transform_type),
+        float(min_value),
+        float(max_value),
+        int(frame_start),
+        int(frame_end),
+    )
+    compared = [
+        (attr, value) for attr, value in zip(SETTINGS, settings) if value is not None
+    ]
+
+    constraints = []
+    pending = []
+    missing = []
+    unchanged = 0
+    for bone in bones:
+        const = find_managed(bone, target, subtarget, action)
+        if const is None:
+            missing.append(bone)
+            constraints.append(None)
+            continue
+        constraints.append(const)
+        if all(_same(getattr(const, attr), value) for attr, value in compared):
+            unchanged += 1
+            continue
+        pending.append(const)
+        if changes is not None:
+            changes.append((bone, const, tuple(getattr(const, attr) for attr in SETTINGS)))
+
+    updated = len(pending)
+    created = [bone.constraints.new("ACTION") for bone in missing]
+    if created:
+        new = iter(created)
+        constraints = [next(new) if const is None else const for const in constraints]
+        if changes is not None:
+            changes.extend((bone, const, None) for bone, const in zip(missing, created))
+        pending.extend(created)
+
+    for const in pending:
+        for attr, value in compared:
+            setattr(const, attr, value)
+    for const in created:
+        const.subtarget = subtarget
+        const.target = target
+        const.action = action
+
+    if stats is not None:
+        stats["created"] += len(created)
+        stats["updated"] += updated
+        stats["unchanged"] += unchanged
+    return constraints
+
+
+def update_relations(view_layer):
+    """Rebuilds the depsgraph relations once after a batch of constraints."""
+    view_layer.update()
+
+
+def find_action_constraints(bones, name=None, action=None):
+    """
+    Indexes the Action constraints of bones, only those called name and
+    only those playing action when given. Returns a list of
+    (bone, constraints) for the bones with matches.
+    """
+    index = []
+    for bone in bones:
+        matches = [
+            const
+            for const in bone.constraints
+            if const.type == "ACTION"
+            and (name is None or const.name == name)
+            and (action is None or const.action == action)
+        ]
+        if matches:
+            index.append((bone, matches))
+    return index
+
+
+def remove_action_constraints(index):
+    """
+    Removes the constraints of an index from find_action_constraints and
+    returns how many. The index is built before anything is removed, so no
+    constraint collection changes while it is iterated.
+    """
+    count = 0
+    for bone, matches in index:
+        constraints = bone.constraints
+        for const in matches:
+            constraints.remove(const)
+        count += len(matches)
+    return count
+
+
+def revert_changes(changes):
+    """
+    Undoes the changes collected by add_action_constraints, newest first:
+    created constraints are removed, updated ones get their settings back.
+    """
+    for bone, const, previous in reversed(changes):
+        if previous is None:
+            bone.constraints.remove(const)
+        else:
+            for attr, value in zip(SETTINGS, previous):
+                setattr(const, attr, value)
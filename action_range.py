@@ -0,0 +1,68 @@
+"""
+Cached action frame ranges.
+
+The end frame of an action is asked for on every invoke of the Action
+Constraint dialog and on every change of its action enum. It is read from
+Blender's native range of the action's F-Curves and cached per action until
+a depsgraph update touches that action, or undo, redo or a file load
+invalidates everything.
+"""
+
+import bpy
+
+_lengths = {}
+
+
+def _compute_action_length(action):
+    if len(action.fcurves) == 0:
+        return 0
+
+    curve_frame_range = getattr(action, "curve_frame_range", None)
+    if curve_frame_range is not None:
+        # keyframe range without the manual frame range, Blender 3.1+
+        return curve_frame_range[1]
+
+    action_length = 0
+    for fcurve in action.fcurves:
+        if len(fcurve.keyframe_points) > 0:
+            action_length = max(action_length, fcurve.range()[1])
+    return action_length
+
+
+def get_action_length(action):
+    """Returns the frame of the last keyframe in action, 0 if it has none."""
+    key = action.as_pointer()
+    length = _lengths.get(key)
+    if length is None:
+        length = _lengths[key] = _compute_action_length(action)
+    return length
+
+
+def invalidate(action=None):
+    """Drops the cached length of action, or of all actions."""
+    if action is None:
+        _lengths.clear()
+    else:
+        _lengths.pop(action.as_pointer(), None)
+
+
+@bpy.app.handlers.persistent
+def invalidate_updated_actions(scene, depsgraph=None):
+    if not _lengths:
+        return
+    if depsgraph is None:
+        _lengths.clear()
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Action):
+            _lengths.pop(update.id.original.as_pointer(), None)
+
+
+@bpy.app.handlers.persistent
+def invalidate_all(*args):
+    _lengths.clear()
+
+
+handlers = (("depsgraph_update_post", invalidate_updated_actions),) + tuple(
+    (handler_name, invalidate_all) for handler_name in ("undo_post", "redo_post", "load_post")
+)
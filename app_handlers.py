@@ -0,0 +1,34 @@
+import bpy
+
+
+def add_handler(handler_name, func):
+    """
+    Appends func to bpy.app.handlers.<handler_name>.
+
+    A previously added handler with the same module and name is replaced, so
+    reloading the addon never stacks up duplicate handlers.
+    """
+    handlers = getattr(bpy.app.handlers, handler_name)
+    remove_handler(handler_name, func)
+    handlers.append(func)
+
+
+def remove_handler(handler_name, func):
+    handlers = getattr(bpy.app.handlers, handler_name)
+    for handler in list(handlers):
+        if (
+            getattr(handler, "__module__", None) == func.__module__
+            and getattr(handler, "__name__", None) == func.__name__
+        ):
+            handlers.remove(handler)
+
+
+def add_handlers(pairs):
+    """Adds (handler name, func) pairs, see add_handler."""
+    for handler_name, func in pairs:
+        add_handler(handler_name, func)
+
+
+def remove_handlers(pairs):
+    for handler_name, func in pairs:
+        remove_handler(handler_name, func)
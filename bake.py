@@ -0,0 +1,305 @@
+"""
+Baking generated drivers to keyframes.
+
+bake_drivers samples the properties driven by the addon's transform drivers
+over a frame range, one frame_set per frame for all of them, into a NumPy
+buffer. Every property then gets an F-Curve in the action of its ID, filled
+with a single keyframe_points.add and foreach_set instead of one insert per
+key. The baked drivers are muted so playback and render only read the keys.
+
+What was baked is recorded in an ID property on every baked ID, unbake
+removes exactly those F-Curves again (and the action, if the bake created
+it) and unmutes the drivers.
+
+NumPy is imported on first use, it is not needed to register the addon.
+"""
+
+import json
+
+import bpy
+
+from . import chunked, drivers, instrumentation
+
+BAKE_PROP = "driver_constraint_bake"
+BAKE_GROUP = "Baked Drivers"
+
+
+def ids_of_objects(objects):
+    """Returns the objects, their data and shape keys, the IDs drivers can sit on."""
+    found = []
+    for obj in objects:
+        found.append(obj)
+        obj_data = getattr(obj, "data", None)
+        if obj_data is not None:
+            found.append(obj_data)
+            shape_keys = getattr(obj_data, "shape_keys", None)
+            if shape_keys is not None:
+                found.append(shape_keys)
+    return found
+
+
+def find_bakeable(ids=None):
+    """
+    Returns (found, errors): (id, driver F-Curve) for every unmuted transform
+    driver on ids (all IDs by default) and (id, curve, message) for drivers
+    whose property already has keys in the action of its ID.
+    """
+    if ids is not None:
+        ids = {id_data.as_pointer() for id_data in ids}
+    found = []
+    errors = []
+    for id_data, curve in drivers.iter_drivers():
+        if curve.mute or not drivers.is_transform_driver(curve):
+            continue
+        if ids is not None and id_data.as_pointer() not in ids:
+            continue
+        action = id_data.animation_data.action
+        if action is not None and action.fcurves.find(curve.data_path, index=curve.array_index):
+            errors.append((id_data, curve, "property is already keyed in " + action.name))
+            continue
+        found.append((id_data, curve))
+    return found, errors
+
+
+def bake_frames(frame_start, frame_end):
+    import numpy as np
+
+    if frame_end < frame_start:
+        raise ValueError(f"Empty frame range {frame_start} to {frame_end}")
+    return np.arange(int(frame_start), int(frame_end) + 1, dtype=np.float32)
+
+
+def sample_buffer(found, frames):
+    """Returns the buffer sample fills, one row per driver and column per frame."""
+    import numpy as np
+
+    return np.empty((len(found), len(frames)), dtype=np.float32)
+
+
+def read_value(id_data, curve):
+    value = id_data.path_resolve(curve.data_path)
+    if hasattr(value, "__len__"):
+        return value[curve.array_index]
+    return value
+
+
+def sample(scene, found, frames, values, columns, depsgraph=None):
+    """
+    Steps scene to frames[columns] and stores the value of every driven
+    property of found in values[:, column].
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    for column in columns:
+        scene.frame_set(int(frames[column]))
+        with instrumentation.stage("bake_read"):
+            for row, (id_data, curve) in enumerate(found):
+                values[row, column] = read_value(id_data.evaluated_get(depsgraph), curve)
+
+
+def write_keys(found, frames, values, mute=True):
+    """
+    Writes values as keys into the action of every ID in found, creating
+    actions where needed, and records the bake on the IDs. Returns the new
+    F-Curves.
+    """
+    import numpy as np
+
+    count = len(frames)
+    co = np.empty(count * 2, dtype=np.float32)
+    co[0::2] = frames
+
+    # id pointer -> (id, bake record)
+    records = {}
+    curves = []
+    for row, (id_data, driver_curve) in enumerate(found):
+        anim_data = id_data.animation_data
+        key = id_data.as_pointer()
+        if key not in records:
+            record = {"action": "", "created_action": False, "curves": []}
+            if BAKE_PROP in id_data:
+                record = json.loads(id_data[BAKE_PROP])
+            if anim_data.action is None:
+                anim_data.action = bpy.data.actions.new(f"{id_data.name}Baked")
+                record["created_action"] = True
+            record["action"] = anim_data.action.name
+            records[key] = (id_data, record)
+        record = records[key][1]
+
+        with instrumentation.stage("bake_write"):
+            curve = anim_data.action.fcurves.new(
+                driver_curve.data_path, index=driver_curve.array_index, action_group=BAKE_GROUP
+            )
+            curve.keyframe_points.add(count)
+            co[1::2] = values[row]
+            curve.keyframe_points.foreach_set("co", co)
+            curve.update()
+        curves.append(curve)
+        record["curves"].append([driver_curve.data_path, driver_curve.array_index])
+        if mute:
+            driver_curve.mute = True
+
+    for id_data, record in records.values():
+        id_data[BAKE_PROP] = json.dumps(record)
+    instrumentation.count("drivers_baked", len(curves))
+    return curves
+
+
+def bake_drivers(scene, frame_start, frame_end, ids=None, mute=True):
+    """
+    Bakes the transform drivers on ids, all by default, from frame_start to
+    frame_end. Returns (curves, errors) like create_drivers, errors being
+    (id, driver F-Curve, message).
+    """
+    frames = bake_frames(frame_start, frame_end)
+    found, errors = find_bakeable(ids)
+    values = sample_buffer(found, frames)
+    current_frame = scene.frame_current
+    try:
+        sample(scene, found, frames, values, range(len(frames)))
+    finally:
+        scene.frame_set(current_frame)
+    return write_keys(found, frames, values, mute), errors
+
+
+def unbake_drivers(ids=None):
+    """
+    Removes the keys written by bake_drivers from ids, all baked IDs by
+    default, and unmutes their drivers. Returns the number of unbaked
+    properties.
+    """
+    if ids is None:
+        ids = [
+            id_data
+            for collection_name in drivers.ANIMATABLE_COLLECTIONS
+            for id_data in getattr(bpy.data, collection_name, ())
+        ]
+    count = 0
+    for id_data in ids:
+        if BAKE_PROP not in id_data:
+            continue
+        record = json.loads(id_data[BAKE_PROP])
+        del id_data[BAKE_PROP]
+        anim_data = id_data.animation_data
+        if anim_data is None:
+            continue
+        action = bpy.data.actions.get(record["action"])
+        for data_path, index in record["curves"]:
+            if action is not None:
+                curve = action.fcurves.find(data_path, index=index)
+                if curve is not None:
+                    action.fcurves.remove(curve)
+                    count += 1
+            driver_curve = anim_data.drivers.find(data_path, index=index)
+            if driver_curve is not None:
+                driver_curve.mute = False
+        if action is not None and record["created_action"] and len(action.fcurves) == 0:
+            if anim_data.action == action:
+                anim_data.action = None
+            bpy.data.actions.remove(action)
+    return count
+
+
+class BakeDriverConstraints(chunked.ChunkedOperator, bpy.types.Operator):
+    bl_idname = "object.bake_driver_constraints"
+    bl_label = "Bake Driver Constraints"
+    bl_description = (
+        "Bakes the generated drivers to keyframes so playback and render do not evaluate them"
+    )
+
+    scope: bpy.props.EnumProperty(
+        name="Scope",
+        items=(
+            ("SELECTED", "Selected", "Drivers on the selected objects, their data and shape keys"),
+            ("ALL", "All", "All generated drivers in the file"),
+        ),
+    )
+    use_scene_range: bpy.props.BoolProperty(name="Scene Frame Range", default=True)
+    frame_start: bpy.props.IntProperty(name="Start", default=1)
+    frame_end: bpy.props.IntProperty(name="End", default=50)
+    mute: bpy.props.BoolProperty(
+        name="Mute Drivers", default=True, description="Mute the baked drivers"
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        if self.use_scene_range:
+            frame_start, frame_end = scene.frame_start, scene.frame_end
+        else:
+            frame_start, frame_end = self.frame_start, self.frame_end
+        ids = ids_of_objects(context.selected_objects) if self.scope == "SELECTED" else None
+        try:
+            frames = bake_frames(frame_start, frame_end)
+        except ValueError as e:
+            self.report({"WARNING"}, str(e))
+            return {"CANCELLED"}
+
+        instrumentation.begin(self.bl_idname)
+        found, errors = find_bakeable(ids)
+        skipped = ""
+        if errors:
+            drivers.write_errors(
+                [
+                    f"Could not bake {id_data.name} {curve.data_path}[{curve.array_index}]: {message}"
+                    for id_data, curve, message in errors
+                ]
+            )
+            skipped = f", {len(errors)} skipped. See the text block {drivers.ERROR_TEXT}"
+        if not found:
+            self.report({"WARNING"}, f"No drivers to bake{skipped}.")
+            instrumentation.end()
+            return {"CANCELLED"}
+
+        values = sample_buffer(found, frames)
+        current_frame = scene.frame_current
+        depsgraph = context.evaluated_depsgraph_get()
+
+        def step(batch):
+            sample(scene, found, frames, values, batch, depsgraph)
+
+        def finish():
+            scene.frame_set(current_frame)
+            curves = write_keys(found, frames, values, self.mute)
+            with instrumentation.stage("undo_push"):
+                bpy.ops.ed.undo_push(message="Drivers baked.")
+            message = f"{len(curves)} Drivers baked from frame {frame_start} to {frame_end}"
+            if errors:
+                self.report({"WARNING"}, f"{message}{skipped}.")
+            else:
+                self.report({"INFO"}, message + ".")
+
+        def rollback():
+            scene.frame_set(current_frame)
+
+        job = chunked.ChunkedJob(
+            "Baking drivers", range(len(frames)), step, finish, rollback, batch_size=1
+        )
+        return self.run_job(context, job)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
+class UnbakeDriverConstraints(bpy.types.Operator):
+    bl_idname = "object.unbake_driver_constraints"
+    bl_label = "Unbake Driver Constraints"
+    bl_description = "Removes baked driver keys and unmutes the drivers again"
+
+    scope: bpy.props.EnumProperty(
+        name="Scope",
+        items=(
+            ("SELECTED", "Selected", "Bakes on the selected objects, their data and shape keys"),
+            ("ALL", "All", "All bakes in the file"),
+        ),
+    )
+
+    def execute(self, context):
+        ids = ids_of_objects(context.selected_objects) if self.scope == "SELECTED" else None
+        count = unbake_drivers(ids)
+        if count:
+            bpy.ops.ed.undo_push(message="Drivers unbaked.")
+        self.report({"INFO"}, f"{count} baked Drivers removed.")
+        return {"FINISHED"}
+
+
+classes = (BakeDriverConstraints, UnbakeDriverConstraints)
@@ -0,0 +1,148 @@
+"""
+Copyright (C) 2016-2024 Andreas Esau and Tyler Walker
+andreasesau@gmail.com, tyler@beyondstudios.us
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import bpy
+
+from . import chunked, drivers, instrumentation
+
+
+class CreateDriverConstraintBatch(chunked.ChunkedOperator, bpy.types.Operator):
+    bl_idname = "object.create_driver_constraint_batch"
+    bl_label = "Create Driver Constraints from Text"
+    bl_description = "Creates one driver per row of a text block. Rows are: data path, bone[, transform type, min, max, space]. Left out types and limits are taken from the bone pose"
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and len(bpy.data.texts) > 0
+
+    text_name: bpy.props.StringProperty(
+        name="Text",
+        default="",
+        description="Text block holding one driver row per line.",
+    )
+
+    space_values = []
+    space_values.append(("LOCAL_SPACE", "Local Space", "Local Space", "None", 0))
+    space_values.append(
+        ("TRANSFORM_SPACE", "Transform Space", "Transform Space", "None", 1)
+    )
+    space_values.append(("WORLD_SPACE", "World Space", "World Space", "None", 2))
+    space: bpy.props.EnumProperty(
+        name="Space",
+        items=space_values,
+        description="Space used by rows that do not set one.",
+    )
+
+    driver_mode: bpy.props.EnumProperty(
+        name="Driver Mode",
+        items=drivers.DRIVER_MODE_ITEMS,
+        description="How the drivers map the transform onto the property.",
+    )
+
+    limits_action: bpy.props.StringProperty(
+        name="Limits Action",
+        default="",
+        description="Take left out limits from the keyed range of each bone in this action instead of its pose.",
+    )
+
+    def draw(self, context):
+        layout = self.layout
+
+        row = layout.row()
+        row.label(text="Text")
+        row.prop_search(self, "text_name", bpy.data, "texts", text="")
+
+        row = layout.row()
+        row.label(text="Space")
+        row.prop(self, "space", text="")
+
+        row = layout.row()
+        row.label(text="Driver Mode")
+        row.prop(self, "driver_mode", text="")
+
+        row = layout.row()
+        row.label(text="Limits Action")
+        row.prop_search(self, "limits_action", bpy.data, "actions", text="")
+
+    def execute(self, context):
+        # imported here, limits needs NumPy
+        from . import limits
+
+        text = bpy.data.texts.get(self.text_name)
+        if text is None:
+            self.report({"WARNING"}, f"Text {self.text_name} not found.")
+            return {"CANCELLED"}
+
+        default_bone = ""
+        if context.active_pose_bone is not None:
+            default_bone = context.active_pose_bone.name
+        try:
+            rows = drivers.parse_rows(text.as_string(), default_bone, self.space)
+        except ValueError as e:
+            self.report({"WARNING"}, str(e))
+            return {"CANCELLED"}
+
+        instrumentation.begin(self.bl_idname)
+        action = bpy.data.actions.get(self.limits_action) if self.limits_action else None
+        with instrumentation.stage("limits"):
+            errors = limits.fill_auto_limits(rows, context.active_object, action)
+        failed = {id(row) for row, message in errors}
+        rows = [row for row in rows if id(row) not in failed]
+
+        driver_obj = context.active_object
+        curves = []
+        changes = []
+        stats = drivers.new_stats()
+
+        def step(batch):
+            batch_curves, batch_errors = drivers.create_drivers(
+                batch, driver_obj, driver_mode=self.driver_mode, stats=stats, changes=changes
+            )
+            curves.extend(batch_curves)
+            errors.extend(batch_errors)
+
+        def finish():
+            if stats["created"] or stats["updated"]:
+                with instrumentation.stage("undo_push"):
+                    bpy.ops.ed.undo_push(message="Driver Constraints generated.")
+            message = f"{len(curves)} Drivers ({drivers.format_stats(stats)})"
+            if errors:
+                drivers.write_errors(
+                    [f"Error adding driver to {row.prop_data_path}: {error}" for row, error in errors]
+                )
+                self.report(
+                    {"WARNING"},
+                    f"{message}, {len(errors)} failed. See the text block {drivers.ERROR_TEXT}.",
+                )
+            else:
+                self.report({"INFO"}, message + ".")
+
+        def rollback():
+            drivers.revert_changes(changes)
+
+        job = chunked.ChunkedJob("Drivers", rows, step, finish, rollback)
+        return self.run_job(context, job)
+
+    def invoke(self, context, event):
+        wm = context.window_manager
+        if self.text_name not in bpy.data.texts:
+            self.text_name = bpy.data.texts[0].name
+        return wm.invoke_props_dialog(self)
+
+
+classes = (CreateDriverConstraintBatch,)
@@ -0,0 +1,176 @@
+"""
+Applies one rig spec to many .blend files in parallel.
+
+Runs outside of Blender with any Python 3:
+
+    python batch_runner.py --spec spec.json --blender /path/to/blender a.blend b.blend ...
+
+Every file is handed to its own background Blender process running the addon
+command line (see cli.py). By default as many processes run at once as there
+are CPUs. Per file timing and errors are collected into one summary, printed
+at the end and optionally written as JSON.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+WORKER_EXPR = (
+    "import sys; sys.path.insert(0, {addon_parent!r}); "
+    "import {addon_name}.cli as cli; sys.exit(cli.main())"
+)
+
+
+def worker_command(blender, blend_file, spec, report_path, output=""):
+    expr = WORKER_EXPR.format(
+        addon_parent=os.path.dirname(ADDON_DIR),
+        addon_name=os.path.basename(ADDON_DIR),
+    )
+    command = [
+        blender,
+        "-b",
+        "--factory-startup",
+        blend_file,
+        "--python-exit-code",
+        "2",
+        "--python-expr",
+        expr,
+        "--",
+        spec,
+        "--report",
+        report_path,
+    ]
+    if output:
+        command += ["--output", output]
+    return command
+
+
+def run_file(blender, blend_file, spec, output="", timeout=None):
+    """Runs one worker and returns its result dict."""
+    result = {
+        "file": blend_file,
+        "output": output or blend_file,
+        "returncode": None,
+        "seconds": 0.0,
+        "drivers": 0,
+        "action_constraints": 0,
+        "errors": [],
+    }
+    handle, report_path = tempfile.mkstemp(suffix=".json", prefix="driver_constraint_")
+    os.close(handle)
+    start = time.perf_counter()
+    try:
+        process = subprocess.run(
+            worker_command(blender, blend_file, spec, report_path, output),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+        result["returncode"] = process.returncode
+        try:
+            with open(report_path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = None
+        if report:
+            result["drivers"] = report["drivers"]
+            result["action_constraints"] = report["action_constraints"]
+            result["errors"] = report["errors"]
+        elif process.returncode != 0:
+            # Blender died before writing a report, keep the end of its log
+            result["errors"] = process.stdout.splitlines()[-20:]
+    except subprocess.TimeoutExpired:
+        result["errors"] = [f"Timed out after {timeout} seconds"]
+    except OSError as e:
+        result["errors"] = [f"Could not start Blender: {e}"]
+    finally:
+        result["seconds"] = time.perf_counter() - start
+        os.remove(report_path)
+    return result
+
+
+def run_files(blender, blend_files, spec, jobs=None, output_dir="", timeout=None):
+    """
+    Runs all files through a pool of Blender processes.
+
+    Returns the result dicts in the order of blend_files.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    spec = os.path.abspath(spec)
+    outputs = [
+        os.path.join(output_dir, os.path.basename(path)) if output_dir else ""
+        for path in blend_files
+    ]
+    # the real work happens in the Blender processes, threads only wait on them
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(run_file, blender, os.path.abspath(path), spec, output, timeout)
+            for path, output in zip(blend_files, outputs)
+        ]
+        return [future.result() for future in futures]
+
+
+def summarize(results, seconds):
+    failed = [result for result in results if result["returncode"] != 0]
+    lines = []
+    for result in results:
+        state = "ok" if result["returncode"] == 0 else "FAILED"
+        lines.append(
+            f"{state:6} {result['seconds']:8.2f}s  {result['drivers']:6} drivers  "
+            f"{result['action_constraints']:6} action constraints  {result['file']}"
+        )
+        for message in result["errors"]:
+            lines.append(f"           {message}")
+    lines.append(
+        f"{len(results)} files, {len(failed)} failed, {seconds:.2f}s wall time, "
+        f"{sum(result['seconds'] for result in results):.2f}s total worker time"
+    )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apply a driver constraint rig spec to many .blend files in parallel."
+    )
+    parser.add_argument("files", nargs="+", help=".blend files to process")
+    parser.add_argument("--spec", required=True, help="JSON or TOML rig spec")
+    parser.add_argument(
+        "--blender",
+        default=os.environ.get("BLENDER", "blender"),
+        help="Blender executable, defaults to $BLENDER or blender",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=0, help="parallel Blender processes, defaults to the CPU count"
+    )
+    parser.add_argument(
+        "--output-dir", default="", help="save results here instead of overwriting the files"
+    )
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per file")
+    parser.add_argument("--summary", default="", help="write the summary as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = run_files(
+        args.blender, args.files, args.spec, args.jobs, args.output_dir, args.timeout
+    )
+    seconds = time.perf_counter() - start
+
+    print(summarize(results, seconds))
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump({"seconds": seconds, "files": results}, f, indent=2)
+    return 1 if any(result["returncode"] != 0 for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
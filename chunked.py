@@ -0,0 +1,121 @@
+"""
+Chunked, cancellable execution of large batches.
+
+A ChunkedJob splits its items into small batches and runs as many of them as
+fit into a time budget per call of run_chunk. Operators mixing in
+ChunkedOperator hand a job to run_job: small jobs, background mode and calls
+without a window run at once, big ones run from a timer in a modal handler.
+The UI stays responsive, the progress bar and status bar show how far the
+job got and Esc cancels it, rolling back what was already created. The undo
+step is pushed once, when the job finishes.
+"""
+
+from time import perf_counter
+
+import bpy
+
+from . import instrumentation
+
+# jobs with fewer items are not worth the modal round trips
+MIN_MODAL_ITEMS = 250
+CHUNK_SECONDS = 0.05
+BATCH_SIZE = 32
+
+
+class ChunkedJob:
+    """
+    Runs step(batch) over items, BATCH_SIZE items at a time.
+
+    finish() is called once all items are done, rollback() when the job is
+    cancelled. name shows up in the status bar.
+    """
+
+    def __init__(self, name, items, step, finish, rollback=None, batch_size=BATCH_SIZE):
+        self.name = name
+        self.items = items
+        self.step = step
+        self.finish = finish
+        self.rollback = rollback
+        self.batch_size = batch_size
+        self.index = 0
+
+    @property
+    def done(self):
+        return self.index >= len(self.items)
+
+    def run_chunk(self, seconds=None):
+        """
+        Runs batches until seconds, CHUNK_SECONDS by default, are used up.
+        Returns True when done.
+        """
+        deadline = perf_counter() + (CHUNK_SECONDS if seconds is None else seconds)
+        while not self.done:
+            end = self.index + self.batch_size
+            self.step(self.items[self.index : end])
+            self.index = min(end, len(self.items))
+            if perf_counter() >= deadline:
+                break
+        return self.done
+
+    def run_all(self):
+        while not self.done:
+            self.run_chunk(float("inf"))
+
+
+class ChunkedOperator:
+    """Mixin for operators that run ChunkedJobs, see run_job."""
+
+    _job = None
+    _timer = None
+
+    def run_job(self, context, job):
+        """
+        Runs job and returns the operator result, {"RUNNING_MODAL"} while it
+        continues in the modal handler.
+        """
+        if len(job.items) < MIN_MODAL_ITEMS or bpy.app.background or context.window is None:
+            job.run_all()
+            job.finish()
+            instrumentation.end()
+            return {"FINISHED"}
+
+        wm = context.window_manager
+        self._job = job
+        self._timer = wm.event_timer_add(0.001, window=context.window)
+        wm.progress_begin(0, len(job.items))
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+    def _end_job(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        if context.workspace is not None:
+            context.workspace.status_text_set(None)
+        self._timer = None
+
+    def modal(self, context, event):
+        job = self._job
+        if event.type == "ESC":
+            self._end_job(context)
+            if job.rollback is not None:
+                job.rollback()
+            instrumentation.end()
+            self.report({"WARNING"}, f"{job.name} cancelled after {job.index} of {len(job.items)}.")
+            return {"CANCELLED"}
+        if event.type != "TIMER" or event.timer is not self._timer:
+            return {"RUNNING_MODAL"}
+
+        done = job.run_chunk()
+        context.window_manager.progress_update(job.index)
+        if context.workspace is not None:
+            context.workspace.status_text_set(
+                f"{job.name}: {job.index} of {len(job.items)}, Esc to cancel"
+            )
+        if not done:
+            return {"RUNNING_MODAL"}
+
+        self._end_job(context)
+        job.finish()
+        instrumentation.end()
+        return {"FINISHED"}
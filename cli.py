@@ -0,0 +1,424 @@
+"""
+Headless rig building from a declarative spec.
+
+Usage, with the addon installed as driver_constraint_addon:
+
+    blender -b rig.blend --python-exit-code 1 --python-expr "import sys, driver_constraint_addon.cli as cli; sys.exit(cli.main())" -- spec.json
+
+The spec is JSON, or TOML when the file ends in .toml (Blender 4.1 and newer):
+
+    {
+        "defaults": {"driver_object": "Rig", "space": "LOCAL_SPACE"},
+        "drivers": [
+            {"path": "bpy.data.shape_keys[\\"Key\\"].key_blocks[\\"Smile\\"].value",
+             "bone": "mouth_ctrl", "type": "LOC_Z", "min": 0.0, "max": 0.05,
+             "mode": "SIMPLE_EXPRESSION"}
+        ],
+        "combined_drivers": [
+            {"path": "bpy.data.shape_keys[\\"Key\\"].key_blocks[\\"JawLeft\\"].value",
+             "combine": "PRODUCT",
+             "inputs": [{"bone": "jaw_ctrl", "type": "ROT_X", "min": 0.0, "max": 30.0},
+                        {"bone": "jaw_ctrl", "type": "LOC_X"}]}
+        ],
+        "shapes": [
+            {"object": "Body", "name": "ElbowFix", "source": "BodyElbowSculpt",
+             "source_space": "POSE", "bone": "forearm", "type": "ROT_X", "min": 0.0, "max": 90.0}
+        ],
+        "action_constraints": [
+            {"armature": "Rig", "bones": ["lip.L", "lip.R"], "subtarget": "jaw_ctrl",
+             "action": "JawOpen", "type": "ROT_X", "min": 0.0, "max": 30.0}
+        ]
+    }
+
+Defaults apply to every entry that does not set the key itself. Drivers that
+leave out type or limits get them from the bone pose, or from the keyed range
+in limits_action. Combined drivers merge several inputs into one driver,
+combine is PRODUCT, MIN, MAX or WEIGHTED_SUM; inputs take the same keys as
+drivers plus an optional weight. Shapes add shape keys to the mesh object,
+copied from the basis or from the vertices of source, and drive them like
+drivers do; name defaults to the bone and transform type. With source_space
+POSE the source is a sculpt of the mesh in the current pose and is moved back
+to rest space first. Action constraints target the armature itself unless target
+is given and run to the end of their action unless frame_end is given.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import bpy
+
+from . import action_constraints, corrective, drivers, instrumentation, limits, shape_keys
+from .action_range import get_action_length
+
+
+def load_spec(path):
+    """
+    Returns the spec in the JSON or TOML file at path. Raises OSError if the
+    file can not be read and ValueError if it is no valid spec.
+    """
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError(
+                "TOML specs need Blender 4.1 or newer (Python 3.11), use a JSON spec"
+            ) from None
+
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError("The spec must be a JSON object or a TOML table")
+    return spec
+
+
+def _entries(spec, key, report, required=()):
+    """
+    Yields the entries of spec[key] merged into the defaults. Entries that
+    are no object or lack a required key are added to the report errors.
+    """
+    defaults = spec.get("defaults", {})
+    for index, entry in enumerate(spec.get(key, [])):
+        if not isinstance(entry, dict):
+            report["errors"].append(f"{key}[{index}]: entry is no object")
+            continue
+        merged = dict(defaults)
+        merged.update(entry)
+        missing = [name for name in required if name not in merged]
+        if missing:
+            report["errors"].append(f"{key}[{index}]: missing {', '.join(map(repr, missing))}")
+            continue
+        yield merged
+
+
+def apply_drivers(spec, report):
+    groups = {}
+    for entry in _entries(spec, "drivers", report, ("path",)):
+        group_key = (
+            entry.get("driver_object", ""),
+            entry.get("mode", "SCRIPTED"),
+            entry.get("limits_action", ""),
+        )
+        groups.setdefault(group_key, []).append(
+            drivers.DriverRow(
+                entry["path"],
+                entry.get("bone", ""),
+                entry.get("type"),
+                entry.get("min"),
+                entry.get("max"),
+                entry.get("space", "LOCAL_SPACE"),
+            )
+        )
+
+    for (driver_object, driver_mode, limits_action), rows in groups.items():
+        driver_obj = bpy.data.objects.get(driver_object)
+        if driver_obj is None:
+            for row in rows:
+                report["errors"].append(
+                    f"{row.prop_data_path}: driver object {driver_object!r} not found"
+                )
+            continue
+        action = None
+        if limits_action:
+            action = bpy.data.actions.get(limits_action)
+            if action is None:
+                for row in rows:
+                    report["errors"].append(
+                        f"{row.prop_data_path}: action {limits_action!r} not found"
+                    )
+                continue
+
+        with instrumentation.stage("limits"):
+            errors = limits.fill_auto_limits(rows, driver_obj, action)
+        failed = {id(row) for row, message in errors}
+        rows = [row for row in rows if id(row) not in failed]
+        curves, driver_errors = drivers.create_drivers(
+            rows, driver_obj, driver_mode=driver_mode, stats=report["changes"]["drivers"]
+        )
+        errors.extend(driver_errors)
+
+        report["drivers"] += len(curves)
+        for row, message in errors:
+            report["errors"].append(f"{row.prop_data_path}: {message}")
+
+
+def apply_combined_drivers(spec, report):
+    stats = report["changes"]["drivers"]
+    for entry in _entries(spec, "combined_drivers", report, ("path",)):
+        path = entry["path"]
+        driver_obj = bpy.data.objects.get(entry.get("driver_object", ""))
+        if driver_obj is None:
+            report["errors"].append(f"{path}: driver object {entry.get('driver_object', '')!r} not found")
+            continue
+        action = None
+        if entry.get("limits_action"):
+            action = bpy.data.actions.get(entry["limits_action"])
+            if action is None:
+                report["errors"].append(f"{path}: action {entry['limits_action']!r} not found")
+                continue
+
+        inputs = [
+            drivers.DriverRow(
+                path,
+                item.get("bone", ""),
+                item.get("type"),
+                item.get("min"),
+                item.get("max"),
+                item.get("space", entry.get("space", "LOCAL_SPACE")),
+            )
+            for item in entry.get("inputs", [])
+        ]
+        weights = None
+        if any("weight" in item for item in entry.get("inputs", [])):
+            weights = [float(item.get("weight", 1.0)) for item in entry["inputs"]]
+        with instrumentation.stage("limits"):
+            errors = limits.fill_auto_limits(inputs, driver_obj, action)
+        if errors:
+            for row, message in errors:
+                report["errors"].append(f"{path}: input {row.bone_name!r}: {message}")
+            continue
+        try:
+            curve = drivers.add_combined_driver(
+                path, driver_obj, inputs, entry.get("combine", "PRODUCT"), weights, stats
+            )
+        except (ValueError, AttributeError, TypeError) as e:
+            report["errors"].append(f"{path}: {e}")
+            continue
+        if curve is None:
+            report["errors"].append(f"{path}: Property is not drivable")
+        else:
+            report["drivers"] += 1
+
+
+def apply_shapes(spec, report):
+    groups = {}
+    for entry in _entries(spec, "shapes", report):
+        group_key = (
+            entry.get("object", ""),
+            entry.get("source", ""),
+            entry.get("source_space", "REST"),
+            entry.get("driver_object", ""),
+            entry.get("mode", "SCRIPTED"),
+            entry.get("limits_action", ""),
+        )
+        groups.setdefault(group_key, []).append(
+            drivers.DriverRow(
+                entry.get("name", ""),
+                entry.get("bone", ""),
+                entry.get("type"),
+                entry.get("min"),
+                entry.get("max"),
+                entry.get("space", "LOCAL_SPACE"),
+            )
+        )
+
+    for key, rows in groups.items():
+        object_name, source_name, source_space, driver_object, driver_mode, limits_action = key
+        obj = bpy.data.objects.get(object_name)
+        driver_obj = bpy.data.objects.get(driver_object)
+        source = bpy.data.objects.get(source_name) if source_name else None
+        action = bpy.data.actions.get(limits_action) if limits_action else None
+        missing = None
+        if obj is None:
+            missing = f"object {object_name!r} not found"
+        elif driver_obj is None:
+            missing = f"driver object {driver_object!r} not found"
+        elif source_name and source is None:
+            missing = f"source {source_name!r} not found"
+        elif limits_action and action is None:
+            missing = f"action {limits_action!r} not found"
+        if missing is not None:
+            report["errors"].extend(
+                f"{object_name} {row.prop_data_path or row.bone_name}: {missing}" for row in rows
+            )
+            continue
+
+        with instrumentation.stage("limits"):
+            errors = limits.fill_auto_limits(rows, driver_obj, action)
+        failed = {id(row) for row, message in errors}
+        rows = [row for row in rows if id(row) not in failed]
+        for row in rows:
+            if not row.prop_data_path:
+                row.prop_data_path = shape_keys.new_shape_name(row.bone_name, row.transform_type)
+        try:
+            coordinates = None
+            if source is not None and source_space == "POSE":
+                coordinates = corrective.extract_rest_coordinates(
+                    obj, source, ignore={row.prop_data_path for row in rows}
+                )
+                source = None
+            curves, driver_errors, created = shape_keys.create_shape_drivers(
+                obj,
+                rows,
+                driver_obj,
+                source,
+                driver_mode,
+                stats=report["changes"]["drivers"],
+                coordinates=coordinates,
+            )
+        except ValueError as e:
+            report["errors"].append(f"{object_name}: {e}")
+            continue
+        errors.extend(driver_errors)
+
+        report["drivers"] += len(curves)
+        report["shapes"] += created
+        for row, message in errors:
+            report["errors"].append(f"{object_name} {row.prop_data_path or row.bone_name}: {message}")
+
+
+def apply_action_constraints(spec, report):
+    stats = report["changes"]["action_constraints"]
+    changed = stats["created"] + stats["updated"]
+    for entry in _entries(spec, "action_constraints", report):
+        name = f"{entry.get('armature', '')}: {entry.get('action', '')}"
+        armature = bpy.data.objects.get(entry.get("armature", ""))
+        if armature is None or armature.type != "ARMATURE":
+            report["errors"].append(f"{name}: armature not found")
+            continue
+        target = bpy.data.objects.get(entry.get("target", armature.name))
+        if target is None:
+            report["errors"].append(f"{name}: target {entry['target']!r} not found")
+            continue
+        action = bpy.data.actions.get(entry.get("action", ""))
+        if action is None:
+            report["errors"].append(f"{name}: action not found")
+            continue
+
+        bones = []
+        for bone_name in entry.get("bones", []):
+            bone = armature.pose.bones.get(bone_name)
+            if target == armature and bone_name == entry.get("subtarget", ""):
+                continue
+            if bone is None:
+                report["errors"].append(f"{name}: bone {bone_name!r} not found")
+            else:
+                bones.append(bone)
+
+        frame_end = entry.get("frame_end")
+        if frame_end is None:
+            frame_end = get_action_length(action)
+        with instrumentation.stage("action_constraints"):
+            constraints = action_constraints.add_action_constraints(
+                bones,
+                target,
+                entry.get("subtarget", ""),
+                action,
+                entry.get("type", "LOC_X"),
+                entry.get("space", "LOCAL_SPACE"),
+                entry.get("min", 0.0),
+                entry.get("max", 1.0),
+                entry.get("frame_start", 0),
+                frame_end,
+                stats,
+            )
+        report["action_constraints"] += len(constraints)
+
+    if stats["created"] + stats["updated"] > changed:
+        with instrumentation.stage("relations_update"):
+            action_constraints.update_relations(bpy.context.view_layer)
+
+
+def new_report():
+    return {
+        "drivers": 0,
+        "shapes": 0,
+        "action_constraints": 0,
+        "changes": {"drivers": drivers.new_stats(), "action_constraints": drivers.new_stats()},
+        "errors": [],
+    }
+
+
+def apply_spec(spec, report=None):
+    """
+    Applies all drivers and action constraints of spec to the open file.
+
+    Returns a report dict with the number of applied drivers and action
+    constraints, how many of them were created, updated or already up to
+    date, the number of shape keys created and a list of error messages.
+    Pass report to keep what was counted before an exception. Applying a
+    spec twice changes nothing the second time.
+    """
+    if report is None:
+        report = new_report()
+    apply_drivers(spec, report)
+    apply_combined_drivers(spec, report)
+    apply_shapes(spec, report)
+    apply_action_constraints(spec, report)
+    return report
+
+
+def parse_args(argv=None):
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(
+        prog="driver_constraint",
+        description="Apply a driver and action constraint spec to the open .blend file.",
+    )
+    parser.add_argument("spec", help="JSON or TOML rig spec")
+    parser.add_argument(
+        "--output", default="", help="save to this file instead of the open one"
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="do not save the file afterwards"
+    )
+    parser.add_argument(
+        "--save-on-errors",
+        action="store_true",
+        help="save the file even if some entries failed",
+    )
+    parser.add_argument("--report", default="", help="write the JSON report to this file")
+    parser.add_argument(
+        "--log-level",
+        default="SILENT",
+        choices=list(instrumentation.LOG_LEVELS),
+        type=str.upper,
+        help="how much the addon logs while it works, defaults to SILENT",
+    )
+    parser.add_argument(
+        "--profile", default="", help="write the stage timings to this file, JSON if it ends in .json"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the command line, returns 0 on success and 1 if anything failed."""
+    args = parse_args(argv)
+    instrumentation.set_log_level(args.log_level)
+    instrumentation.begin("cli")
+    report = new_report()
+    try:
+        apply_spec(load_spec(args.spec), report)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        # a broken spec, the entries applied so far stay in the report
+        report["errors"].append(f"{args.spec}: {type(e).__name__}: {e}")
+
+    save = not args.no_save and (args.save_on_errors or not report["errors"])
+    if save:
+        with instrumentation.stage("save"):
+            if args.output:
+                bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(args.output))
+            else:
+                bpy.ops.wm.save_mainfile()
+    instrumentation.end()
+
+    for message in report["errors"]:
+        print(f"Error: {message}")
+    print(
+        f"{report['drivers']} Drivers ({drivers.format_stats(report['changes']['drivers'])}) and "
+        f"{report['action_constraints']} Action constraints "
+        f"({drivers.format_stats(report['changes']['action_constraints'])}) applied, "
+        f"{report['shapes']} Shape keys created."
+    )
+    if not save and not args.no_save:
+        print("Not saved because of errors, pass --save-on-errors to save anyway.")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.profile:
+        instrumentation.dump(args.profile)
+    return 1 if report["errors"] else 0
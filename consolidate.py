@@ -0,0 +1,263 @@
+"""
+Sharing duplicate driver inputs.
+
+Drivers generated for the same bone channel, space and limits all read the
+bone transform and run the same mapping, once per driven property and frame.
+consolidate finds these groups among the unmuted transform drivers. The
+mapping of every group is computed once by a driver on a custom property of
+the driving object (named SHARED_INPUT_PREFIX + bone + channel), the drivers
+of the group are rewritten to AVERAGE drivers copying that property with a
+single SINGLE_PROP variable, no expression and no F-Modifiers.
+
+Running it again reuses the existing shared inputs. consolidate(dry_run=True)
+only reports what it would do.
+"""
+
+import bpy
+
+from . import drivers, instrumentation
+
+
+def _rounded(value):
+    if isinstance(value, float):
+        return round(value, 6)
+    if hasattr(value, "__len__") and not isinstance(value, str):
+        return tuple(_rounded(item) for item in value)
+    return value
+
+
+def mapping_key(curve):
+    """
+    Returns what the value of a transform driver depends on, or None if the
+    driver can not be shared (muted, keyframed, Python using self, ...).
+    """
+    driver = curve.driver
+    variables = driver.variables
+    if curve.mute or len(variables) != 1 or len(curve.keyframe_points) > 0:
+        return None
+    var = variables[0]
+    target = var.targets[0]
+    if var.type != "TRANSFORMS" or target.id is None:
+        return None
+
+    modifiers = list(curve.modifiers)
+    if driver.type == "SCRIPTED":
+        if modifiers or driver.use_self:
+            return None
+        mapping = ("SCRIPTED", var.name, driver.expression)
+    elif driver.type == "AVERAGE" and [modifier.type for modifier in modifiers] == [
+        "GENERATOR",
+        "LIMITS",
+    ]:
+        mapping = ("AVERAGE",) + tuple(
+            _rounded(getattr(modifier, attr))
+            for modifier in modifiers
+            for attr in drivers.MODIFIER_SETTINGS[modifier.type]
+        )
+    else:
+        return None
+    return (
+        target.id.as_pointer(),
+        target.bone_target,
+        target.transform_type,
+        target.transform_space,
+        target.rotation_mode,
+        mapping,
+    )
+
+
+def find_groups(min_size=2):
+    """Returns lists of (id, driver F-Curve) with the same mapping_key."""
+    groups = {}
+    for id_data, curve in drivers.iter_drivers():
+        key = mapping_key(curve)
+        if key is not None:
+            groups.setdefault(key, []).append((id_data, curve))
+    return [group for group in groups.values() if len(group) >= min_size]
+
+
+def shared_input_name(curve):
+    """Returns the custom property name of the shared input curve is for."""
+    target = curve.driver.variables[0].targets[0]
+    name = target.bone_target or "object"
+    return f"{drivers.SHARED_INPUT_PREFIX}{name}_{target.transform_type.lower()}"
+
+
+def find_hub(group):
+    """Returns the member of group computing a shared input, or None."""
+    for id_data, curve in group:
+        target = curve.driver.variables[0].targets[0]
+        if id_data == target.id and curve.data_path.startswith(
+            f'["{drivers.SHARED_INPUT_PREFIX}'
+        ):
+            return id_data, curve
+    return None
+
+
+def copy_mapping(source, curve):
+    """Makes the driver of curve compute the same mapping as source."""
+    for modifier in reversed(list(curve.modifiers)):
+        curve.modifiers.remove(modifier)
+    for modifier in source.modifiers:
+        copy = curve.modifiers.new(modifier.type)
+        for attr in drivers.MODIFIER_SETTINGS[modifier.type]:
+            value = getattr(modifier, attr)
+            setattr(copy, attr, tuple(value) if attr == "coefficients" else value)
+
+    driver = curve.driver
+    driver.type = source.driver.type
+    driver.use_self = False
+    driver.expression = source.driver.expression
+    if len(driver.variables) < 1:
+        driver.variables.new()
+    source_var = source.driver.variables[0]
+    var = driver.variables[0]
+    var.name = source_var.name
+    var.type = "TRANSFORMS"
+    source_target = source_var.targets[0]
+    target = var.targets[0]
+    target.id = source_target.id
+    for attr in ("bone_target", "transform_type", "transform_space", "rotation_mode"):
+        setattr(target, attr, getattr(source_target, attr))
+
+
+def add_hub(source):
+    """
+    Adds the shared input for the mapping of source to the driving object.
+    Returns (object, driver F-Curve).
+    """
+    owner = source.driver.variables[0].targets[0].id
+    base = shared_input_name(source)
+    name = base
+    number = 1
+    while name in owner.keys():
+        name = f"{base}_{number:03d}"
+        number += 1
+    owner[name] = 0.0
+    curve = owner.driver_add(f'["{name}"]')
+    copy_mapping(source, curve)
+    return owner, curve
+
+
+def read_shared_input(curve, owner, data_path):
+    """Rewrites curve to copy the custom property at data_path of owner."""
+    for modifier in reversed(list(curve.modifiers)):
+        curve.modifiers.remove(modifier)
+    driver = curve.driver
+    driver.type = "AVERAGE"
+    var = driver.variables[0]
+    var.type = "SINGLE_PROP"
+    target = var.targets[0]
+    target.id_type = "OBJECT"
+    target.id = owner
+    target.data_path = data_path
+
+
+def consolidate(dry_run=False):
+    """
+    Shares the inputs of duplicate transform drivers, see the module doc.
+
+    Returns a report dict: one entry per group and the number of drivers
+    rewritten, shared inputs added and mapping evaluations saved per frame.
+    """
+    with instrumentation.stage("consolidate_index"):
+        groups = find_groups()
+    report = {
+        "dry_run": dry_run,
+        "groups": [],
+        "drivers_rewritten": 0,
+        "shared_inputs_added": 0,
+        "evaluations_saved": 0,
+        "python_evaluations_saved": 0,
+    }
+    for group in groups:
+        hub = find_hub(group)
+        source = group[0][1] if hub is None else hub[1]
+        needs_python = source.driver.type == "SCRIPTED" and not source.driver.is_simple_expression
+        copies = [(id_data, curve) for id_data, curve in group if hub is None or curve is not hub[1]]
+        target = source.driver.variables[0].targets[0]
+        report["groups"].append(
+            {
+                "object": target.id.name,
+                "bone": target.bone_target,
+                "transform_type": target.transform_type,
+                "space": target.transform_space,
+                "mapping": source.driver.expression if source.driver.type == "SCRIPTED" else "Generator",
+                "drivers": len(copies),
+                "shared_input": hub[1].data_path if hub is not None else None,
+            }
+        )
+        report["drivers_rewritten"] += len(copies)
+        # every copy drops its mapping, a new shared input adds one back
+        saved = len(copies) - (1 if hub is None else 0)
+        report["evaluations_saved"] += saved
+        if needs_python:
+            report["python_evaluations_saved"] += saved
+        if dry_run:
+            if hub is None:
+                report["shared_inputs_added"] += 1
+            continue
+
+        with instrumentation.stage("consolidate_rewrite"):
+            if hub is None:
+                hub = add_hub(source)
+                report["shared_inputs_added"] += 1
+                report["groups"][-1]["shared_input"] = hub[1].data_path
+            owner, hub_curve = hub
+            for id_data, curve in copies:
+                read_shared_input(curve, owner, hub_curve.data_path)
+    instrumentation.count("drivers_consolidated", report["drivers_rewritten"])
+    return report
+
+
+def format_report(report):
+    verb = "would be" if report["dry_run"] else "were"
+    lines = [
+        f"{report['drivers_rewritten']} Drivers {verb} rewritten to read "
+        f"{len(report['groups'])} shared inputs ({report['shared_inputs_added']} new).",
+        f"Mapping evaluations saved per frame: {report['evaluations_saved']}, "
+        f"{report['python_evaluations_saved']} of them in Python.",
+    ]
+    if report["groups"]:
+        lines.append(f"{'input':48} {'mapping':32} {'drivers':>8}")
+        for group in sorted(report["groups"], key=lambda group: -group["drivers"]):
+            name = f"{group['object']}: {group['bone']} {group['transform_type']} {group['space']}"
+            lines.append(f"{name:48} {group['mapping']:32} {group['drivers']:>8}")
+    return "\n".join(lines)
+
+
+REPORT_TEXT = "Driver Constraint Consolidation"
+
+
+class ConsolidateDriverConstraints(bpy.types.Operator):
+    bl_idname = "object.consolidate_driver_constraints"
+    bl_label = "Consolidate Driver Constraints"
+    bl_description = (
+        "Computes transform mappings shared by several drivers once, in a custom property "
+        "of the driving object, and lets the drivers copy it"
+    )
+
+    dry_run: bpy.props.BoolProperty(
+        name="Dry Run", default=True, description="Only report what would be consolidated"
+    )
+
+    def execute(self, context):
+        instrumentation.begin(self.bl_idname)
+        report = consolidate(self.dry_run)
+        if report["drivers_rewritten"] and not self.dry_run:
+            with instrumentation.stage("undo_push"):
+                bpy.ops.ed.undo_push(message="Driver inputs consolidated.")
+        instrumentation.end()
+
+        text = bpy.data.texts.get(REPORT_TEXT)
+        if text is None:
+            text = bpy.data.texts.new(REPORT_TEXT)
+        text.from_string(format_report(report))
+        self.report({"INFO"}, format_report(report).splitlines()[0])
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
+classes = (ConsolidateDriverConstraints,)
@@ -19,67 +19,56 @@ Created by Andreas Esau modified by Tyler Walker to support ANY property type
 """
 
 import bpy
-from math import radians, degrees
-from mathutils import Vector, Quaternion, Euler
+from math import radians
+
+# limits needs NumPy and is imported where it is used, so registering the
+# addon stays cheap
+from . import (
+    action_constraints,
+    chunked,
+    corrective,
+    data_path,
+    drivers,
+    enum_items,
+    instrumentation,
+    shape_keys,
+)
+from .action_range import get_action_length
+from .instrumentation import logger
 
 
 def get_prop_object(self, context, prop_name, obj):
-    print(f"get_prop_object called with prop_name: {prop_name}")
-
-    def parse_path(path):
-        parts = []
-        current = ""
-        bracket_depth = 0
-        for i, char in enumerate(path):
-            if char == "[":
-                bracket_depth += 1
-            elif char == "]":
-                bracket_depth -= 1
-                if bracket_depth == 0 and i + 1 < len(path) and path[i + 1] == "[":
-                    # Found "][", split into two parts
-                    parts.append(current + char)
-                    current = ""
-                    continue
-            elif char == "." and bracket_depth == 0:
-                if current:
-                    parts.append(current)
-                    current = ""
-                continue
-            current += char
-        if current:
-            parts.append(current)
-        print(f"Parsed path: {parts}")
-        return parts
-
-    try:
-        parts = parse_path(prop_name)
-        current = bpy.data if prop_name.startswith("bpy.data") else obj
-        for part in parts[2:] if prop_name.startswith("bpy.data") else parts:
-            if "[" in part and "]" in part:
-                attr, index = part.split("[", 1)
-                index = index.rstrip("]").strip("\"'")
-                if attr:
-                    current = getattr(current, attr)
-                current = current[int(index) if index.isdigit() else index]
-            else:
-                current = getattr(current, part)
-        print(f"Final object: {current}, Type: {type(current)}")
-        return current, "PROPERTY"
-    except Exception as e:
-        print(f"Error in get_prop_object: {str(e)}")
-        return None, None
-
-
-def get_action_length(action):
-    action_length = 0
-    for fcurve in action.fcurves:
-        if len(fcurve.keyframe_points) > 0:
-            length = fcurve.keyframe_points[len(fcurve.keyframe_points) - 1].co[0]
-            action_length = max(action_length, length)
-    return action_length
-
-
-class CreateDriverConstraint(bpy.types.Operator):
+    """
+    Returns (value, "PROPERTY") for the property at prop_name, relative
+    paths resolved against obj. Raises data_path.PathResolveError if the
+    path is malformed or a part of it can not be found.
+    """
+    logger.debug("get_prop_object called with prop_name: %s", prop_name)
+    compiled, parent, current = data_path.resolve_path(prop_name, obj)
+    logger.debug("Final object: %r, Type: %s", current, type(current))
+    return current, "PROPERTY"
+
+
+def get_driver_transform(context):
+    """Returns the pose bone or object whose transform drives the property."""
+    if context.active_object.type == "ARMATURE" and context.active_pose_bone != None:
+        return context.active_pose_bone
+    elif context.active_object.type in ["MESH", "EMPTY"]:
+        return context.active_object
+    return None
+
+
+def get_target_object(context):
+    """Returns the object owning the driven property, the selected one that is not active."""
+    if len(context.selected_objects) > 1:
+        for obj in context.selected_objects:
+            if obj != context.view_layer.objects.active:
+                return obj
+        return None
+    return context.selected_objects[0] if context.selected_objects else None
+
+
+class CreateDriverConstraint(chunked.ChunkedOperator, bpy.types.Operator):
     # """This Operator creates a driver for a shape and connects it to a posebone transformation"""
     bl_idname = "object.create_driver_constraint"
     bl_label = "Create Driver Constraint"
@@ -93,72 +82,83 @@ class CreateDriverConstraint(bpy.types.Operator):
         return True
 
     def get_shapes(self, context):
-        shapes = []
-        i = 0
-
-        if len(context.selected_objects) > 1:
-            obj = None
-            for obj2 in context.selected_objects:
-                if obj2 != context.view_layer.objects.active:
-                    obj = obj2
-                    break
-        else:
-            obj = context.selected_objects[0]
+        obj = get_target_object(context)
         shape_keys = None
-        if obj.type in ["MESH", "CURVE"] and obj.data.shape_keys != None:
+        if obj is not None and obj.type in ["MESH", "CURVE"] and obj.data.shape_keys != None:
             shape_keys = obj.data.shape_keys.key_blocks
 
-        if shape_keys != None:
-            for shape in shape_keys:
-                if shape.relative_key != shape:
-                    shapes.append(
-                        (shape.name, shape.name, shape.name, "SHAPEKEY_DATA", i)
-                    )
-                    i += 1
-        shapes.append(
-            ("CREATE_NEW_SHAPE", "create new shape", "create new shape", "NEW", i)
-        )
+        def build():
+            shapes = [
+                (
+                    "PROPERTY",
+                    "Property Data Path",
+                    "Drive the property at Property Data Path",
+                    "RNA",
+                    0,
+                )
+            ]
+            if shape_keys != None:
+                for shape in shape_keys:
+                    if shape.relative_key != shape:
+                        shapes.append(
+                            (shape.name, shape.name, shape.name, "SHAPEKEY_DATA", len(shapes))
+                        )
+            shapes.append(
+                ("CREATE_NEW_SHAPE", "create new shape", "create new shape", "NEW", len(shapes))
+            )
+            return shapes
 
-        return shapes
+        key = (obj.as_pointer() if obj is not None else 0, len(shape_keys) if shape_keys != None else -1)
+        return enum_items.cached_items("shapes", key, build)
 
     def search_for_prop(self, context):
         wm = context.window_manager
         if hasattr(self, "property_type") and self.prop_data_path != "":
-            if len(context.selected_objects) > 1:
-                obj = None
-                for obj2 in context.selected_objects:
-                    if obj2 != context.view_layer.objects.active:
-                        obj = obj2
-                        break
-            else:
-                obj = context.selected_objects[0]
+            obj = get_target_object(context)
 
-            result = get_prop_object(self, context, self.prop_data_path, obj)
-            if result is not None and result[1] is not None:
-                self.property_type = "PROPERTY"
-            else:
-                print(f"Property not found: {self.prop_data_path}")
+            try:
+                get_prop_object(self, context, self.prop_data_path, obj)
+            except data_path.PathResolveError as e:
+                self.report({"WARNING"}, str(e))
                 self.prop_data_path = ""
-                self.property_type = "PROPERTY"
+            self.property_type = "PROPERTY"
 
     def get_actions(self, context):
-        ACTIONS = []
-        for i, action in enumerate(bpy.data.actions):
-            ACTIONS.append((action.name, action.name, action.name, "ACTION", i))
-        return ACTIONS
+        def build():
+            return [
+                (action.name, action.name, action.name, "ACTION", i)
+                for i, action in enumerate(bpy.data.actions)
+            ]
+
+        return enum_items.cached_items("actions", len(bpy.data.actions), build)
+
+    def get_delete_bones(self, context):
+        if self.delete_scope == "ARMATURE":
+            obj = context.active_object
+            return obj.pose.bones if obj is not None and obj.pose is not None else ()
+        return context.selected_pose_bones or ()
 
     def get_action_constraints(self, context):
-        action_names = []
-        ACTIONS = []
-        i = 0
-        for bone in context.selected_pose_bones:
-            for const in bone.constraints:
-                if const.name not in action_names:
-                    action_names.append(const.name)
-                    ACTIONS.append((const.name, const.name, const.name, "ACTION", i))
-                    i += 1
-        ACTIONS.append(("ALL_ACTIONS", "All Actions", "All Actions", "ACTION", i))
-        return ACTIONS
+        def build():
+            action_names = set()
+            ACTIONS = []
+            for bone in self.get_delete_bones(context):
+                for const in bone.constraints:
+                    if const.type == "ACTION" and const.name not in action_names:
+                        action_names.add(const.name)
+                        ACTIONS.append(
+                            (const.name, const.name, const.name, "ACTION", len(ACTIONS))
+                        )
+            ACTIONS.append(
+                ("ALL_ACTIONS", "All Actions", "All Actions", "ACTION", len(ACTIONS))
+            )
+            return ACTIONS
+
+        key = (
+            context.active_object.as_pointer() if context.active_object else None,
+            self.delete_scope,
+        )
+        return enum_items.cached_items("action_constraints", key, build)
 
     def get_property_type_items(self, context):
         items = [
@@ -243,6 +243,11 @@ class CreateDriverConstraint(bpy.types.Operator):
         self.prop_min_value = val2
         self.prop_max_value = val1
 
+    def update_limits(self, context):
+        if self.get_limits_auto:
+            with instrumentation.stage("limits"):
+                self.limit_type = self.set_defaults(context)
+
     def get_animation_length(self, context):
         action = bpy.data.actions[self.action]
         self.action_frame_end = get_action_length(action)
@@ -267,12 +272,77 @@ class CreateDriverConstraint(bpy.types.Operator):
         name="Shape",
         description="Select the shape you want to add a driver to.",
     )
+    new_shape_name: bpy.props.StringProperty(
+        name="New Shape Name",
+        default="",
+        description="Name of the new shape key, leave empty to name it after the bone and transform",
+    )
+    new_shape_scope: bpy.props.EnumProperty(
+        name="New Shapes",
+        items=(
+            ("ACTIVE", "Active Bone", "One shape key driven by the active bone"),
+            (
+                "SELECTED_BONES",
+                "Selected Bones",
+                "One shape key per selected bone, the other bones use the limits of their pose",
+            ),
+        ),
+    )
+    new_shape_source: bpy.props.StringProperty(
+        name="Source Mesh",
+        default="",
+        description="Mesh object the new shape keys copy their vertices from, the basis if empty",
+    )
+    new_shape_space: bpy.props.EnumProperty(
+        name="Source Space",
+        items=(
+            ("REST", "Rest", "The source mesh is in rest space, its vertices are copied"),
+            (
+                "POSE",
+                "Pose",
+                "The source mesh is a sculpted copy of the posed mesh, the sculpt is moved back to rest space",
+            ),
+        ),
+    )
     get_limits_auto: bpy.props.BoolProperty(
         name="Get Limits",
         default=True,
         description="This will set the limits based on the bone location/rotation/scale automatically.",
     )
 
+    limits_source: bpy.props.EnumProperty(
+        name="Limits From",
+        items=(
+            ("POSE", "Pose", "Use the current pose of the driver bone", "POSE_HLT", 0),
+            (
+                "ACTION",
+                "Action",
+                "Use the keyed range of the driver bone in an action",
+                "ACTION",
+                1,
+            ),
+        ),
+        description="Where Get Limits reads the driver limits from.",
+        update=update_limits,
+    )
+    limits_action: bpy.props.EnumProperty(
+        name="Limits Action",
+        items=get_actions,
+        description="Action whose keyframes of the driver bone set the limits.",
+        update=update_limits,
+    )
+
+    driver_mode: bpy.props.EnumProperty(
+        name="Driver Mode",
+        items=drivers.DRIVER_MODE_ITEMS,
+        description="How the driver maps the transform onto the property.",
+    )
+    combine: bpy.props.EnumProperty(
+        name="Combine",
+        items=drivers.COMBINE_ITEMS,
+        description="Drive the property from all selected bones at once, the active one with the limits above and the others with limits from their pose.",
+    )
+
     int_type_values = []
     int_type_values.append(("LINEAR", "Linear", "Linear", "IPO_LINEAR", 0))
     int_type_values.append(("CONSTANT", "Constant", "Constant", "IPO_CONSTANT", 1))
@@ -318,6 +388,23 @@ class CreateDriverConstraint(bpy.types.Operator):
         ),
         description="Delete or Add Action Constraints for selected bones.",
     )
+    delete_match: bpy.props.EnumProperty(
+        name="Delete",
+        items=(
+            ("NAME", "By Name", "Action constraints with the chosen name"),
+            ("ACTION", "By Action", "Action constraints playing the chosen action"),
+            ("ALL", "All", "All action constraints"),
+        ),
+        description="Which action constraints get deleted.",
+    )
+    delete_scope: bpy.props.EnumProperty(
+        name="Scope",
+        items=(
+            ("SELECTED", "Selected Bones", "Only the selected pose bones"),
+            ("ARMATURE", "Whole Armature", "Every bone of the active armature"),
+        ),
+        description="Bones to delete action constraints from.",
+    )
 
     space_values = []
     space_values.append(("LOCAL_SPACE", "Local Space", "Local Space", "None", 0))
@@ -387,13 +474,41 @@ class CreateDriverConstraint(bpy.types.Operator):
             layout = self.layout
 
             row = layout.row()
-            row.label(text="Property Data Path")
-            row.prop(self, "prop_data_path", text="")
+            row.label(text="Shape")
+            row.prop(self, "shape_name", text="")
+
+            if self.shape_name == "PROPERTY":
+                row = layout.row()
+                row.label(text="Property Data Path")
+                row.prop(self, "prop_data_path", text="")
+            elif self.shape_name == "CREATE_NEW_SHAPE":
+                row = layout.row()
+                row.label(text="New Shapes")
+                row.prop(self, "new_shape_scope", text="")
+
+                row = layout.row()
+                row.label(text="New Shape Name")
+                row.prop(self, "new_shape_name", text="")
+
+                row = layout.row()
+                row.label(text="Source Mesh")
+                row.prop_search(self, "new_shape_source", bpy.data, "objects", text="")
+                if self.new_shape_source:
+                    row = layout.row()
+                    row.label(text="Source Space")
+                    row.prop(self, "new_shape_space", expand=True)
 
             row = layout.row()
             row.label(text="Get Driver Limits")
             row.prop(self, "get_limits_auto", text="")
 
+            if self.get_limits_auto:
+                row = layout.row()
+                row.label(text="Limits From")
+                row.prop(self, "limits_source", text="")
+                if self.limits_source == "ACTION":
+                    row.prop(self, "limits_action", text="")
+
             row = layout.row()
             row.label(text="Set Driver Limits")
             row.prop(self, "set_driver_limit_constraint", text="")
@@ -406,6 +521,14 @@ class CreateDriverConstraint(bpy.types.Operator):
             row.label(text="Space")
             row.prop(self, "space", text="")
 
+            row = layout.row()
+            row.label(text="Driver Mode")
+            row.prop(self, "driver_mode", text="")
+
+            row = layout.row()
+            row.label(text="Combine Bones")
+            row.prop(self, "combine", text="")
+
             row = layout.row()
             col = row.column()
             col.label(text="Driver Limits")
@@ -487,125 +610,121 @@ class CreateDriverConstraint(bpy.types.Operator):
             elif self.action_mode == "DELETE_CONSTRAINT":
                 col = layout.column()
                 row = layout.row()
-                row.label(text="Action")
-                row.prop(self, "action_constraint", text="")
+                row.label(text="Scope")
+                row.prop(self, "delete_scope", text="")
+
+                row = layout.row()
+                row.label(text="Delete")
+                row.prop(self, "delete_match", text="")
+
+                if self.delete_match == "NAME":
+                    row = layout.row()
+                    row.label(text="Constraint")
+                    row.prop(self, "action_constraint", text="")
+                elif self.delete_match == "ACTION":
+                    row = layout.row()
+                    row.label(text="Action")
+                    row.prop(self, "action", text="")
 
     def create_actions_constraints(self, context):
         if self.action_mode == "ADD_CONSTRAINT":
-            for bone in context.selected_pose_bones:
-                if context.active_pose_bone != bone:
-                    #                    const = None
-                    #                    for c in bone.constraints:
-                    #                        if c.action.name == self.action:
-                    #                            const = c
-                    #                    if const == None:
-                    const = bone.constraints.new("ACTION")
-                    if "LOCAL" in self.space:
-                        const.target_space = "LOCAL"
-                    elif "WORLD" in self.space:
-                        const.target_space = "WORLD"
-                    const.target = context.active_object
-                    const.subtarget = context.active_pose_bone.name
-
-                    if self.type == "LOC_X":
-                        const.transform_channel = "LOCATION_X"
-                    elif self.type == "LOC_Y":
-                        const.transform_channel = "LOCATION_Y"
-                    elif self.type == "LOC_Z":
-                        const.transform_channel = "LOCATION_Z"
-                    elif self.type == "ROT_X":
-                        const.transform_channel = "ROTATION_X"
-                    elif self.type == "ROT_Y":
-                        const.transform_channel = "ROTATION_Y"
-                    elif self.type == "ROT_Z":
-                        const.transform_channel = "ROTATION_Z"
-                    else:
-                        const.transform_channel = self.type
-
-                    const.min = self.min_value
-                    const.max = self.max_value
-                    const.frame_start = self.action_frame_start
-                    const.frame_end = int(self.action_frame_end)
-                    const.action = bpy.data.actions[self.action]
-            bpy.ops.ed.undo_push(message="Action Constraints generated.")
-            self.report({"INFO"}, "Action constraints generated.")
+            bones = [
+                bone
+                for bone in context.selected_pose_bones
+                if context.active_pose_bone != bone
+            ]
+            settings = (
+                context.active_object,
+                context.active_pose_bone.name,
+                bpy.data.actions[self.action],
+                self.type,
+                self.space,
+                self.min_value,
+                self.max_value,
+                self.action_frame_start,
+                self.action_frame_end,
+            )
+            stats = drivers.new_stats()
+            changes = []
+
+            def step(batch):
+                with instrumentation.stage("action_constraints"):
+                    action_constraints.add_action_constraints(
+                        batch, *settings, stats=stats, changes=changes
+                    )
+
+            def finish():
+                for key, value in stats.items():
+                    instrumentation.count(f"action_constraints_{key}", value)
+                if changes:
+                    with instrumentation.stage("relations_update"):
+                        action_constraints.update_relations(bpy.context.view_layer)
+                    with instrumentation.stage("undo_push"):
+                        bpy.ops.ed.undo_push(message="Action Constraints generated.")
+                self.report(
+                    {"INFO"}, f"Action constraints: {drivers.format_stats(stats)}."
+                )
+
+            def rollback():
+                action_constraints.revert_changes(changes)
+
+            job = chunked.ChunkedJob("Action constraints", bones, step, finish, rollback)
+            return self.run_job(context, job)
         elif self.action_mode == "DELETE_CONSTRAINT":
-            for bone in context.selected_pose_bones:
-                for const in bone.constraints:
-                    if (
-                        const.name == self.action_constraint
-                    ):  # or (self.action_constraint == "ALL_ACTIONS"):
-                        # bone.constraints.remove(const)
-                        # if self.action_constraint != "ALL_ACTIONS":
-                        #    break
-                        pass
-            bpy.ops.ed.undo_push(message="Action Constraints deleted.")
-            self.report({"INFO"}, "Action constraints deleted.")
+            name = None
+            action = None
+            if self.delete_match == "NAME" and self.action_constraint != "ALL_ACTIONS":
+                name = self.action_constraint
+            elif self.delete_match == "ACTION":
+                action = bpy.data.actions.get(self.action)
+                if action is None:
+                    self.report({"WARNING"}, f"Action {self.action} not found.")
+                    instrumentation.end()
+                    return {"CANCELLED"}
+
+            with instrumentation.stage("index"):
+                index = action_constraints.find_action_constraints(
+                    self.get_delete_bones(context), name, action
+                )
+            with instrumentation.stage("remove"):
+                count = action_constraints.remove_action_constraints(index)
+            instrumentation.count("action_constraints_deleted", count)
+            if count:
+                with instrumentation.stage("relations_update"):
+                    action_constraints.update_relations(context.view_layer)
+                with instrumentation.stage("undo_push"):
+                    bpy.ops.ed.undo_push(message="Action Constraints deleted.")
+            self.report({"INFO"}, f"{count} Action constraints deleted.")
+        instrumentation.end()
+        return {"FINISHED"}
 
     def set_defaults(self, context):
-        ### set location
-        if self.driver.location != Vector((0, 0, 0)):
-            l = [
-                abs(self.driver.location.x),
-                abs(self.driver.location.y),
-                abs(self.driver.location.z),
-            ]
-            m = max(l)
-            type = ["LOC_X", "LOC_Y", "LOC_Z"]
-
-            for i, value in enumerate(l):
-                if l[i] == m:
-                    self.min_value = 0.000000
-                    self.max_value = self.driver.location[i]
-                    self.type = type[i]
-                    break
-            return "LIMIT_LOCATION"
-
-        ### set rotation
-        driver_rotation = Euler()
-        if self.driver.rotation_mode == "QUATERNION":
-            driver_rotation = self.driver.rotation_quaternion.to_euler("XYZ")
-        else:
-            driver_rotation = self.driver.rotation_euler
-
-        if Vector((driver_rotation.x, driver_rotation.y, driver_rotation.z)) != Vector(
-            (0, 0, 0)
-        ):
-            l = [abs(driver_rotation.x), abs(driver_rotation.y), abs(driver_rotation.z)]
-            m = max(l)
-            type = ["ROT_X", "ROT_Y", "ROT_Z"]
-
-            for i, value in enumerate(l):
-                if l[i] == m:
-                    self.min_value = 0.000000
-                    self.max_value = degrees(driver_rotation[i])
-                    self.type = type[i]
-                    break
-            return "LIMIT_ROTATION"
-
-        ### set scale
-        if self.driver.scale != Vector((1, 1, 1)):
-            l = [
-                abs(self.driver.scale.x),
-                abs(self.driver.scale.y),
-                abs(self.driver.scale.z),
-            ]
-            l_delta = [
-                abs(1.0 - self.driver.scale.x),
-                abs(1.0 - self.driver.scale.y),
-                abs(1.0 - self.driver.scale.z),
-            ]
-            m_delta = max(l_delta)
-            m = max(l)
-            type = ["SCALE_X", "SCALE_Y", "SCALE_Z"]
-
-            for i, value in enumerate(l):
-                if l_delta[i] == m_delta:
-                    self.min_value = 1.000000
-                    self.max_value = l[i]
-                    self.type = type[i]
-                    break
-            return "LIMIT_SCALE"
+        from . import limits
+
+        driver = self.driver if self.driver is not None else get_driver_transform(context)
+        if driver is None:
+            return None
+
+        if self.limits_source == "ACTION" and self.limits_action in bpy.data.actions:
+            action = bpy.data.actions[self.limits_action]
+            found = limits.detect_action_limits(action, [driver])
+            if 0 not in found:
+                return None
+            transform_type, min_value, max_value, limit_type = found[0]
+            self.min_value = min_value
+            self.max_value = max_value
+            self.type = transform_type
+            return limit_type
+
+        channels, min_values, max_values = limits.detect_limits(
+            *limits.snapshot_transform(driver)
+        )
+        transform_type, limit_type = limits.describe(int(channels[0]))
+        if transform_type is not None:
+            self.min_value = float(min_values[0])
+            self.max_value = float(max_values[0])
+            self.type = transform_type
+        return limit_type
 
     def execute(self, context):
         wm = context.window_manager
@@ -613,128 +732,184 @@ class CreateDriverConstraint(bpy.types.Operator):
         scene = context.view_layer
         active_object = context.active_object
 
-        if self.mode == "DRIVER":
+        instrumentation.begin(f"{self.bl_idname} {self.mode}")
+        if self.mode == "ACTION":
+            return self.create_actions_constraints(context)
+        elif self.mode == "DRIVER":
             self.create_property_driver(wm, context, scene, active_object)
-        elif self.mode == "ACTION":
-            self.create_actions_constraints(context)
+        instrumentation.end()
 
         return {"FINISHED"}
 
+    def get_other_bones(self, context, bone_name):
+        """
+        Returns (rows, errors): DriverRows for the selected bones other than
+        bone_name with their limits detected like Get Limits does, and
+        (row, message) for the bones without limits.
+        """
+        from . import limits
+
+        others = [
+            drivers.DriverRow("", bone.name, None, None, None, self.space)
+            for bone in context.selected_pose_bones or ()
+            if bone.name != bone_name
+        ]
+        action = None
+        if self.limits_source == "ACTION":
+            action = bpy.data.actions.get(self.limits_action)
+        with instrumentation.stage("limits"):
+            errors = limits.fill_auto_limits(others, context.active_object, action)
+        failed = {id(row) for row, message in errors}
+        return [row for row in others if id(row) not in failed], errors
+
+    def get_combined_inputs(self, context, bone_name):
+        """
+        Returns DriverRows for a combined driver: the active bone with the
+        operator settings, then the other selected bones with their limits
+        detected like Get Limits does.
+        """
+        inputs = [
+            drivers.DriverRow(
+                "", bone_name, self.type, self.min_value, self.max_value, self.space
+            )
+        ]
+        others, errors = self.get_other_bones(context, bone_name)
+        if errors:
+            raise ValueError(
+                ", ".join(f"{row.bone_name}: {message}" for row, message in errors)
+            )
+        return inputs + others
+
+    def create_new_shapes(self, context, active_object):
+        """
+        Creates the shape keys of the CREATE_NEW_SHAPE item and drives them,
+        one for the active bone or one per selected bone. A source sculpted
+        in pose space is extracted to rest space first.
+        """
+        bone_name = ""
+        if active_object.type == "ARMATURE":
+            bone_name = context.active_pose_bone.name
+        rows = [
+            drivers.DriverRow(
+                self.new_shape_name or shape_keys.new_shape_name(bone_name, self.type),
+                bone_name,
+                self.type,
+                self.min_value,
+                self.max_value,
+                self.space,
+            )
+        ]
+        errors = []
+        if self.new_shape_scope == "SELECTED_BONES" and active_object.type == "ARMATURE":
+            others, errors = self.get_other_bones(context, bone_name)
+            for row in others:
+                row.prop_data_path = shape_keys.new_shape_name(row.bone_name, row.transform_type)
+            rows.extend(others)
+
+        source = None
+        if self.new_shape_source:
+            source = bpy.data.objects.get(self.new_shape_source)
+            if source is None:
+                self.report({"WARNING"}, f"Source mesh {self.new_shape_source} not found.")
+                return
+        obj = get_target_object(context)
+        if obj is None:
+            self.report({"WARNING"}, "Select the mesh to add the shape keys to.")
+            return
+        stats = drivers.new_stats()
+        try:
+            coordinates = None
+            if source is not None and self.new_shape_space == "POSE":
+                # the sculpt matches the current pose, leave earlier extractions out of it
+                coordinates = corrective.extract_rest_coordinates(
+                    obj, source, ignore={row.prop_data_path for row in rows}
+                )
+                source = None
+            curves, driver_errors, created = shape_keys.create_shape_drivers(
+                obj,
+                rows,
+                active_object,
+                source,
+                self.driver_mode,
+                stats=stats,
+                coordinates=coordinates,
+            )
+        except ValueError as e:
+            self.report({"WARNING"}, str(e))
+            return
+        errors.extend(driver_errors)
+
+        with instrumentation.stage("limit_constraint"):
+            self.set_limit_constraint(context)
+
+        msg = f"{created} Shape Keys created, Drivers: {drivers.format_stats(stats)}"
+        if errors:
+            drivers.write_errors(
+                [f"Could not drive a shape for {row.bone_name}: {message}" for row, message in errors]
+            )
+            self.report(
+                {"WARNING"},
+                f"{msg}, {len(errors)} skipped. See the text block {drivers.ERROR_TEXT}.",
+            )
+        else:
+            self.report({"INFO"}, msg + ".")
+
     def create_property_driver(self, wm, context, scene, active_object):
-        def parse_path(path):
-            parts = []
-            current = ""
-            bracket_depth = 0
-            for i, char in enumerate(path):
-                if char == "[":
-                    bracket_depth += 1
-                elif char == "]":
-                    bracket_depth -= 1
-                    if bracket_depth == 0 and i + 1 < len(path) and path[i + 1] == "[":
-                        # Found "][", split into two parts
-                        parts.append(current + char)
-                        current = ""
-                        continue
-                elif char == "." and bracket_depth == 0:
-                    if current:
-                        parts.append(current)
-                        current = ""
-                    continue
-                current += char
-            if current:
-                parts.append(current)
-            return parts
-
-        def get_property_from_path(path):
-            parts = parse_path(path)
-            current = bpy.data
-            parent = None
-            for part in parts[2:]:  # Skip 'bpy' and 'data'
-                parent = current
-                if part.startswith("[") and part.endswith("]"):
-                    # Handle custom properties
-                    key = part[1:-1].strip("\"'")
-                    current = current[key]
-                elif "[" in part and "]" in part:
-                    attr, index = part.split("[", 1)
-                    index = index.rstrip("]").strip("\"'")
-                    if attr:
-                        current = getattr(current, attr)
-                    current = current[int(index) if index.isdigit() else index]
-                else:
-                    current = getattr(current, part)
-            return parent, current, parts[-1]
+        if self.shape_name == "CREATE_NEW_SHAPE":
+            return self.create_new_shapes(context, active_object)
+        if self.shape_name not in ("", "PROPERTY"):
+            obj = get_target_object(context)
+            shape_keys_data = getattr(obj.data, "shape_keys", None) if obj is not None else None
+            if shape_keys_data is not None and self.shape_name in shape_keys_data.key_blocks:
+                self.prop_data_path = shape_keys.shape_key_path(
+                    shape_keys_data.key_blocks[self.shape_name]
+                )
 
         driver_found = False
+        stats = drivers.new_stats()
         try:
-            print(f"Attempting to add driver to: {self.prop_data_path}")
-            parent, target, last_part = get_property_from_path(self.prop_data_path)
-
-            if last_part.startswith("[") and last_part.endswith("]"):
-                # Custom property
-                print(f"Executing: parent.driver_add({last_part})")
-                curve = parent.driver_add(last_part)
-            elif hasattr(target, "driver_add"):
-                print(f"Executing: {self.prop_data_path}.driver_add()")
-                curve = target.driver_add()
-            elif hasattr(parent, "driver_add"):
-                if "[" in last_part and "]" in last_part:
-                    prop_name, index = last_part.split("[", 1)
-                    index = int(index.rstrip("]"))
-                    print(f"Executing: parent.driver_add('{prop_name}', {index})")
-                    curve = parent.driver_add(prop_name, index)
-                else:
-                    print(f"Executing: parent.driver_add('{last_part}')")
-                    curve = parent.driver_add(last_part)
+            bone_name = ""
+            if active_object.type == "ARMATURE":
+                bone_name = context.active_pose_bone.name
+            if self.combine != "NONE":
+                curve = drivers.add_combined_driver(
+                    self.prop_data_path,
+                    active_object,
+                    self.get_combined_inputs(context, bone_name),
+                    self.combine,
+                    stats=stats,
+                )
             else:
-                raise AttributeError("Cannot add driver to this property")
-
-            if curve is not None:
-                driver_found = True
-                if len(curve.driver.variables) < 1:
-                    curve_var = curve.driver.variables.new()
-                else:
-                    curve_var = curve.driver.variables[0]
-
-                if len(curve.modifiers) > 0:
-                    curve.modifiers.remove(curve.modifiers[0])
-                curve.driver.type = "SCRIPTED"
-                curve_var.type = "TRANSFORMS"
-
-                driver_obj = context.active_object
-                curve_var.targets[0].id = driver_obj
-                if driver_obj.type == "ARMATURE":
-                    curve_var.targets[0].bone_target = context.active_pose_bone.name
-                curve_var.targets[0].transform_space = self.space
-                curve_var.targets[0].transform_type = self.type
-
-                if self.type in ["ROT_X", "ROT_Y", "ROT_Z"]:
-                    min_value = radians(self.min_value)
-                    max_value = radians(self.max_value)
-                else:
-                    min_value = self.min_value
-                    max_value = self.max_value
-
-                if self.type in ["SCALE_X", "SCALE_Y", "SCALE_Z"]:
-                    curve.driver.expression = (
-                        f"max({min_value}-1,(var-1)/({max_value}-1))"
-                    )
-                else:
-                    curve.driver.expression = f"max({min_value},var/{max_value})"
-
-                for point in curve.keyframe_points:
-                    curve.keyframe_points.remove(point)
+                curve = drivers.add_property_driver(
+                    self.prop_data_path,
+                    active_object,
+                    bone_name,
+                    self.type,
+                    self.space,
+                    self.min_value,
+                    self.max_value,
+                    self.driver_mode,
+                    stats,
+                )
+            driver_found = curve is not None
 
         except Exception as e:
-            print(f"Error adding driver: {str(e)}")
+            logger.info("Error adding driver: %s", e)
             self.report(
                 {"WARNING"}, f"Error adding driver to {self.prop_data_path}: {str(e)}"
             )
 
-        self.set_limit_constraint(context)
+        with instrumentation.stage("limit_constraint"):
+            self.set_limit_constraint(context)
 
         if driver_found:
-            msg = f"{self.prop_data_path} Driver has been added. min value = {self.min_value}, max value = {self.max_value}"
+            if stats["unchanged"]:
+                state = "is up to date"
+            elif stats["updated"]:
+                state = "has been updated"
+            else:
+                state = "has been added"
+            msg = f"{self.prop_data_path} Driver {state}. min value = {self.min_value}, max value = {self.max_value}"
             self.report({"INFO"}, msg)
         else:
             msg = (
@@ -795,40 +970,25 @@ class CreateDriverConstraint(bpy.types.Operator):
     def invoke(self, context, event):
         wm = context.window_manager
 
-        self.driver = None
-        if (
-            context.active_object.type == "ARMATURE"
-            and context.active_pose_bone != None
-        ):
-            self.driver = context.active_pose_bone
-        elif context.active_object.type in ["MESH", "EMPTY"]:
-            self.driver = context.active_object
-
-        if len(context.selected_objects) > 1:
-            obj = None
-            for obj2 in context.selected_objects:
-                if obj2 != context.view_layer.objects.active:
-                    obj = obj2
-                    break
-        else:
-            obj = context.selected_objects[0]
+        self.driver = get_driver_transform(context)
+
+        obj = get_target_object(context)
 
         if wm.clipboard != "":
-            prop_object, prop_type = get_prop_object(self, context, wm.clipboard, obj)
-            if prop_object is not None and prop_type is not None:
+            try:
+                prop_object, prop_type = get_prop_object(self, context, wm.clipboard, obj)
+            except data_path.PathResolveError as e:
+                self.report({"WARNING"}, f"{e}. Using default property type.")
+                self.property_type = "OBJECT_PROPERTY"
+            else:
                 self.prop_data_path = wm.clipboard
                 self.property_type = prop_type
-            else:
-                self.report(
-                    {"WARNING"},
-                    f"Property path not found: {wm.clipboard}. Using default property type.",
-                )
-                self.property_type = "OBJECT_PROPERTY"
         else:
             self.property_type = "OBJECT_PROPERTY"
 
         if self.get_limits_auto:
-            self.limit_type = self.set_defaults(context)
+            with instrumentation.stage("limits"):
+                self.limit_type = self.set_defaults(context)
 
         if self.action in bpy.data.actions:
             action = bpy.data.actions[self.action]
@@ -837,4 +997,57 @@ class CreateDriverConstraint(bpy.types.Operator):
         return wm.invoke_props_dialog(self)
 
 
-bpy.utils.register_class(CreateDriverConstraint)
+class CheckPythonDrivers(bpy.types.Operator):
+    bl_idname = "object.check_python_drivers"
+    bl_label = "Check Python Drivers"
+    bl_description = "Lists transform drivers that need the Python interpreter to evaluate"
+
+    def execute(self, context):
+        found = drivers.find_python_drivers()
+        for id_data, curve in found:
+            print(
+                f"{id_data.name}: {curve.data_path}[{curve.array_index}] "
+                f"needs Python to evaluate: {curve.driver.expression}"
+            )
+        if found:
+            self.report(
+                {"WARNING"},
+                f"{len(found)} Drivers need Python to evaluate. See console for details.",
+            )
+        else:
+            self.report({"INFO"}, "All transform drivers evaluate without Python.")
+        return {"FINISHED"}
+
+
+PROFILE_TEXT = "Driver Constraint Profile"
+
+
+class DriverConstraintProfile(bpy.types.Operator):
+    bl_idname = "object.driver_constraint_profile"
+    bl_label = "Driver Constraint Profile"
+    bl_description = "Shows where the last driver constraint operator spent its time"
+
+    filepath: bpy.props.StringProperty(
+        name="File Path",
+        default="",
+        description="Write the profile to this file, as JSON if it ends in .json. Leave empty for a text block.",
+        subtype="FILE_PATH",
+    )
+
+    def execute(self, context):
+        if self.filepath:
+            instrumentation.dump(bpy.path.abspath(self.filepath))
+            self.report({"INFO"}, f"Profile written to {self.filepath}.")
+            return {"FINISHED"}
+
+        report = instrumentation.report()
+        text = bpy.data.texts.get(PROFILE_TEXT)
+        if text is None:
+            text = bpy.data.texts.new(PROFILE_TEXT)
+        text.from_string(report)
+        print(report)
+        self.report({"INFO"}, f"Profile written to the text block {PROFILE_TEXT}.")
+        return {"FINISHED"}
+
+
+classes = (CreateDriverConstraint, CheckPythonDrivers, DriverConstraintProfile)
@@ -0,0 +1,115 @@
+"""
+Pose-space corrective shapes.
+
+The artist poses the rig, sculpts the fix on a copy of the deformed mesh and
+extract_rest_coordinates turns the sculpt back into rest space: it returns
+the shape key coordinates that, deformed by the current pose, end up at the
+sculpted positions.
+
+Around the current pose the deformers used on characters (armature, lattice,
+...) move every vertex by a 3x3 matrix times its shape key offset. These
+deform matrices are measured for all vertices at once: a temporary shape key
+moves every vertex by step along x, y and z in turn, and the evaluated mesh
+is read with foreach_get after each step. The 3x3 systems of all vertices
+are then solved in one batched NumPy call. Vertices whose matrix is singular
+keep their plain offset.
+
+NumPy is imported on first use, it is not needed to register the addon.
+"""
+
+import bpy
+
+from . import instrumentation, shape_keys
+
+PROBE_NAME = "driver_constraint_probe"
+
+
+def evaluated_coordinates(obj):
+    """Returns the vertex coordinates of obj after its modifiers, as float64."""
+    import numpy as np
+
+    obj.data.update()
+    bpy.context.view_layer.update()
+    evaluated = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+    mesh = evaluated.to_mesh()
+    try:
+        if len(mesh.vertices) != len(obj.data.vertices):
+            raise ValueError(
+                f"The modifiers of {obj.name} change its vertex count, "
+                "correctives need a deformation only"
+            )
+        return shape_keys.read_coordinates(mesh.vertices).astype(np.float64)
+    finally:
+        evaluated.to_mesh_clear()
+
+
+def deform_matrices(obj, step=0.01, ignore=()):
+    """
+    Returns (posed, matrices): the evaluated coordinates of obj as an (n, 3)
+    array and the (n, 3, 3) deform matrix of every vertex in the current pose.
+    The shape keys named in ignore are muted meanwhile.
+    """
+    import numpy as np
+
+    if obj.data.shape_keys is None:
+        obj.shape_key_add(name="Basis", from_mix=False)
+    key_blocks = obj.data.shape_keys.key_blocks
+    rest = shape_keys.read_coordinates(key_blocks[0].data)
+    muted = [block for block in key_blocks if block.name in ignore and not block.mute]
+    for block in muted:
+        block.mute = True
+    probe = obj.shape_key_add(name=PROBE_NAME, from_mix=False)
+    try:
+        probe.value = 1.0
+        with instrumentation.stage("corrective_evaluate"):
+            posed = evaluated_coordinates(obj).reshape(-1, 3)
+        matrices = np.empty((len(posed), 3, 3))
+        offset = np.empty_like(rest)
+        for axis in range(3):
+            offset[:] = rest
+            offset[axis::3] += step
+            probe.data.foreach_set("co", offset)
+            with instrumentation.stage("corrective_evaluate"):
+                moved = evaluated_coordinates(obj).reshape(-1, 3)
+            matrices[:, :, axis] = (moved - posed) / step
+    finally:
+        obj.shape_key_remove(probe)
+        for block in muted:
+            block.mute = False
+        obj.data.update()
+    return posed, matrices
+
+
+def solve_offsets(matrices, targets):
+    """
+    Returns the rest space offsets d with matrices @ d == targets per vertex,
+    targets itself where a matrix is singular.
+    """
+    import numpy as np
+
+    offsets = np.array(targets, dtype=np.float64)
+    solvable = np.abs(np.linalg.det(matrices)) > 1e-9
+    if solvable.any():
+        offsets[solvable] = np.linalg.solve(matrices[solvable], targets[solvable][..., None])[..., 0]
+    return offsets
+
+
+def extract_rest_coordinates(obj, sculpt, step=0.01, ignore=()):
+    """
+    Returns the coordinates of a shape key of obj, a flat float32 array,
+    that deformed by the current pose matches the vertices of the mesh object
+    sculpt, a sculpted copy of the posed obj. Shape keys named in ignore, e.g.
+    an earlier extraction of the same corrective, do not count as part of the
+    pose. Raises ValueError if the vertex counts differ.
+    """
+    import numpy as np
+
+    shape_keys.check_source(obj, sculpt)
+    with instrumentation.stage("corrective_read"):
+        target = shape_keys.read_coordinates(sculpt.data.vertices).astype(np.float64).reshape(-1, 3)
+    posed, matrices = deform_matrices(obj, step, ignore)
+    rest = shape_keys.read_coordinates(obj.data.shape_keys.key_blocks[0].data).reshape(-1, 3)
+    with instrumentation.stage("corrective_solve"):
+        offsets = solve_offsets(matrices, target - posed)
+    instrumentation.count("corrective_vertices", len(offsets))
+    return (rest + offsets).astype(np.float32).ravel()
@@ -0,0 +1,281 @@
+"""
+Compiled data path resolution.
+
+A data path like bpy.data.objects["Cube"].modifiers["Subsurf"].levels is
+compiled once into a tuple of (attribute, key) parts. Compiled paths are kept
+in an LRU cache keyed by the path string, so re-resolving a path from the
+operator dialog does not parse it again. Resolved objects are cached as well,
+but only until the next depsgraph update, undo/redo or file load.
+
+Resolution hands everything between the owning ID and the last part to
+Blender's native path_resolve in one call. The Python walker is only used when
+there is no ID to resolve from or the native call rejects the path, and it
+reports which part failed and why through PathResolveError.
+"""
+
+import re
+from collections import OrderedDict
+
+import bpy
+
+from . import instrumentation
+
+COMPILED_CACHE_SIZE = 512
+RESOLVED_CACHE_SIZE = 128
+
+NO_KEY = object()
+
+_PART_RE = re.compile(
+    r"(?P<attr>[A-Za-z_]\w*)?"
+    r"(?:\[(?:\"(?P<dq>(?:[^\"\\]|\\.)*)\"|'(?P<sq>(?:[^'\\]|\\.)*)'|(?P<num>-?\d+))\])?"
+    r"(?:\.|(?=\[)|$)"
+)
+_UNESCAPE_RE = re.compile(r"\\(.)")
+
+
+class PathResolveError(ValueError):
+    """
+    Raised when a data path is malformed or one of its parts can not be found.
+
+    index -- position of the failing part in CompiledPath.parts, or None if
+             the path could not be parsed
+    part -- source text of the failing part
+    reason -- short description of what went wrong
+    """
+
+    def __init__(self, path, index, part, reason):
+        self.path = path
+        self.index = index
+        self.part = part
+        self.reason = reason
+        if index is None:
+            message = f"Malformed data path {path!r}: {reason}"
+        else:
+            message = f"Could not resolve {part!r} in {path!r}: {reason}"
+        super().__init__(message)
+
+
+class CompiledPath:
+    """
+    A parsed data path.
+
+    parts -- tuple of (attr, key) pairs, attr is None for a bare ["key"] and
+             key is NO_KEY when the part has no subscript
+    sources -- the text of each part as it appears in the path
+    from_data -- True when the path starts with bpy.data
+    """
+
+    __slots__ = ("path", "parts", "sources", "from_data", "_parent_rna_path")
+
+    def __init__(self, path, parts, sources, from_data):
+        self.path = path
+        self.parts = parts
+        self.sources = sources
+        self.from_data = from_data
+        # rna path from the owning ID (or relative root) to the parent of the
+        # last part, handed to path_resolve as is
+        start = 1 if from_data else 0
+        self._parent_rna_path = join_sources(sources[start:-1])
+
+    @property
+    def last_part(self):
+        return self.sources[-1] if self.sources else ""
+
+    def root(self, obj):
+        return bpy.data if self.from_data else obj
+
+    def walk(self, root, start=0):
+        """
+        Resolves the parts from start on, one Python lookup at a time.
+
+        Returns (parent, target) where parent owns the last part.
+        """
+        parent = None
+        current = root
+        for index in range(start, len(self.parts)):
+            parent = current
+            current = self.step(current, index)
+        return parent, current
+
+    def step(self, current, index):
+        attr, key = self.parts[index]
+        try:
+            if attr is not None:
+                current = getattr(current, attr)
+            if key is not NO_KEY:
+                current = current[key]
+        except AttributeError:
+            raise PathResolveError(
+                self.path, index, self.sources[index],
+                f"{type(current).__name__} has no attribute {attr!r}",
+            ) from None
+        except KeyError:
+            raise PathResolveError(
+                self.path, index, self.sources[index], f"no item named {key!r}"
+            ) from None
+        except IndexError:
+            raise PathResolveError(
+                self.path, index, self.sources[index], f"index {key} is out of range"
+            ) from None
+        except TypeError:
+            raise PathResolveError(
+                self.path, index, self.sources[index],
+                f"{type(current).__name__} can not be indexed with {key!r}",
+            ) from None
+        return current
+
+    @property
+    def owner_source(self):
+        """Source of the part naming the owning ID, None for relative paths."""
+        return self.sources[0] if self.from_data and self.parts else None
+
+    def resolve_owner(self, root):
+        """Returns the ID a bpy.data path belongs to, or root for relative paths."""
+        if self.from_data:
+            return self.step(root, 0)
+        return root
+
+    def resolve(self, root):
+        """
+        Returns (parent, target), resolving natively wherever possible.
+
+        For bpy.data paths the first part is the owning ID. Everything up to
+        the parent of the last part is one path_resolve call on that ID.
+        """
+        if not self.parts:
+            raise PathResolveError(self.path, None, "", "path is empty")
+        if self.from_data and len(self.parts) == 1:
+            return self.walk(root)
+        return self.resolve_in_owner(self.resolve_owner(root))
+
+    def resolve_in_owner(self, owner):
+        """Same as resolve, starting from an already resolved owner."""
+        start = 1 if self.from_data else 0
+        path_resolve = getattr(owner, "path_resolve", None)
+        if path_resolve is None:
+            return self.walk(owner, start)
+
+        if self._parent_rna_path:
+            try:
+                parent = path_resolve(self._parent_rna_path)
+            except ValueError:
+                # let the walker find the failing part, or handle a shape the
+                # rna path syntax does not cover
+                return self.walk(owner, start)
+        else:
+            parent = owner
+        return parent, self.step(parent, len(self.parts) - 1)
+
+
+_compiled = OrderedDict()
+_resolved = OrderedDict()
+
+
+def join_sources(sources):
+    """Joins part sources back into an rna path."""
+    path = ""
+    for source in sources:
+        if path and not source.startswith("["):
+            path += "."
+        path += source
+    return path
+
+
+def quote(name):
+    """Returns name as a double quoted key, escaped like the parser expects."""
+    escaped = name.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _parse(path):
+    parts = []
+    sources = []
+    pos = 0
+    end = len(path)
+    while pos < end:
+        match = _PART_RE.match(path, pos)
+        if match is None or match.end() == pos:
+            raise PathResolveError(path, None, path[pos:], f"unexpected text at position {pos}")
+        attr = match.group("attr")
+        if match.group("num") is not None:
+            key = int(match.group("num"))
+        elif match.group("dq") is not None:
+            key = _UNESCAPE_RE.sub(r"\1", match.group("dq"))
+        elif match.group("sq") is not None:
+            key = _UNESCAPE_RE.sub(r"\1", match.group("sq"))
+        else:
+            key = NO_KEY
+        if attr is None and key is NO_KEY:
+            raise PathResolveError(path, None, path[pos:], f"unexpected text at position {pos}")
+        parts.append((attr, key))
+        sources.append(path[pos : match.end()].rstrip("."))
+        pos = match.end()
+    return parts, sources
+
+
+def compile_path(path):
+    """Returns the CompiledPath for path, parsing it only on a cache miss."""
+    compiled = _compiled.get(path)
+    if compiled is not None:
+        _compiled.move_to_end(path)
+        instrumentation.count("path_cache_hits")
+        return compiled
+
+    with instrumentation.stage("path_parse"):
+        parts, sources = _parse(path.strip())
+    from_data = len(parts) >= 2 and parts[0] == ("bpy", NO_KEY) and parts[1] == ("data", NO_KEY)
+    if from_data:
+        parts = parts[2:]
+        sources = sources[2:]
+    compiled = CompiledPath(path, tuple(parts), tuple(sources), from_data)
+
+    _compiled[path] = compiled
+    if len(_compiled) > COMPILED_CACHE_SIZE:
+        _compiled.popitem(last=False)
+    return compiled
+
+
+def _root_key(root):
+    as_pointer = getattr(root, "as_pointer", None)
+    return as_pointer() if as_pointer is not None else id(root)
+
+
+def resolve_path(path, obj=None):
+    """
+    Resolves path against bpy.data or, for relative paths, against obj.
+
+    Returns (compiled, parent, target). Raises PathResolveError when the
+    path is malformed or a part can not be found.
+    """
+    compiled = compile_path(path)
+    root = compiled.root(obj)
+    cache_key = (path, _root_key(root))
+    resolved = _resolved.get(cache_key)
+    if resolved is not None:
+        _resolved.move_to_end(cache_key)
+        instrumentation.count("resolve_cache_hits")
+        return resolved
+
+    with instrumentation.stage("resolve"):
+        parent, target = compiled.resolve(root)
+    resolved = (compiled, parent, target)
+    _resolved[cache_key] = resolved
+    if len(_resolved) > RESOLVED_CACHE_SIZE:
+        _resolved.popitem(last=False)
+    return resolved
+
+
+def clear_resolved_cache():
+    _resolved.clear()
+
+
+@bpy.app.handlers.persistent
+def drop_stale_resolutions(*args):
+    # resolved RNA pointers can dangle once data changes, parsed paths never do
+    _resolved.clear()
+
+
+handlers = tuple(
+    (handler_name, drop_stale_resolutions)
+    for handler_name in ("depsgraph_update_post", "undo_post", "redo_post", "load_post")
+)
@@ -0,0 +1,783 @@
+"""
+Driver creation shared by the driver constraint operators.
+
+add_property_driver wires a single property to a bone or object transform.
+create_drivers does the same for many rows at once: rows are grouped by the ID
+that owns their target, every owner is resolved once and the driver_add calls
+of one owner run back to back.
+
+Besides the classic scripted expression, the mapping can be emitted in a form
+that never needs the Python interpreter at playback: an expression restricted
+to Blender's simple expression subset, or an AVERAGE driver shaped by a
+Generator and a Limits F-Modifier.
+
+A combined driver reads several transform channels, one variable each, and
+merges their mapped values into one value (product, minimum, maximum or
+weighted sum) within the simple expression subset, e.g. for corrective
+shapes depending on two bones.
+
+Drivers are identified by the property they drive. Applying the same setup
+again leaves matching drivers untouched and rewrites outdated ones in place,
+the stats Counter passed to add_property_driver and create_drivers counts
+"created", "updated" and "unchanged" drivers.
+"""
+
+import csv
+from collections import Counter
+from math import isclose, radians
+
+import bpy
+
+from . import data_path, instrumentation
+from .instrumentation import logger
+
+ROTATION_TYPES = {"ROT_X", "ROT_Y", "ROT_Z"}
+SCALE_TYPES = {"SCALE_X", "SCALE_Y", "SCALE_Z"}
+TRANSFORM_TYPES = (
+    "LOC_X", "LOC_Y", "LOC_Z",
+    "ROT_X", "ROT_Y", "ROT_Z",
+    "SCALE_X", "SCALE_Y", "SCALE_Z",
+)
+TRANSFORM_SPACES = ("LOCAL_SPACE", "TRANSFORM_SPACE", "WORLD_SPACE")
+DRIVER_MODE_ITEMS = (
+    ("SCRIPTED", "Scripted", "Scripted expression", "None", 0),
+    (
+        "SIMPLE_EXPRESSION",
+        "Simple Expression",
+        "Expression that stays on Blender's fast simple expression evaluator",
+        "None",
+        1,
+    ),
+    (
+        "GENERATOR",
+        "Generator",
+        "Averaged driver shaped by Generator and Limits modifiers, no expression at all",
+        "None",
+        2,
+    ),
+)
+
+COMBINE_ITEMS = (
+    ("NONE", "Single Input", "One transform channel drives the property", "None", 0),
+    ("PRODUCT", "Product", "Multiply the inputs, 1.0 only when all are at their max", "None", 1),
+    ("MIN", "Minimum", "The smallest of the inputs", "None", 2),
+    ("MAX", "Maximum", "The largest of the inputs", "None", 3),
+    ("WEIGHTED_SUM", "Weighted Sum", "Sum of the inputs, equally weighted by default", "None", 4),
+)
+COMBINE_MODES = ("PRODUCT", "MIN", "MAX", "WEIGHTED_SUM")
+
+# bpy.data collections whose IDs can carry drivers
+ANIMATABLE_COLLECTIONS = (
+    "objects",
+    "meshes",
+    "curves",
+    "shape_keys",
+    "armatures",
+    "materials",
+    "textures",
+    "node_groups",
+    "lights",
+    "cameras",
+    "worlds",
+    "scenes",
+)
+
+
+class DriverRow:
+    """One driver of a batch: target path, driving bone, transform and limits."""
+
+    __slots__ = (
+        "prop_data_path",
+        "bone_name",
+        "transform_type",
+        "min_value",
+        "max_value",
+        "space",
+    )
+
+    def __init__(
+        self,
+        prop_data_path,
+        bone_name="",
+        transform_type="LOC_X",
+        min_value=0.0,
+        max_value=1.0,
+        space="LOCAL_SPACE",
+    ):
+        self.prop_data_path = prop_data_path
+        self.bone_name = bone_name
+        self.transform_type = transform_type
+        self.min_value = min_value
+        self.max_value = max_value
+        self.space = space
+
+    def __repr__(self):
+        return f"DriverRow({self.prop_data_path!r}, {self.bone_name!r}, {self.transform_type!r})"
+
+
+def parse_rows(text, default_bone="", default_space="LOCAL_SPACE"):
+    """
+    Parses driver rows from comma separated text.
+
+    Each line is: data path, bone[, transform type, min, max, space]. Empty
+    lines and lines starting with # are skipped, an empty bone falls back to
+    default_bone. A missing or AUTO transform type and missing limits are
+    left as None, to be detected from the bone pose.
+    """
+    rows = []
+    lines = (line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#"))
+    for number, fields in enumerate(csv.reader(lines, skipinitialspace=True), 1):
+        fields = [field.strip() for field in fields] + [""] * 4
+        if not fields[0]:
+            raise ValueError(f"Row {number} has no data path")
+        transform_type = fields[2].upper()
+        if transform_type in ("", "AUTO"):
+            transform_type = None
+        elif transform_type not in TRANSFORM_TYPES:
+            raise ValueError(f"Row {number} has unknown transform type {fields[2]!r}")
+        if bool(fields[3]) != bool(fields[4]):
+            raise ValueError(f"Row {number} needs both limits or none")
+        space = fields[5].upper() or default_space
+        if space not in TRANSFORM_SPACES:
+            raise ValueError(f"Row {number} has unknown space {fields[5]!r}")
+        rows.append(
+            DriverRow(
+                fields[0],
+                fields[1] or default_bone,
+                transform_type,
+                float(fields[3]) if fields[3] else None,
+                float(fields[4]) if fields[4] else None,
+                space,
+            )
+        )
+    return rows
+
+
+def add_driver_curve(compiled, parent, target):
+    """Adds (or returns the existing) driver F-Curve for a resolved path."""
+    last_part = compiled.last_part
+    prop_name, index = compiled.parts[-1]
+
+    with instrumentation.stage("driver_add"):
+        if prop_name is None:
+            # Custom property
+            logger.debug("parent.driver_add(%s)", last_part)
+            return parent.driver_add(last_part)
+        elif hasattr(target, "driver_add"):
+            logger.debug("%s.driver_add()", compiled.path)
+            return target.driver_add()
+        elif hasattr(parent, "driver_add"):
+            if index is not data_path.NO_KEY:
+                logger.debug("parent.driver_add(%r, %r)", prop_name, index)
+                return parent.driver_add(prop_name, index)
+            else:
+                logger.debug("parent.driver_add(%r)", last_part)
+                return parent.driver_add(last_part)
+    raise AttributeError("Cannot add driver to this property")
+
+
+def _number(value):
+    value = float(value)
+    if value != value or value in (float("inf"), float("-inf")):
+        raise ValueError(f"Driver limit {value} is not a finite number")
+    return repr(value)
+
+
+def get_mapping(transform_type, min_value, max_value):
+    """
+    Returns (offset, factor, lower) so that the driver value is
+    max(lower, offset + factor * var), the same mapping as the scripted
+    expression. Rotation limits are given in degrees.
+    """
+    if transform_type in ROTATION_TYPES:
+        min_value = radians(min_value)
+        max_value = radians(max_value)
+
+    if transform_type in SCALE_TYPES:
+        if max_value == 1.0:
+            raise ValueError("Max scale limit must not be 1.0")
+        factor = 1.0 / (max_value - 1.0)
+        return -factor, factor, min_value - 1.0
+    if max_value == 0.0:
+        raise ValueError("Max limit must not be 0.0")
+    return 0.0, 1.0 / max_value, min_value
+
+
+def input_term(name, transform_type, min_value, max_value):
+    """Returns the mapping of variable name as a simple expression."""
+    offset, factor, lower = get_mapping(transform_type, min_value, max_value)
+    return f"max({_number(lower)},{_number(offset)}+{name}*{_number(factor)})"
+
+
+def driver_expression(transform_type, min_value, max_value, driver_mode="SCRIPTED"):
+    """Returns the expression of a SCRIPTED or SIMPLE_EXPRESSION driver."""
+    if driver_mode == "SCRIPTED":
+        if transform_type in ROTATION_TYPES:
+            min_value = radians(min_value)
+            max_value = radians(max_value)
+
+        if transform_type in SCALE_TYPES:
+            return f"max({min_value}-1,(var-1)/({max_value}-1))"
+        return f"max({min_value},var/{max_value})"
+    return input_term("var", transform_type, min_value, max_value)
+
+
+def combined_variable_name(index):
+    return f"var{index + 1}"
+
+
+def combined_expression(inputs, combine, weights=None):
+    """
+    Returns the expression merging the mapped values of inputs, DriverRows
+    read by the variables var1, var2, ... Weights default to 1 / len(inputs).
+    """
+    terms = [
+        input_term(combined_variable_name(index), row.transform_type, row.min_value, row.max_value)
+        for index, row in enumerate(inputs)
+    ]
+    if combine == "PRODUCT":
+        return "*".join(terms)
+    if combine in ("MIN", "MAX"):
+        # nested pairs, the simple expression evaluator is safe with those
+        expression = terms[-1]
+        for term in reversed(terms[:-1]):
+            expression = f"{combine.lower()}({term},{expression})"
+        return expression
+    if combine == "WEIGHTED_SUM":
+        if weights is None:
+            weights = [1.0 / len(terms)] * len(terms)
+        if len(weights) != len(terms):
+            raise ValueError(f"{len(terms)} inputs need {len(terms)} weights, not {len(weights)}")
+        return "+".join(f"{_number(weight)}*{term}" for weight, term in zip(weights, terms))
+    raise ValueError(f"Unknown combine mode {combine!r}")
+
+
+def _close(a, b):
+    # F-Modifier settings are stored in single precision
+    return isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
+
+
+def driver_matches(
+    curve,
+    driver_obj,
+    bone_name,
+    transform_type,
+    space,
+    min_value,
+    max_value,
+    driver_mode="SCRIPTED",
+):
+    """True if setup_driver with these arguments would not change curve."""
+    variables = curve.driver.variables
+    if len(variables) != 1 or len(curve.keyframe_points) > 0:
+        return False
+    if not _target_matches(variables[0], driver_obj, bone_name, transform_type, space):
+        return False
+
+    driver = curve.driver
+    modifiers = list(curve.modifiers)
+    if driver_mode != "GENERATOR":
+        return (
+            driver.type == "SCRIPTED"
+            and not modifiers
+            and (driver_mode == "SCRIPTED" or not driver.use_self)
+            and driver.expression
+            == driver_expression(transform_type, min_value, max_value, driver_mode)
+        )
+
+    offset, factor, lower = get_mapping(transform_type, min_value, max_value)
+    if driver.type != "AVERAGE" or [modifier.type for modifier in modifiers] != [
+        "GENERATOR",
+        "LIMITS",
+    ]:
+        return False
+    generator, limits = modifiers
+    coefficients = tuple(generator.coefficients)
+    return (
+        generator.mode == "POLYNOMIAL"
+        and generator.poly_order == 1
+        and not generator.use_additive
+        and len(coefficients) == 2
+        and _close(coefficients[0], offset)
+        and _close(coefficients[1], factor)
+        and limits.use_min_y
+        and _close(limits.min_y, lower)
+    )
+
+
+STAT_KEYS = ("created", "updated", "unchanged")
+
+# F-Modifier settings making up a driver mapping
+MODIFIER_SETTINGS = {
+    "GENERATOR": ("mode", "poly_order", "use_additive", "coefficients"),
+    "LIMITS": ("use_min_y", "min_y", "use_max_y", "max_y"),
+}
+
+# id_type first, setting it clears id
+TARGET_SETTINGS = (
+    "id_type",
+    "id",
+    "bone_target",
+    "data_path",
+    "transform_type",
+    "transform_space",
+    "rotation_mode",
+)
+
+
+def new_stats():
+    """Returns a Counter for the stats argument, with all keys at 0."""
+    return Counter(dict.fromkeys(STAT_KEYS, 0))
+
+
+def format_stats(stats):
+    """Returns e.g. "3 created, 1 updated, 0 unchanged" for a stats Counter."""
+    return ", ".join(f"{stats[key]} {key}" for key in STAT_KEYS)
+
+
+ERROR_TEXT = "Driver Constraint Errors"
+
+
+def write_errors(messages):
+    """
+    Writes messages to the text block ERROR_TEXT, one per line, replacing
+    what an earlier run left there, and logs them as warnings. The log is
+    silent by default, the text block is what the operator reports point to.
+    """
+    text = bpy.data.texts.get(ERROR_TEXT)
+    if text is None:
+        text = bpy.data.texts.new(ERROR_TEXT)
+    text.from_string("\n".join(messages))
+    for message in messages:
+        logger.warning("%s", message)
+
+
+def set_transform_variable(variable, driver_obj, bone_name, transform_type, space):
+    variable.type = "TRANSFORMS"
+    target = variable.targets[0]
+    target.id = driver_obj
+    if driver_obj.type == "ARMATURE":
+        target.bone_target = bone_name
+    target.transform_space = space
+    target.transform_type = transform_type
+
+
+def _target_matches(variable, driver_obj, bone_name, transform_type, space):
+    target = variable.targets[0]
+    return (
+        variable.type == "TRANSFORMS"
+        and target.id == driver_obj
+        and (driver_obj.type != "ARMATURE" or target.bone_target == bone_name)
+        and target.transform_space == space
+        and target.transform_type == transform_type
+    )
+
+
+def setup_combined_driver(curve, driver_obj, inputs, combine, weights=None):
+    """
+    Turns curve into a driver with one TRANSFORMS variable per input, a
+    DriverRow each, merged by combine, one of COMBINE_MODES.
+    """
+    if len(inputs) < 2:
+        raise ValueError("A combined driver needs at least two inputs")
+    expression = combined_expression(inputs, combine, weights)
+
+    variables = curve.driver.variables
+    while len(variables) > len(inputs):
+        variables.remove(variables[len(variables) - 1])
+    while len(variables) < len(inputs):
+        variables.new()
+    for index, (variable, row) in enumerate(zip(variables, inputs)):
+        variable.name = combined_variable_name(index)
+        set_transform_variable(variable, driver_obj, row.bone_name, row.transform_type, row.space)
+
+    for modifier in reversed(list(curve.modifiers)):
+        curve.modifiers.remove(modifier)
+    curve.driver.type = "SCRIPTED"
+    curve.driver.use_self = False
+    curve.driver.expression = expression
+    for point in reversed(list(curve.keyframe_points)):
+        curve.keyframe_points.remove(point)
+
+
+def combined_matches(curve, driver_obj, inputs, combine, weights=None):
+    """True if setup_combined_driver with these arguments would not change curve."""
+    variables = curve.driver.variables
+    if (
+        len(variables) != len(inputs)
+        or len(curve.modifiers) > 0
+        or len(curve.keyframe_points) > 0
+        or curve.driver.type != "SCRIPTED"
+        or curve.driver.use_self
+        or curve.driver.expression != combined_expression(inputs, combine, weights)
+    ):
+        return False
+    return all(
+        variable.name == combined_variable_name(index)
+        and _target_matches(variable, driver_obj, row.bone_name, row.transform_type, row.space)
+        for index, (variable, row) in enumerate(zip(variables, inputs))
+    )
+
+
+def setup_driver(
+    curve,
+    driver_obj,
+    bone_name,
+    transform_type,
+    space,
+    min_value,
+    max_value,
+    driver_mode="SCRIPTED",
+):
+    """
+    Turns curve into a driver mapping the transform channel onto 0..1.
+
+    driver_mode -- SCRIPTED keeps the classic expression, SIMPLE_EXPRESSION
+                   writes it with precomputed constants only, GENERATOR uses
+                   an AVERAGE driver with Generator and Limits F-Modifiers
+    """
+    if len(curve.driver.variables) < 1:
+        curve_var = curve.driver.variables.new()
+    else:
+        curve_var = curve.driver.variables[0]
+
+    # the default Generator of a new driver, or the ones of an earlier mode
+    for modifier in reversed(list(curve.modifiers)):
+        curve.modifiers.remove(modifier)
+    set_transform_variable(curve_var, driver_obj, bone_name, transform_type, space)
+
+    if driver_mode == "SCRIPTED":
+        curve.driver.type = "SCRIPTED"
+        curve.driver.expression = driver_expression(transform_type, min_value, max_value)
+    else:
+        if driver_mode == "SIMPLE_EXPRESSION":
+            curve.driver.type = "SCRIPTED"
+            curve.driver.use_self = False
+            curve.driver.expression = driver_expression(
+                transform_type, min_value, max_value, driver_mode
+            )
+        else:
+            offset, factor, lower = get_mapping(transform_type, min_value, max_value)
+            curve.driver.type = "AVERAGE"
+            generator = curve.modifiers.new("GENERATOR")
+            generator.mode = "POLYNOMIAL"
+            generator.poly_order = 1
+            generator.use_additive = False
+            generator.coefficients = (offset, factor)
+            limits = curve.modifiers.new("LIMITS")
+            limits.use_min_y = True
+            limits.min_y = lower
+
+    for point in reversed(list(curve.keyframe_points)):
+        curve.keyframe_points.remove(point)
+
+
+def iter_drivers(collections=ANIMATABLE_COLLECTIONS):
+    """Yields (id, fcurve) for every driver in the given bpy.data collections."""
+    for collection_name in collections:
+        for id_data in getattr(bpy.data, collection_name, ()):
+            anim_data = getattr(id_data, "animation_data", None)
+            if anim_data is None:
+                continue
+            for curve in anim_data.drivers:
+                yield id_data, curve
+
+
+# custom properties holding a transform mapping shared by several drivers
+SHARED_INPUT_PREFIX = "dc_"
+
+
+def is_shared_input(variable):
+    """True for a variable reading a shared input written by consolidate."""
+    return variable.type == "SINGLE_PROP" and variable.targets[0].data_path.startswith(
+        f'["{SHARED_INPUT_PREFIX}'
+    )
+
+
+def is_transform_driver(curve):
+    """True for drivers shaped like the ones this addon generates."""
+    variables = curve.driver.variables
+    return len(variables) > 0 and (
+        variables[0].type == "TRANSFORMS" or is_shared_input(variables[0])
+    )
+
+
+def find_python_drivers():
+    """
+    Returns (id, fcurve) for every transform driver that falls off Blender's
+    simple expression evaluator and needs the Python interpreter every time
+    it is evaluated.
+    """
+    found = []
+    for id_data, curve in iter_drivers():
+        driver = curve.driver
+        if driver.type != "SCRIPTED" or not is_transform_driver(curve):
+            continue
+        if driver.use_self or not driver.is_simple_expression:
+            found.append((id_data, curve))
+    return found
+
+
+def add_property_driver(
+    prop_data_path,
+    driver_obj,
+    bone_name,
+    transform_type,
+    space,
+    min_value,
+    max_value,
+    driver_mode="SCRIPTED",
+    stats=None,
+):
+    """
+    Adds a driver to the property at prop_data_path, or updates the one it
+    already has.
+
+    Returns the driver F-Curve, or None if Blender did not create one. Raises
+    data_path.PathResolveError or AttributeError if the property can not be
+    found or driven.
+    """
+    logger.debug("Adding driver to %s", prop_data_path)
+    compiled, parent, target = data_path.resolve_path(prop_data_path)
+    existing = _driver_count(parent)
+    curve = add_driver_curve(compiled, parent, target)
+    if curve is not None:
+        _apply_setup(
+            curve,
+            _driver_count(parent) > existing,
+            stats,
+            (driver_obj, bone_name, transform_type, space, min_value, max_value, driver_mode),
+        )
+    return curve
+
+
+def add_combined_driver(prop_data_path, driver_obj, inputs, combine, weights=None, stats=None):
+    """
+    Adds a driver combining inputs, DriverRows whose prop_data_path is not
+    used, to the property at prop_data_path or updates the one it has.
+    Returns the driver F-Curve like add_property_driver.
+    """
+    logger.debug("Adding combined driver to %s", prop_data_path)
+    compiled, parent, target = data_path.resolve_path(prop_data_path)
+    existing = _driver_count(parent)
+    curve = add_driver_curve(compiled, parent, target)
+    if curve is not None:
+        _apply_setup(
+            curve,
+            _driver_count(parent) > existing,
+            stats,
+            (driver_obj, inputs, combine, weights),
+            setup_combined_driver,
+            combined_matches,
+        )
+    return curve
+
+
+def _driver_count(parent):
+    anim_data = getattr(parent.id_data, "animation_data", None)
+    return len(anim_data.drivers) if anim_data is not None else 0
+
+
+def _apply_setup(
+    curve,
+    is_new,
+    stats,
+    settings,
+    setup=setup_driver,
+    matches=driver_matches,
+    changes=None,
+    id_data=None,
+):
+    """
+    Runs setup on curve unless an existing driver already matches. changes
+    receives (id_data, curve, previous state) like in create_drivers.
+    """
+    with instrumentation.stage("variable_setup"):
+        if not is_new and matches(curve, *settings):
+            key = "unchanged"
+        else:
+            if changes is not None:
+                changes.append((id_data, curve, None if is_new else driver_state(curve)))
+            setup(curve, *settings)
+            key = "created" if is_new else "updated"
+    instrumentation.count(f"drivers_{key}")
+    if stats is not None:
+        stats[key] += 1
+
+
+def create_drivers(
+    rows,
+    driver_obj,
+    obj=None,
+    driver_mode="SCRIPTED",
+    created=None,
+    stats=None,
+    changes=None,
+):
+    """
+    Adds one driver per row, or updates the driver the property already has.
+
+    Relative paths are resolved against obj. Returns (curves, errors) where
+    errors is a list of (row, message) for rows that could not be created.
+    If created is a list, (id, curve) is appended to it for every driver
+    F-Curve that did not exist before, see remove_drivers. stats counts
+    created, updated and unchanged drivers. changes receives (id, curve,
+    previous state) for every created (previous is None) or updated driver,
+    see revert_changes.
+    """
+    curves = []
+    errors = []
+
+    # group rows by the ID owning their target so each owner resolves once
+    groups = {}
+    for row in rows:
+        try:
+            compiled = data_path.compile_path(row.prop_data_path)
+        except data_path.PathResolveError as e:
+            errors.append((row, str(e)))
+            continue
+        groups.setdefault(compiled.owner_source, []).append((row, compiled))
+
+    pose_bones = driver_obj.pose.bones if driver_obj.type == "ARMATURE" else None
+    root = bpy.data
+    for owner_source, group in groups.items():
+        try:
+            with instrumentation.stage("resolve"):
+                owner = group[0][1].resolve_owner(root if owner_source is not None else obj)
+        except data_path.PathResolveError as e:
+            errors.extend((row, str(e)) for row, compiled in group)
+            continue
+
+        for row, compiled in group:
+            if pose_bones is not None and pose_bones.get(row.bone_name) is None:
+                errors.append((row, f"Bone {row.bone_name!r} not found in {driver_obj.name}"))
+                continue
+            try:
+                with instrumentation.stage("resolve"):
+                    if compiled.from_data and len(compiled.parts) == 1:
+                        parent, target = compiled.walk(root)
+                    else:
+                        parent, target = compiled.resolve_in_owner(owner)
+                existing = _driver_count(parent)
+                curve = add_driver_curve(compiled, parent, target)
+                if curve is None:
+                    errors.append((row, "Property is not drivable"))
+                    continue
+                is_new = _driver_count(parent) > existing
+                if created is not None and is_new:
+                    created.append((parent.id_data, curve))
+                _apply_setup(
+                    curve,
+                    is_new,
+                    stats,
+                    (
+                        driver_obj,
+                        row.bone_name,
+                        row.transform_type,
+                        row.space,
+                        row.min_value,
+                        row.max_value,
+                        driver_mode,
+                    ),
+                    changes=changes,
+                    id_data=parent.id_data,
+                )
+            except (ValueError, AttributeError, TypeError) as e:
+                logger.info("Could not add driver to %s: %s", row.prop_data_path, e)
+                errors.append((row, str(e)))
+                continue
+            curves.append(curve)
+    instrumentation.count("driver_errors", len(errors))
+    return curves, errors
+
+
+def remove_drivers(created):
+    """Removes the (id, curve) pairs collected by create_drivers, newest first."""
+    for id_data, curve in reversed(created):
+        id_data.animation_data.drivers.remove(curve)
+
+
+def _copied(value):
+    return tuple(value) if hasattr(value, "__len__") and not isinstance(value, str) else value
+
+
+def driver_state(curve):
+    """
+    Returns what setting up a driver may change on curve: the driver type,
+    expression and variables, the F-Modifiers and keyframes, see
+    restore_driver.
+    """
+    driver = curve.driver
+    variables = [
+        (
+            variable.name,
+            variable.type,
+            [
+                tuple(getattr(target, attr) for attr in TARGET_SETTINGS)
+                for target in variable.targets
+            ],
+        )
+        for variable in driver.variables
+    ]
+    modifiers = [
+        (
+            modifier.type,
+            tuple(
+                _copied(getattr(modifier, attr))
+                for attr in MODIFIER_SETTINGS.get(modifier.type, ())
+            ),
+        )
+        for modifier in curve.modifiers
+    ]
+    points = [tuple(point.co) for point in curve.keyframe_points]
+    return driver.type, driver.expression, driver.use_self, variables, modifiers, points
+
+
+def restore_driver(curve, state):
+    """
+    Sets curve back to a driver_state. F-Modifiers other than GENERATOR and
+    LIMITS come back with their default settings.
+    """
+    driver_type, expression, use_self, variables, modifiers, points = state
+    driver = curve.driver
+    driver.type = driver_type
+    driver.expression = expression
+    driver.use_self = use_self
+
+    while len(driver.variables) > len(variables):
+        driver.variables.remove(driver.variables[len(driver.variables) - 1])
+    while len(driver.variables) < len(variables):
+        driver.variables.new()
+    for variable, (name, variable_type, targets) in zip(driver.variables, variables):
+        variable.name = name
+        variable.type = variable_type
+        for target, values in zip(variable.targets, targets):
+            for attr, value in zip(TARGET_SETTINGS, values):
+                # id_type is read-only for all but single property variables
+                if attr != "id_type" or variable_type == "SINGLE_PROP":
+                    setattr(target, attr, value)
+
+    for modifier in reversed(list(curve.modifiers)):
+        curve.modifiers.remove(modifier)
+    for modifier_type, values in modifiers:
+        modifier = curve.modifiers.new(modifier_type)
+        for attr, value in zip(MODIFIER_SETTINGS.get(modifier_type, ()), values):
+            setattr(modifier, attr, value)
+
+    for point in reversed(list(curve.keyframe_points)):
+        curve.keyframe_points.remove(point)
+    curve.keyframe_points.add(len(points))
+    for point, co in zip(curve.keyframe_points, points):
+        point.co = co
+
+
+def revert_changes(changes):
+    """
+    Undoes the changes collected by create_drivers, newest first: created
+    drivers are removed, updated ones get their previous state back.
+    """
+    for id_data, curve, previous in reversed(changes):
+        if previous is None:
+            id_data.animation_data.drivers.remove(curve)
+        else:
+            restore_driver(curve, previous)
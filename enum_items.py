@@ -0,0 +1,46 @@
+"""
+Cached items for dynamic EnumProperty callbacks.
+
+Blender calls item callbacks on every redraw of a dialog. Providers built with
+cached_items only rebuild their list when their key changes. Keys start with a
+version stamp that handlers bump on depsgraph updates, undo, redo and file
+load, so a stale list never outlives a change to the data it was built from.
+
+The cache also holds on to the returned lists. Blender does not copy the
+strings of dynamic enum items, they have to stay referenced from Python.
+"""
+
+import bpy
+
+_version = 0
+_items = {}
+
+
+def version():
+    return _version
+
+
+def cached_items(name, key, build):
+    """
+    Returns the items of provider name, calling build() only when key
+    differs from the key the cached items were built with.
+    """
+    key = (_version, key)
+    entry = _items.get(name)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    items = build()
+    _items[name] = (key, items)
+    return items
+
+
+@bpy.app.handlers.persistent
+def bump_version(*args):
+    global _version
+    _version += 1
+
+
+handlers = tuple(
+    (handler_name, bump_version)
+    for handler_name in ("depsgraph_update_post", "undo_post", "redo_post", "load_post")
+)
@@ -0,0 +1,156 @@
+"""
+Hot path instrumentation: stage timers, counters and the addon logger.
+
+Work is timed in named stages (path parse, resolve, driver_add, variable
+setup, limit constraint, undo push, ...) with
+
+    with instrumentation.stage("resolve"):
+        ...
+
+and counted with count(name). Operators call begin(name) when they start, so
+after a run report() shows where the time of that run went. Timing costs two
+perf_counter calls per stage and is always on.
+
+Messages go to the "driver_constraint" logger, which is silent unless the
+level is raised with set_log_level, e.g. set_log_level("DEBUG") to follow
+every driver_add call in the console.
+"""
+
+import json
+import logging
+import sys
+from time import perf_counter
+
+LOG_LEVELS = {
+    "SILENT": logging.CRITICAL + 10,
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+}
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time, like print does."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+logger = logging.getLogger("driver_constraint")
+if not logger.handlers:
+    _handler = _StdoutHandler()
+    _handler.setFormatter(logging.Formatter("%(name)s %(levelname)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+    logger.setLevel(LOG_LEVELS["SILENT"])
+
+_run_name = ""
+_run_start = perf_counter()
+_run_seconds = None
+_stage_seconds = {}
+_stage_calls = {}
+_counters = {}
+
+
+def set_log_level(level):
+    """Sets the log level by name, one of LOG_LEVELS."""
+    logger.setLevel(LOG_LEVELS[level.upper()])
+
+
+def get_log_level():
+    level = logger.level
+    for name, value in LOG_LEVELS.items():
+        if value == level:
+            return name
+    return logging.getLevelName(level)
+
+
+class stage:
+    """Context manager adding the time spent inside it to stage name."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = perf_counter() - self.start
+        name = self.name
+        _stage_seconds[name] = _stage_seconds.get(name, 0.0) + seconds
+        _stage_calls[name] = _stage_calls.get(name, 0) + 1
+        return False
+
+
+def count(name, amount=1):
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def reset():
+    _stage_seconds.clear()
+    _stage_calls.clear()
+    _counters.clear()
+
+
+def begin(name):
+    """Starts a new run: clears all stages and counters."""
+    global _run_name, _run_start, _run_seconds
+    reset()
+    _run_name = name
+    _run_start = perf_counter()
+    _run_seconds = None
+
+
+def end():
+    """Ends a run, logging its report at INFO level."""
+    global _run_seconds
+    _run_seconds = perf_counter() - _run_start
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(report())
+
+
+def profile():
+    """Returns the stages and counters of the current run as a dict."""
+    return {
+        "run": _run_name,
+        "seconds": _run_seconds if _run_seconds is not None else perf_counter() - _run_start,
+        "stages": {
+            name: {"calls": _stage_calls[name], "seconds": seconds}
+            for name, seconds in sorted(_stage_seconds.items(), key=lambda item: -item[1])
+        },
+        "counters": dict(sorted(_counters.items())),
+    }
+
+
+def report():
+    """Returns the profile of the current run as a text table."""
+    data = profile()
+    lines = [f"Profile of {data['run'] or 'last run'}, {data['seconds'] * 1000.0:.1f} ms"]
+    if data["stages"]:
+        lines.append(f"{'stage':24} {'calls':>8} {'total ms':>10} {'mean us':>10}")
+        for name, entry in data["stages"].items():
+            lines.append(
+                f"{name:24} {entry['calls']:>8} {entry['seconds'] * 1000.0:>10.3f} "
+                f"{entry['seconds'] * 1e6 / entry['calls']:>10.2f}"
+            )
+    for name, value in data["counters"].items():
+        lines.append(f"{name:24} {value:>8}")
+    return "\n".join(lines)
+
+
+def dump(path):
+    """Writes the profile of the current run to path, as JSON if it ends in .json."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            json.dump(profile(), f, indent=2)
+        else:
+            f.write(report() + "\n")
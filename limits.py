@@ -0,0 +1,380 @@
+"""
+Automatic driver limit detection.
+
+The current transform of every bone is snapshot into NumPy arrays with
+foreach_get, one call per channel and armature. The dominant channel, its
+limits and the matching limit constraint type are then found for all bones
+at once by detect_limits.
+
+Limits can also come from animation instead of the current pose: the
+keyframes of a driver's transform F-Curves are read with foreach_get and
+their observed range is turned into limits by detect_range_limits.
+"""
+
+import numpy as np
+
+from . import drivers
+
+LIMIT_TYPES = ("LIMIT_LOCATION", "LIMIT_ROTATION", "LIMIT_SCALE")
+NO_LIMIT = -1
+
+
+def quaternion_to_euler(quaternions):
+    """
+    Converts an (n, 4) array of w, x, y, z quaternions to (n, 3) XYZ eulers.
+
+    Matches mathutils Quaternion.to_euler("XYZ"), including the choice
+    between the two possible euler solutions.
+    """
+    q = np.asarray(quaternions, dtype=np.float64)
+    length = np.linalg.norm(q, axis=1, keepdims=True)
+    q = q / np.where(length == 0.0, 1.0, length)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+
+    m00 = 1.0 - 2.0 * (y * y + z * z)
+    m10 = 2.0 * (x * y + w * z)
+    m20 = 2.0 * (x * z - w * y)
+    m11 = 1.0 - 2.0 * (x * x + z * z)
+    m21 = 2.0 * (y * z + w * x)
+    m12 = 2.0 * (y * z - w * x)
+    m22 = 1.0 - 2.0 * (x * x + y * y)
+
+    cy = np.hypot(m00, m10)
+    regular = cy > 16.0 * np.finfo(np.float32).eps
+
+    eul1 = np.empty((len(q), 3))
+    eul2 = np.empty((len(q), 3))
+    eul1[:, 0] = np.where(regular, np.arctan2(m21, m22), np.arctan2(-m12, m11))
+    eul1[:, 1] = np.arctan2(-m20, cy)
+    eul1[:, 2] = np.where(regular, np.arctan2(m10, m00), 0.0)
+    eul2[:, 0] = np.where(regular, np.arctan2(-m21, -m22), eul1[:, 0])
+    eul2[:, 1] = np.where(regular, np.arctan2(-m20, -cy), eul1[:, 1])
+    eul2[:, 2] = np.where(regular, np.arctan2(-m10, -m00), 0.0)
+
+    use_second = np.abs(eul1).sum(axis=1) > np.abs(eul2).sum(axis=1)
+    return np.where(use_second[:, None], eul2, eul1)
+
+
+def euler_to_quaternion(eulers):
+    """Converts an (n, 3) array of XYZ eulers to (n, 4) w, x, y, z quaternions."""
+    half = np.asarray(eulers, dtype=np.float64) * 0.5
+    cx, cy, cz = np.cos(half).T
+    sx, sy, sz = np.sin(half).T
+    return np.stack(
+        (
+            cx * cy * cz + sx * sy * sz,
+            sx * cy * cz - cx * sy * sz,
+            cx * sy * cz + sx * cy * sz,
+            cx * cy * sz - sx * sy * cz,
+        ),
+        axis=1,
+    )
+
+
+def _collection_array(collection, attr, width):
+    values = np.empty(len(collection) * width, dtype=np.float64)
+    collection.foreach_get(attr, values)
+    return values.reshape(-1, width)
+
+
+def snapshot_pose_bones(pose_bones):
+    """
+    Returns (location, rotation, scale) arrays of shape (n, 3) for the given
+    pose bones, rotation as XYZ euler in radians.
+
+    Bones are read with one foreach_get per channel and armature; only the
+    rotation mode is looked up bone by bone.
+    """
+    pose_bones = list(pose_bones)
+    count = len(pose_bones)
+    location = np.zeros((count, 3))
+    rotation = np.zeros((count, 3))
+    scale = np.ones((count, 3))
+
+    by_armature = {}
+    for i, bone in enumerate(pose_bones):
+        by_armature.setdefault(bone.id_data, []).append(i)
+
+    for armature, rows in by_armature.items():
+        bones = armature.pose.bones
+        if len(rows) < 8:
+            indices = np.array([bones.find(pose_bones[i].name) for i in rows])
+        else:
+            lookup = {bone.name: index for index, bone in enumerate(bones)}
+            indices = np.array([lookup[pose_bones[i].name] for i in rows])
+        rows = np.array(rows)
+
+        location[rows] = _collection_array(bones, "location", 3)[indices]
+        scale[rows] = _collection_array(bones, "scale", 3)[indices]
+
+        euler = _collection_array(bones, "rotation_euler", 3)[indices]
+        is_quaternion = np.array(
+            [pose_bones[i].rotation_mode == "QUATERNION" for i in rows], dtype=bool
+        )
+        if is_quaternion.any():
+            quaternion = _collection_array(bones, "rotation_quaternion", 4)[indices]
+            euler[is_quaternion] = quaternion_to_euler(quaternion[is_quaternion])
+        rotation[rows] = euler
+
+    return location, rotation, scale
+
+
+def snapshot_transform(driver):
+    """Same as snapshot_pose_bones for a single pose bone or object."""
+    if driver.rotation_mode == "QUATERNION":
+        rotation = quaternion_to_euler([driver.rotation_quaternion])
+    else:
+        rotation = np.array([driver.rotation_euler], dtype=np.float64)
+    return (
+        np.array([driver.location], dtype=np.float64),
+        rotation,
+        np.array([driver.scale], dtype=np.float64),
+    )
+
+
+def detect_limits(location, rotation, scale):
+    """
+    Picks the dominant transform channel for every row.
+
+    A moved bone uses its largest location axis, otherwise a rotated bone its
+    largest rotation axis (in degrees), otherwise a scaled bone the axis that
+    differs most from 1.0. Returns (channels, min_values, max_values) where
+    channels indexes drivers.TRANSFORM_TYPES and is NO_LIMIT for bones in
+    rest pose.
+    """
+    count = len(location)
+    channels = np.full(count, NO_LIMIT, dtype=np.int64)
+    min_values = np.zeros(count)
+    max_values = np.ones(count)
+    rows = np.arange(count)
+
+    moved = np.any(location != 0.0, axis=1)
+    rotated = ~moved & np.any(rotation != 0.0, axis=1)
+    scaled = ~moved & ~rotated & np.any(scale != 1.0, axis=1)
+
+    axis = np.argmax(np.abs(location), axis=1)
+    channels[moved] = axis[moved]
+    max_values[moved] = location[rows, axis][moved]
+
+    axis = np.argmax(np.abs(rotation), axis=1)
+    channels[rotated] = 3 + axis[rotated]
+    max_values[rotated] = np.degrees(rotation[rows, axis][rotated])
+
+    axis = np.argmax(np.abs(1.0 - scale), axis=1)
+    channels[scaled] = 6 + axis[scaled]
+    min_values[scaled] = 1.0
+    max_values[scaled] = np.abs(scale[rows, axis][scaled])
+
+    return channels, min_values, max_values
+
+
+def _keyframes(fcurve):
+    points = fcurve.keyframe_points
+    co = np.empty(len(points) * 2, dtype=np.float64)
+    points.foreach_get("co", co)
+    return co[0::2], co[1::2]
+
+
+def _quaternion_keys(fcurves):
+    """Samples four quaternion F-Curves (None if missing) on their joined frames."""
+    keys = [_keyframes(fcurve) if fcurve is not None else None for fcurve in fcurves]
+    frames = [frame for frame, value in (key for key in keys if key is not None)]
+    if not frames:
+        return np.empty((0, 4))
+    frames = np.unique(np.concatenate(frames))
+
+    quaternions = np.empty((len(frames), 4))
+    for i, (fcurve, key) in enumerate(zip(fcurves, keys)):
+        if key is None:
+            quaternions[:, i] = 1.0 if i == 0 else 0.0
+        elif np.array_equal(key[0], frames):
+            quaternions[:, i] = key[1]
+        else:
+            quaternions[:, i] = [fcurve.evaluate(frame) for frame in frames]
+    return quaternions
+
+
+def snapshot_action_ranges(action, transforms):
+    """
+    Returns (low, high) arrays of shape (n, 9) holding the lowest and highest
+    keyed location, XYZ euler rotation and scale of every given pose bone or
+    object in action. Channels without keyframes are NaN.
+
+    Each F-Curve is looked up natively and read with a single foreach_get.
+    Quaternion curves are sampled on their joined keyframes and converted.
+    """
+    fcurves = action.fcurves
+    low = np.full((len(transforms), 9), np.nan)
+    high = np.full((len(transforms), 9), np.nan)
+
+    for row, driver in enumerate(transforms):
+        prefix = driver.path_from_id()
+        prefix = prefix + "." if prefix else ""
+        channels = [("location", 0, i) for i in range(3)] + [("scale", 6, i) for i in range(3)]
+        if driver.rotation_mode != "QUATERNION":
+            channels += [("rotation_euler", 3, i) for i in range(3)]
+
+        for attr, offset, index in channels:
+            fcurve = fcurves.find(prefix + attr, index=index)
+            if fcurve is None or len(fcurve.keyframe_points) == 0:
+                continue
+            values = _keyframes(fcurve)[1]
+            low[row, offset + index] = values.min()
+            high[row, offset + index] = values.max()
+
+        if driver.rotation_mode == "QUATERNION":
+            quaternion_curves = [
+                fcurves.find(prefix + "rotation_quaternion", index=i) for i in range(4)
+            ]
+            quaternions = _quaternion_keys(quaternion_curves)
+            if len(quaternions):
+                euler = quaternion_to_euler(quaternions)
+                low[row, 3:6] = euler.min(axis=0)
+                high[row, 3:6] = euler.max(axis=0)
+
+    return low, high
+
+
+def detect_range_limits(low, high):
+    """
+    Picks the dominant channel of keyed ranges from snapshot_action_ranges.
+
+    Location wins over rotation and rotation over scale, like detect_limits;
+    within a group the axis that strays furthest from rest is used. Returns
+    (channels, low_values, high_values), rotations in degrees.
+    """
+    count = len(low)
+    rest = np.array([0.0] * 6 + [1.0] * 3)
+    deviation = np.fmax(np.abs(low - rest), np.abs(high - rest))
+    deviation = np.nan_to_num(deviation, nan=0.0)
+
+    channels = np.full(count, NO_LIMIT, dtype=np.int64)
+    unassigned = np.ones(count, dtype=bool)
+    for offset in (0, 3, 6):
+        group = deviation[:, offset : offset + 3]
+        found = unassigned & np.any(group > 0.0, axis=1)
+        channels[found] = offset + np.argmax(group, axis=1)[found]
+        unassigned &= ~found
+
+    rows = np.arange(count)
+    picked = np.maximum(channels, 0)
+    low_values = low[rows, picked]
+    high_values = high[rows, picked]
+    rotation = (channels >= 3) & (channels < 6)
+    low_values[rotation] = np.degrees(low_values[rotation])
+    high_values[rotation] = np.degrees(high_values[rotation])
+    return channels, low_values, high_values
+
+
+def range_to_driver_limits(channel, low, high):
+    """
+    Turns a keyed range into (min_value, max_value) for a driver: min is the
+    rest value, max the end of the range furthest from rest, the same shape
+    set_defaults gives a posed bone.
+    """
+    rest = 1.0 if channel >= 6 else 0.0
+    extreme = high if abs(high - rest) >= abs(low - rest) else low
+    return rest, extreme
+
+
+def detect_action_limits(action, transforms):
+    """
+    Returns {index: (transform_type, min_value, max_value, limit_type)} for
+    every given pose bone or object that has transform keys in action.
+    """
+    channels, low_values, high_values = detect_range_limits(
+        *snapshot_action_ranges(action, transforms)
+    )
+    result = {}
+    for index, (channel, low, high) in enumerate(
+        zip(channels.tolist(), low_values.tolist(), high_values.tolist())
+    ):
+        transform_type, limit_type = describe(channel)
+        if transform_type is not None:
+            min_value, max_value = range_to_driver_limits(channel, low, high)
+            result[index] = (transform_type, min_value, max_value, limit_type)
+    return result
+
+
+def describe(channel):
+    """Returns (transform_type, limit_type) for a channel of detect_limits."""
+    if channel == NO_LIMIT:
+        return None, None
+    return drivers.TRANSFORM_TYPES[channel], LIMIT_TYPES[channel // 3]
+
+
+def detect_pose_bone_limits(pose_bones):
+    """
+    Returns {bone name: (transform_type, min_value, max_value, limit_type)}
+    for every given pose bone that is out of its rest pose.
+    """
+    pose_bones = list(pose_bones)
+    channels, min_values, max_values = detect_limits(*snapshot_pose_bones(pose_bones))
+    result = {}
+    for bone, channel, min_value, max_value in zip(
+        pose_bones, channels.tolist(), min_values.tolist(), max_values.tolist()
+    ):
+        transform_type, limit_type = describe(channel)
+        if transform_type is not None:
+            result[bone.name] = (transform_type, min_value, max_value, limit_type)
+    return result
+
+
+def fill_auto_limits(rows, driver_obj, action=None):
+    """
+    Fills in the transform type and limits of driver rows that left them
+    out, detecting all their bones in one pass. Limits come from the keyed
+    range in action when given, from the current pose otherwise. Returns
+    (row, message) for rows whose bone is missing or has nothing to detect.
+    """
+    pending = [
+        row
+        for row in rows
+        if row.transform_type is None or row.min_value is None or row.max_value is None
+    ]
+    if not pending:
+        return []
+
+    errors = []
+    sources = {}
+    if driver_obj.type == "ARMATURE":
+        for row in pending:
+            if row.bone_name not in sources:
+                bone = driver_obj.pose.bones.get(row.bone_name)
+                if bone is not None:
+                    sources[row.bone_name] = bone
+    else:
+        sources[""] = driver_obj
+
+    names = list(sources)
+    if action is not None:
+        found = detect_action_limits(action, list(sources.values()))
+        detected = {names[index]: value for index, value in found.items()}
+    elif driver_obj.type == "ARMATURE":
+        detected = detect_pose_bone_limits(sources.values())
+    else:
+        channels, min_values, max_values = detect_limits(*snapshot_transform(driver_obj))
+        transform_type, limit_type = describe(int(channels[0]))
+        detected = {}
+        if transform_type is not None:
+            detected[""] = (transform_type, float(min_values[0]), float(max_values[0]), limit_type)
+
+    for row in pending:
+        key = row.bone_name if driver_obj.type == "ARMATURE" else ""
+        if key not in sources:
+            errors.append((row, f"Bone {row.bone_name!r} not found in {driver_obj.name}"))
+            continue
+        if key not in detected:
+            reason = f"has no keys in {action.name}" if action is not None else "is in rest pose"
+            errors.append((row, f"No limits found, {row.bone_name or driver_obj.name} {reason}"))
+            continue
+        transform_type, min_value, max_value, limit_type = detected[key]
+        if row.transform_type is None:
+            row.transform_type = transform_type
+        elif row.min_value is None and row.transform_type != transform_type:
+            errors.append((row, f"No {row.transform_type} limits found, pose moves {transform_type}"))
+            continue
+        if row.min_value is None:
+            row.min_value = min_value
+            row.max_value = max_value
+    return errors
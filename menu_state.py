@@ -0,0 +1,76 @@
+"""
+Cached availability of the menu and panel entries.
+
+The draw hooks of the context menus and tool panels run on every redraw,
+VIEW3D_PT_tools_active redraws all the time. Building selected_objects or
+selected_pose_bones there costs time growing with the scene, so what the
+hooks show is computed once per selection change and read from a cache.
+
+The cache is keyed on the mode and the active object, which are cheap to
+read, and dropped when a depsgraph update is not a plain transform or
+geometry change (selecting objects or bones tags the depsgraph without
+either flag), on undo, redo and file load.
+"""
+
+import bpy
+
+_state = {}
+
+
+class Availability:
+    """What the draw hooks offer for the current selection."""
+
+    __slots__ = ("driver", "action")
+
+    def __init__(self, driver=False, action=False):
+        self.driver = driver
+        self.action = action
+
+
+def _compute(context):
+    obj = context.active_object
+    if obj is None or len(context.selected_objects) == 0:
+        return Availability()
+    pose_bones = getattr(context, "selected_pose_bones", None) or ()
+    return Availability(driver=True, action=obj.type == "ARMATURE" and len(pose_bones) > 1)
+
+
+def availability(context):
+    """Returns the Availability for context, computed once per selection change."""
+    obj = context.active_object
+    key = (context.mode, obj.as_pointer() if obj is not None else 0)
+    cached = _state.get(key)
+    if cached is None:
+        _state.clear()
+        cached = _state[key] = _compute(context)
+    return cached
+
+
+def invalidate():
+    _state.clear()
+
+
+@bpy.app.handlers.persistent
+def invalidate_selection(scene, depsgraph=None):
+    if not _state:
+        return
+    if depsgraph is None:
+        _state.clear()
+        return
+    for update in depsgraph.updates:
+        if not (
+            getattr(update, "is_updated_transform", False)
+            or getattr(update, "is_updated_geometry", False)
+        ):
+            _state.clear()
+            return
+
+
+@bpy.app.handlers.persistent
+def invalidate_all(*args):
+    _state.clear()
+
+
+handlers = (("depsgraph_update_post", invalidate_selection),) + tuple(
+    (handler_name, invalidate_all) for handler_name in ("undo_post", "redo_post", "load_post")
+)
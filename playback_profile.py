@@ -0,0 +1,312 @@
+"""
+Playback cost of the drivers and Action constraints on a rig.
+
+profile_playback steps the scene through a frame range and times the
+evaluation with everything enabled, with each kind of generated item muted
+and with all of them muted. The difference to the full run is what a kind
+costs at playback:
+
+    python_driver             scripted drivers that need the Python interpreter
+    simple_expression_driver  scripted drivers on the simple expression evaluator
+    generator_driver          AVERAGE drivers shaped by F-Modifiers
+    shared_input_driver       drivers copying a shared input, see consolidate
+    action_constraint         Action constraints, also counted per bone
+
+Headless, with the addon installed as driver_constraint_addon:
+
+    blender -b rig.blend --python-expr "import sys, driver_constraint_addon.playback_profile as p; sys.exit(p.main())" -- --frames 1 120 --output profile.json
+
+Mute states and the current frame are restored afterwards.
+"""
+
+import json
+import sys
+from time import perf_counter
+
+import bpy
+
+from . import action_constraints, drivers
+
+CATEGORIES = (
+    "python_driver",
+    "simple_expression_driver",
+    "generator_driver",
+    "shared_input_driver",
+    "action_constraint",
+)
+SORT_KEYS = ("seconds", "count", "name")
+
+
+def driver_category(curve):
+    driver = curve.driver
+    if drivers.is_shared_input(driver.variables[0]):
+        return "shared_input_driver"
+    if driver.type != "SCRIPTED":
+        return "generator_driver"
+    if driver.use_self or not driver.is_simple_expression:
+        return "python_driver"
+    return "simple_expression_driver"
+
+
+def collect_items():
+    """
+    Returns ({category: [fcurve or constraint]}, bones) for the whole file,
+    bones being (armature name, bone name, Action constraint count) for every
+    pose bone with Action constraints.
+    """
+    items = {category: [] for category in CATEGORIES}
+    for id_data, curve in drivers.iter_drivers():
+        if drivers.is_transform_driver(curve):
+            items[driver_category(curve)].append(curve)
+
+    bones = []
+    for obj in bpy.data.objects:
+        if obj.type != "ARMATURE" or obj.pose is None:
+            continue
+        for bone in obj.pose.bones:
+            found = [const for const in bone.constraints if const.type == "ACTION"]
+            if found:
+                items["action_constraint"].extend(found)
+                bones.append((obj.name, bone.name, len(found)))
+    return items, bones
+
+
+def set_muted(items, muted):
+    """Mutes or unmutes items, returns their previous mute states."""
+    previous = [item.mute for item in items]
+    for item in items:
+        item.mute = muted
+    return previous
+
+
+def restore_muted(items, previous):
+    for item, mute in zip(items, previous):
+        item.mute = mute
+
+
+def time_frames(scene, frames, repeat=1):
+    """Returns the best time of repeat runs stepping scene through frames."""
+    view_layer = bpy.context.view_layer
+    # muting changes what the depsgraph has to evaluate
+    action_constraints.update_relations(view_layer)
+    scene.frame_set(frames[0])
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        for frame in frames:
+            scene.frame_set(frame)
+        seconds = perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def profile_playback(scene, frame_start, frame_end, repeat=3):
+    """
+    Times playback of scene from frame_start to frame_end and attributes the
+    cost to the kinds of generated items. Returns the profile as a dict.
+    """
+    frames = list(range(int(frame_start), int(frame_end) + 1))
+    if not frames:
+        raise ValueError(f"Empty frame range {frame_start} to {frame_end}")
+    items, bones = collect_items()
+    everything = [item for category in CATEGORIES for item in items[category]]
+    current_frame = scene.frame_current
+    previous = [item.mute for item in everything]
+
+    try:
+        # time the full rig with the items the user muted on purpose unmuted
+        set_muted(everything, False)
+        baseline = time_frames(scene, frames, repeat)
+        categories = {}
+        for category in CATEGORIES:
+            found = items[category]
+            seconds = 0.0
+            if found:
+                set_muted(found, True)
+                seconds = max(0.0, baseline - time_frames(scene, frames, repeat))
+                set_muted(found, False)
+            categories[category] = {
+                "count": len(found),
+                "seconds": seconds,
+                "per_item_us": seconds * 1e6 / len(frames) / len(found) if found else 0.0,
+            }
+        set_muted(everything, True)
+        muted = time_frames(scene, frames, repeat)
+    finally:
+        restore_muted(everything, previous)
+        action_constraints.update_relations(bpy.context.view_layer)
+        scene.frame_set(current_frame)
+
+    per_constraint = categories["action_constraint"]["seconds"] / max(
+        categories["action_constraint"]["count"], 1
+    )
+    return {
+        "scene": scene.name,
+        "frames": [frames[0], frames[-1]],
+        "repeat": repeat,
+        "seconds": {
+            "baseline": baseline,
+            "muted": muted,
+            "generated": max(0.0, baseline - muted),
+        },
+        "ms_per_frame": baseline * 1000.0 / len(frames),
+        "categories": categories,
+        "bones": [
+            {
+                "armature": armature,
+                "bone": bone,
+                "action_constraints": count,
+                "seconds": count * per_constraint,
+            }
+            for armature, bone, count in sorted(bones, key=lambda entry: -entry[2])
+        ],
+    }
+
+
+def _sorted(entries, sort, name):
+    if sort == "name":
+        return sorted(entries, key=name)
+    key = "action_constraints" if sort == "count" and "action_constraints" in entries[0][1] else sort
+    return sorted(entries, key=lambda entry: -entry[1][key])
+
+
+def format_profile(profile, sort="seconds", max_bones=20):
+    """Returns profile as a text table, sorted by seconds, count or name."""
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key {sort!r}, choose from {SORT_KEYS}")
+    seconds = profile["seconds"]
+    frame_count = profile["frames"][1] - profile["frames"][0] + 1
+    lines = [
+        f"Playback of {profile['scene']}, frames {profile['frames'][0]} to {profile['frames'][1]}, "
+        f"best of {profile['repeat']}",
+        f"{profile['ms_per_frame']:.3f} ms per frame, "
+        f"{seconds['generated'] * 1000.0 / frame_count:.3f} ms of it in generated drivers and constraints",
+        f"{'kind':26} {'count':>8} {'ms/frame':>10} {'us/item':>10}",
+    ]
+    categories = [entry for entry in profile["categories"].items() if entry[1]["count"]]
+    if categories:
+        for category, entry in _sorted(categories, sort, lambda entry: entry[0]):
+            lines.append(
+                f"{category:26} {entry['count']:>8} {entry['seconds'] * 1000.0 / frame_count:>10.3f} "
+                f"{entry['per_item_us']:>10.2f}"
+            )
+
+    bones = [((entry["armature"], entry["bone"]), entry) for entry in profile["bones"]]
+    if bones:
+        lines.append(f"{'bone':36} {'action constraints':>18} {'ms/frame':>10}")
+        for (armature, bone), entry in _sorted(bones, sort, lambda entry: entry[0])[:max_bones]:
+            lines.append(
+                f"{armature + ': ' + bone:36} {entry['action_constraints']:>18} "
+                f"{entry['seconds'] * 1000.0 / frame_count:>10.3f}"
+            )
+        if len(bones) > max_bones:
+            lines.append(f"... {len(bones) - max_bones} more bones")
+    return "\n".join(lines)
+
+
+def dump(profile, path, sort="seconds"):
+    """Writes profile to path, as JSON if it ends in .json."""
+    with open(path, "w", encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            json.dump(profile, f, indent=2)
+        else:
+            f.write(format_profile(profile, sort, max_bones=len(profile["bones"])) + "\n")
+
+
+def parse_args(argv=None):
+    # only needed headless, not when the addon registers
+    import argparse
+
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(
+        prog="playback_profile",
+        description="Time the playback cost of the drivers and Action constraints in the open file.",
+    )
+    parser.add_argument(
+        "--frames",
+        nargs=2,
+        type=int,
+        metavar=("START", "END"),
+        help="frame range, defaults to the scene range",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the best counts")
+    parser.add_argument("--sort", default="seconds", choices=SORT_KEYS, help="order of the table")
+    parser.add_argument(
+        "--output", default="", help="write the profile to this file, JSON if it ends in .json"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Runs the profiler on the open file and prints the table, returns 0."""
+    args = parse_args(argv)
+    scene = bpy.context.scene
+    frame_start, frame_end = args.frames or (scene.frame_start, scene.frame_end)
+    profile = profile_playback(scene, frame_start, frame_end, args.repeat)
+    print(format_profile(profile, args.sort))
+    if args.output:
+        dump(profile, args.output, args.sort)
+    return 0
+
+
+PROFILE_TEXT = "Driver Constraint Playback Profile"
+
+
+class DriverConstraintPlaybackProfile(bpy.types.Operator):
+    bl_idname = "object.driver_constraint_playback_profile"
+    bl_label = "Driver Constraint Playback Profile"
+    bl_description = (
+        "Steps through the frame range and measures what the drivers and Action constraints cost"
+    )
+
+    use_scene_range: bpy.props.BoolProperty(name="Scene Frame Range", default=True)
+    frame_start: bpy.props.IntProperty(name="Start", default=1)
+    frame_end: bpy.props.IntProperty(name="End", default=50)
+    repeat: bpy.props.IntProperty(name="Repeat", default=3, min=1)
+    sort: bpy.props.EnumProperty(
+        name="Sort",
+        items=(
+            ("seconds", "Cost", "Most expensive first"),
+            ("count", "Count", "Most items first"),
+            ("name", "Name", "Alphabetical"),
+        ),
+    )
+    filepath: bpy.props.StringProperty(
+        name="File Path",
+        default="",
+        description="Write the profile to this file, as JSON if it ends in .json. Leave empty for a text block.",
+        subtype="FILE_PATH",
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        if self.use_scene_range:
+            frame_start, frame_end = scene.frame_start, scene.frame_end
+        else:
+            frame_start, frame_end = self.frame_start, self.frame_end
+        try:
+            profile = profile_playback(scene, frame_start, frame_end, self.repeat)
+        except ValueError as e:
+            self.report({"WARNING"}, str(e))
+            return {"CANCELLED"}
+
+        if self.filepath:
+            dump(profile, bpy.path.abspath(self.filepath), self.sort)
+            self.report({"INFO"}, f"Playback profile written to {self.filepath}.")
+            return {"FINISHED"}
+
+        report = format_profile(profile, self.sort)
+        text = bpy.data.texts.get(PROFILE_TEXT)
+        if text is None:
+            text = bpy.data.texts.new(PROFILE_TEXT)
+        text.from_string(report)
+        print(report)
+        self.report({"INFO"}, f"Playback profile written to the text block {PROFILE_TEXT}.")
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
+classes = (DriverConstraintPlaybackProfile,)
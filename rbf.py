@@ -0,0 +1,369 @@
+"""
+Radial basis function pose interpolation.
+
+A solver maps the rotations of a few bones onto many shape key values, e.g.
+the correctives of a shoulder. Every recorded pose stores the bone rotations
+as quaternions and the shape key values wanted there. The weight matrix of
+the Gaussian RBF through all poses is solved once with NumPy when a pose is
+added and stored with the poses in an ID property of the rig, so playback
+never solves anything.
+
+One app handler evaluates all solvers after frame changes and depsgraph
+updates: the distances to every pose, the kernel and the weights give all
+outputs of a solver in one vectorized call, and the values of each shape key
+datablock are written with a single foreach_set. This replaces a scripted
+driver per shape key. Values are only written when they change, so the
+update they cause settles right away.
+
+NumPy is imported on first use, it is not needed to register the addon.
+"""
+
+import json
+
+import bpy
+
+from . import instrumentation
+
+RBF_PROP = "driver_constraint_rbf"
+
+# rig pointer -> (stored JSON, compiled solvers), rebuilt when the JSON changes
+_compiled = {}
+# names of the objects with solvers, None until scanned
+_rigs = None
+_evaluating = False
+
+
+def load_solvers(rig):
+    """Returns {name: solver dict} stored on rig."""
+    if RBF_PROP not in rig:
+        return {}
+    return json.loads(rig[RBF_PROP])
+
+
+def save_solvers(rig, solvers):
+    global _rigs
+    if solvers:
+        rig[RBF_PROP] = json.dumps(solvers)
+    elif RBF_PROP in rig:
+        del rig[RBF_PROP]
+    _compiled.pop(rig.as_pointer(), None)
+    _rigs = None
+
+
+def rotation_features(pose_bones, bone_names):
+    """
+    Returns the rotations of the named pose bones as one flat array of
+    w, x, y, z quaternions, w made positive so q and -q are the same pose.
+    """
+    import numpy as np
+
+    from . import limits
+
+    quaternions = np.empty((len(bone_names), 4))
+    eulers = []
+    for row, name in enumerate(bone_names):
+        bone = pose_bones[name]
+        if bone.rotation_mode == "QUATERNION":
+            quaternions[row] = bone.rotation_quaternion
+        elif bone.rotation_mode == "AXIS_ANGLE":
+            angle, x, y, z = bone.rotation_axis_angle
+            axis = np.array((x, y, z))
+            axis = axis / (np.linalg.norm(axis) or 1.0)
+            quaternions[row] = (np.cos(angle * 0.5), *(axis * np.sin(angle * 0.5)))
+        else:
+            eulers.append((row, bone.rotation_euler))
+    if eulers:
+        rows = [row for row, euler in eulers]
+        quaternions[rows] = limits.euler_to_quaternion([euler for row, euler in eulers])
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+    quaternions[quaternions[:, 0] < 0.0] *= -1.0
+    return quaternions.ravel()
+
+
+def kernel(distances, radius):
+    import numpy as np
+
+    return np.exp(-((distances / radius) ** 2))
+
+
+def solve(poses, values):
+    """
+    Returns (radius, weights) of the RBF through poses, an (n, features)
+    array, with values, an (n, outputs) array. The radius is the mean
+    distance between the poses.
+    """
+    import numpy as np
+
+    poses = np.asarray(poses, dtype=np.float64)
+    distances = np.linalg.norm(poses[:, None, :] - poses[None, :, :], axis=2)
+    nonzero = distances[distances > 1e-9]
+    radius = float(nonzero.mean()) if len(nonzero) else 1.0
+    # least squares copes with poses recorded twice
+    weights = np.linalg.lstsq(kernel(distances, radius), np.asarray(values, dtype=np.float64), rcond=None)[0]
+    return radius, weights
+
+
+def interpolate(poses, weights, radius, features):
+    """Returns the outputs at features, clamped to 0..1."""
+    import numpy as np
+
+    distances = np.linalg.norm(poses - features, axis=1)
+    return np.clip(kernel(distances, radius) @ weights, 0.0, 1.0)
+
+
+def add_pose(rig, name, bone_names=(), key=None, output_names=None):
+    """
+    Records the current rotations of the solver's bones and the current
+    values of its shape keys as a pose of the solver name on rig and solves
+    the weights again. A new solver reads bone_names and drives output_names
+    of the shape key datablock key, all its shapes but the basis by default,
+    and starts with the rest pose at all zeros. A pose recorded again
+    replaces the values of the old one. Returns the solver dict.
+    """
+    import numpy as np
+
+    solvers = load_solvers(rig)
+    solver = solvers.get(name)
+    if solver is None:
+        if not bone_names:
+            raise ValueError("A new RBF solver needs at least one bone")
+        if key is None:
+            raise ValueError("A new RBF solver needs shape keys to drive")
+        blocks = list(key.key_blocks)[1:]
+        if output_names is not None:
+            blocks = [block for block in blocks if block.name in output_names]
+        if not blocks:
+            raise ValueError(f"{key.user.name} has no shape keys to drive")
+        solver = {
+            "bones": list(bone_names),
+            "outputs": [[key.name, block.name] for block in blocks],
+            "poses": [[1.0, 0.0, 0.0, 0.0] * len(bone_names)],
+            "values": [[0.0] * len(blocks)],
+            "mute": False,
+        }
+
+    missing = [bone for bone in solver["bones"] if rig.pose.bones.get(bone) is None]
+    if missing:
+        raise ValueError(f"Bones {', '.join(missing)} not found in {rig.name}")
+    features = rotation_features(rig.pose.bones, solver["bones"])
+    values = []
+    for key_name, block_name in solver["outputs"]:
+        shape_key = bpy.data.shape_keys.get(key_name)
+        block = shape_key.key_blocks.get(block_name) if shape_key is not None else None
+        values.append(block.value if block is not None else 0.0)
+
+    poses = np.array(solver["poses"])
+    same = np.linalg.norm(poses - features, axis=1) < 1e-6
+    if same.any():
+        solver["values"][int(np.argmax(same))] = values
+    else:
+        solver["poses"].append(features.tolist())
+        solver["values"].append(values)
+    with instrumentation.stage("rbf_solve"):
+        radius, weights = solve(solver["poses"], solver["values"])
+    solver["radius"] = radius
+    solver["weights"] = weights.tolist()
+    solvers[name] = solver
+    save_solvers(rig, solvers)
+    return solver
+
+
+def remove_solver(rig, name):
+    solvers = load_solvers(rig)
+    if solvers.pop(name, None) is None:
+        return False
+    save_solvers(rig, solvers)
+    return True
+
+
+def set_muted(rig, name, mute):
+    solvers = load_solvers(rig)
+    if name not in solvers:
+        return False
+    solvers[name]["mute"] = mute
+    save_solvers(rig, solvers)
+    return True
+
+
+class CompiledSolver:
+    """A solver with NumPy arrays and the shape key datablocks it writes."""
+
+    __slots__ = ("bones", "poses", "weights", "radius", "targets")
+
+    def __init__(self, solver):
+        import numpy as np
+
+        self.bones = solver["bones"]
+        self.poses = np.array(solver["poses"])
+        self.weights = np.array(solver["weights"])
+        self.radius = solver["radius"]
+        # (shape key datablock, key block indices, output columns)
+        by_key = {}
+        for column, (key_name, block_name) in enumerate(solver["outputs"]):
+            key = bpy.data.shape_keys.get(key_name)
+            index = key.key_blocks.find(block_name) if key is not None else -1
+            if index >= 0:
+                entry = by_key.setdefault(key_name, (key, [], []))
+                entry[1].append(index)
+                entry[2].append(column)
+        self.targets = [
+            (key, np.array(indices), np.array(columns))
+            for key, indices, columns in by_key.values()
+        ]
+
+
+def compiled_solvers(rig):
+    text = rig[RBF_PROP]
+    cached = _compiled.get(rig.as_pointer())
+    if cached is None or cached[0] != text:
+        solvers = [
+            CompiledSolver(solver)
+            for solver in json.loads(text).values()
+            if not solver.get("mute") and "weights" in solver
+        ]
+        cached = _compiled[rig.as_pointer()] = (text, solvers)
+    return cached[1]
+
+
+def write_outputs(targets, outputs):
+    """Writes outputs into the shape keys, one foreach_set per datablock. Returns the number written."""
+    import numpy as np
+
+    written = 0
+    for key, indices, columns in targets:
+        key_blocks = key.key_blocks
+        values = np.empty(len(key_blocks), dtype=np.float32)
+        key_blocks.foreach_get("value", values)
+        new = outputs[columns]
+        if np.allclose(values[indices], new, atol=1e-6):
+            continue
+        values[indices] = new
+        key_blocks.foreach_set("value", values)
+        key.update_tag()
+        written += len(indices)
+    return written
+
+
+def evaluate_rig(rig, depsgraph=None):
+    """Evaluates the solvers of rig in its current pose. Returns the number of values written."""
+    pose_bones = (rig.evaluated_get(depsgraph) if depsgraph is not None else rig).pose.bones
+    written = 0
+    for solver in compiled_solvers(rig):
+        if any(pose_bones.get(bone) is None for bone in solver.bones):
+            continue
+        features = rotation_features(pose_bones, solver.bones)
+        outputs = interpolate(solver.poses, solver.weights, solver.radius, features)
+        written += write_outputs(solver.targets, outputs)
+    return written
+
+
+def rigs():
+    """Returns the objects with solvers, scanning bpy.data once per file load or change."""
+    global _rigs
+    if _rigs is None:
+        _rigs = [obj.name for obj in bpy.data.objects if RBF_PROP in obj]
+    return [bpy.data.objects[name] for name in _rigs if name in bpy.data.objects]
+
+
+@bpy.app.handlers.persistent
+def update_solvers(scene, depsgraph=None):
+    global _evaluating
+    if _evaluating or _rigs == []:
+        return
+    _evaluating = True
+    try:
+        for rig in rigs():
+            evaluate_rig(rig, depsgraph)
+    finally:
+        _evaluating = False
+
+
+@bpy.app.handlers.persistent
+def invalidate_all(*args):
+    global _rigs
+    _compiled.clear()
+    _rigs = None
+
+
+handlers = tuple(
+    (handler_name, update_solvers)
+    for handler_name in ("frame_change_post", "depsgraph_update_post")
+) + tuple((handler_name, invalidate_all) for handler_name in ("undo_post", "redo_post", "load_post"))
+
+
+class DriverConstraintRBF(bpy.types.Operator):
+    bl_idname = "object.driver_constraint_rbf"
+    bl_label = "Driver Constraint RBF Pose"
+    bl_description = (
+        "Records the pose of the selected bones and the current shape key values of the selected "
+        "mesh as a pose of an RBF solver on the armature"
+    )
+
+    solver: bpy.props.StringProperty(name="Solver", default="RBF")
+    action: bpy.props.EnumProperty(
+        name="Action",
+        items=(
+            ("ADD_POSE", "Add Pose", "Record the current pose and shape key values"),
+            ("MUTE", "Mute", "Stop writing the shape keys, to dial in the values of a new pose"),
+            ("UNMUTE", "Unmute", "Write the shape keys again"),
+            ("REMOVE", "Remove", "Remove the solver"),
+        ),
+    )
+    output_filter: bpy.props.StringProperty(
+        name="Shapes",
+        default="",
+        description="A new solver drives the shape keys whose name contains this, all if empty",
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None and context.active_object.type == "ARMATURE"
+
+    def execute(self, context):
+        rig = context.active_object
+        if self.action == "MUTE" or self.action == "UNMUTE":
+            if not set_muted(rig, self.solver, self.action == "MUTE"):
+                self.report({"WARNING"}, f"No RBF solver {self.solver} on {rig.name}.")
+                return {"CANCELLED"}
+            self.report({"INFO"}, f"RBF solver {self.solver} {self.action.lower()}d.")
+            return {"FINISHED"}
+        if self.action == "REMOVE":
+            if not remove_solver(rig, self.solver):
+                self.report({"WARNING"}, f"No RBF solver {self.solver} on {rig.name}.")
+                return {"CANCELLED"}
+            self.report({"INFO"}, f"RBF solver {self.solver} removed.")
+            return {"FINISHED"}
+
+        from .constraint_operator import get_target_object
+
+        obj = get_target_object(context)
+        key = None
+        if obj is not None and obj != rig and getattr(obj.data, "shape_keys", None) is not None:
+            key = obj.data.shape_keys
+        output_names = None
+        if key is not None and self.output_filter:
+            output_names = [block.name for block in key.key_blocks if self.output_filter in block.name]
+        bone_names = [bone.name for bone in context.selected_pose_bones or ()]
+
+        instrumentation.begin(self.bl_idname)
+        try:
+            solver = add_pose(rig, self.solver, bone_names, key, output_names)
+        except ValueError as e:
+            instrumentation.end()
+            self.report({"WARNING"}, str(e))
+            return {"CANCELLED"}
+        with instrumentation.stage("undo_push"):
+            bpy.ops.ed.undo_push(message="RBF pose added.")
+        instrumentation.end()
+        self.report(
+            {"INFO"},
+            f"RBF solver {self.solver}: {len(solver['poses'])} poses, "
+            f"{len(solver['bones'])} bones, {len(solver['outputs'])} shape keys.",
+        )
+        return {"FINISHED"}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
+classes = (DriverConstraintRBF,)
@@ -0,0 +1,129 @@
+"""
+Creating shape keys for new drivers.
+
+add_shape_keys adds any number of shape keys to a mesh in one go. New keys
+start as a copy of the basis, made by Blender itself. Given a source mesh,
+its vertices are read once into a NumPy buffer with foreach_get and written
+to every named key with foreach_set instead of a Python loop over the
+vertices, the same goes for coordinates computed elsewhere, e.g. by
+corrective. Without either, keys that already exist are left as they are,
+so applying the same setup twice only updates the drivers.
+
+create_shape_drivers adds the keys and wires a driver to each of them with
+create_drivers, one DriverRow per key whose prop_data_path is the key name.
+
+NumPy is imported on first use, it is not needed to register the addon.
+"""
+
+import bpy
+
+from . import data_path, drivers, instrumentation
+
+
+def shape_key_path(block):
+    """Returns the absolute data path of the value of shape key block."""
+    key = block.id_data
+    return (
+        f"bpy.data.shape_keys[{data_path.quote(key.name)}]"
+        f".key_blocks[{data_path.quote(block.name)}].value"
+    )
+
+
+def new_shape_name(bone_name, transform_type):
+    """Returns the default name of a shape driven by transform_type of bone_name."""
+    name = bone_name or "shape"
+    return f"{name}_{transform_type.lower()}" if transform_type else name
+
+
+def read_coordinates(points):
+    """Returns the co of mesh vertices or shape key points as a flat float32 array."""
+    import numpy as np
+
+    coordinates = np.empty(len(points) * 3, dtype=np.float32)
+    points.foreach_get("co", coordinates)
+    return coordinates
+
+
+def check_source(obj, source):
+    """Raises ValueError unless source is a mesh with the vertex count of obj."""
+    if source.type != "MESH":
+        raise ValueError(f"Source {source.name} is no mesh")
+    if len(source.data.vertices) != len(obj.data.vertices):
+        raise ValueError(
+            f"Source {source.name} has {len(source.data.vertices)} vertices, "
+            f"{obj.name} has {len(obj.data.vertices)}"
+        )
+
+
+def add_shape_keys(obj, names, source=None, coordinates=None):
+    """
+    Adds a shape key for every name in names to the mesh object obj, a basis
+    first if it has none. New keys copy the basis. The vertices of the mesh
+    object source, or coordinates, a flat array of x, y, z per vertex, are
+    written to all named keys. Returns (key blocks in the order of names,
+    number of keys created). Raises ValueError if obj is no mesh or the
+    vertex count of source differs.
+    """
+    if obj.type != "MESH":
+        raise ValueError(f"{obj.name} is no mesh, shape keys can only be created on meshes")
+    if source is not None:
+        check_source(obj, source)
+        with instrumentation.stage("shape_read"):
+            coordinates = read_coordinates(source.data.vertices)
+
+    if obj.data.shape_keys is None:
+        obj.shape_key_add(name="Basis", from_mix=False)
+    key_blocks = obj.data.shape_keys.key_blocks
+
+    blocks = []
+    created = 0
+    for name in names:
+        block = key_blocks.get(name)
+        if block is None:
+            with instrumentation.stage("shape_add"):
+                block = obj.shape_key_add(name=name, from_mix=False)
+            created += 1
+        if coordinates is not None:
+            with instrumentation.stage("shape_write"):
+                block.data.foreach_set("co", coordinates)
+        blocks.append(block)
+    if coordinates is not None:
+        obj.data.update()
+    instrumentation.count("shapes_created", created)
+    return blocks, created
+
+
+def create_shape_drivers(
+    obj,
+    rows,
+    driver_obj,
+    source=None,
+    driver_mode="SCRIPTED",
+    created=None,
+    stats=None,
+    coordinates=None,
+):
+    """
+    Adds the shape keys named by the prop_data_path of rows to obj and a
+    driver to each of them, see add_shape_keys and create_drivers. Rows need
+    their transform type and limits filled in. Returns (curves, errors,
+    number of keys created).
+    """
+    names = list(dict.fromkeys(row.prop_data_path for row in rows))
+    blocks, shapes_created = add_shape_keys(obj, names, source, coordinates)
+    paths = {name: shape_key_path(block) for name, block in zip(names, blocks)}
+    shape_rows = [
+        drivers.DriverRow(
+            paths[row.prop_data_path],
+            row.bone_name,
+            row.transform_type,
+            row.min_value,
+            row.max_value,
+            row.space,
+        )
+        for row in rows
+    ]
+    curves, errors = drivers.create_drivers(
+        shape_rows, driver_obj, driver_mode=driver_mode, created=created, stats=stats
+    )
+    return curves, errors, shapes_created
@@ -0,0 +1,308 @@
+"""
+Micro-benchmarks for the operator hot paths, run on the fake bpy.
+
+    python tests/benchmarks.py --save baseline.json
+    python tests/benchmarks.py --baseline baseline.json
+
+Every benchmark builds a synthetic scene of the given size (bones, shape
+keys, F-Curves or paths), then times its function on it, keeping the best of
+--repeat runs. Results are printed as a table and can be saved as JSON.
+
+A run fails with exit code 1 when a benchmark is slower than the baseline by
+more than --tolerance, or when the time per item grows by more than
+--max-growth between the two largest sizes, which catches accidentally
+quadratic code without needing a baseline from the same machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_bpy  # noqa: E402
+import synthetic  # noqa: E402
+
+DEFAULT_SIZES = (10, 1000, 100000)
+# functions called once per item stop at this many calls, the time per item
+# is what gets compared
+MAX_CALLS = 10000
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Registers setup(addon, size) under name. setup builds the scene and
+    returns (run, items): run() is timed and covers items items.
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def shape_path(i):
+    return f'bpy.data.shape_keys["Key"].key_blocks["shape_{i:04d}"].value'
+
+
+def operator_for(addon, **properties):
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    for name, value in properties.items():
+        setattr(operator, name, value)
+    return operator
+
+
+@benchmark("get_prop_object")
+def bench_get_prop_object(addon, size):
+    body = synthetic.make_mesh(size, vertex_count=1)
+    paths = [shape_path(i) for i in range(min(size, MAX_CALLS))]
+    get_prop_object = addon.constraint_operator.get_prop_object
+    context = fake_bpy.context
+
+    def run():
+        addon.data_path.clear_resolved_cache()
+        for path in paths:
+            get_prop_object(None, context, path, body)
+
+    return run, len(paths)
+
+
+@benchmark("compile_path")
+def bench_compile_path(addon, size):
+    paths = [shape_path(i) for i in range(size)]
+    compiled = addon.data_path._compiled
+
+    def run():
+        compiled.clear()
+        for path in paths:
+            addon.data_path.compile_path(path)
+
+    return run, size
+
+
+@benchmark("compile_path_cached")
+def bench_compile_path_cached(addon, size):
+    path = shape_path(0)
+    compile_path = addon.data_path.compile_path
+
+    def run():
+        for _ in range(size):
+            compile_path(path)
+
+    return run, size
+
+
+@benchmark("get_action_length")
+def bench_get_action_length(addon, size):
+    rig = synthetic.make_rig(size, posed=False)
+    action = synthetic.make_action(rig.pose.bones, frames=24)
+
+    def run():
+        addon.action_range.invalidate(action)
+        addon.action_range.get_action_length(action)
+
+    return run, size
+
+
+@benchmark("set_defaults")
+def bench_set_defaults(addon, size):
+    rig = synthetic.make_rig(size)
+    context = synthetic.select(rig, [], rig.pose.bones[0])
+    operator = operator_for(addon)
+    bones = list(rig.pose.bones)[:MAX_CALLS]
+
+    def run():
+        for bone in bones:
+            operator.driver = bone
+            operator.set_defaults(context)
+
+    return run, len(bones)
+
+
+@benchmark("create_property_driver")
+def bench_create_property_driver(addon, size):
+    body = synthetic.make_mesh(size, vertex_count=1)
+    rig = synthetic.make_rig(1)
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0], others=[body])
+    operators = [
+        operator_for(addon, mode="DRIVER", prop_data_path=shape_path(i))
+        for i in range(min(size, MAX_CALLS))
+    ]
+    wm = context.window_manager
+
+    def run():
+        body.data.shape_keys.animation_data_clear()
+        for operator in operators:
+            operator.create_property_driver(wm, context, context.view_layer, rig)
+
+    return run, len(operators)
+
+
+@benchmark("create_drivers")
+def bench_create_drivers(addon, size):
+    body = synthetic.make_mesh(size, vertex_count=1)
+    rig = synthetic.make_rig(1)
+    rows = [addon.drivers.DriverRow(shape_path(i), "bone_0000") for i in range(size)]
+
+    def run():
+        body.data.shape_keys.animation_data_clear()
+        addon.drivers.create_drivers(rows, rig)
+
+    return run, size
+
+
+@benchmark("add_shape_keys")
+def bench_add_shape_keys(addon, size):
+    body = synthetic.make_mesh(0, vertex_count=1)
+    source = synthetic.make_mesh(0, "Sculpt", vertex_count=1)
+    names = [f"shape_{i:04d}" for i in range(size)]
+
+    def run():
+        body.data.shape_keys = None
+        addon.shape_keys.add_shape_keys(body, names, source)
+
+    return run, size
+
+
+@benchmark("create_actions_constraints")
+def bench_create_actions_constraints(addon, size):
+    rig = synthetic.make_rig(size + 1)
+    synthetic.make_action(rig.pose.bones[:1], "Smile", frames=24)
+    context = synthetic.select(rig, rig.pose.bones, rig.pose.bones[0])
+    operator = operator_for(addon, mode="ACTION", action="Smile")
+
+    def run():
+        for bone in rig.pose.bones:
+            bone.constraints.clear()
+        operator.create_actions_constraints(context)
+
+    return run, size
+
+
+def time_benchmark(addon, name, size, repeat):
+    best = None
+    fake_bpy.reset()
+    run, items = BENCHMARKS[name](addon, size)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return {"seconds": best, "items": items, "per_item": best / max(items, 1)}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, names=None):
+    """Returns {name: {size: result}} for the selected benchmarks."""
+    addon = fake_bpy.load_addon()
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = {}
+        for size in sizes:
+            results[name][str(size)] = time_benchmark(addon, name, size, repeat)
+    return results
+
+
+def check_growth(results, max_growth):
+    """Returns messages for benchmarks whose time per item grows too fast."""
+    failures = []
+    for name, by_size in results.items():
+        sizes = sorted(by_size, key=int)
+        if len(sizes) < 2:
+            continue
+        small, large = by_size[sizes[-2]], by_size[sizes[-1]]
+        if large["items"] <= small["items"]:
+            continue
+        growth = large["per_item"] / small["per_item"]
+        if growth > max_growth:
+            failures.append(
+                f"{name}: time per item grows {growth:.1f}x from {sizes[-2]} to {sizes[-1]}"
+            )
+    return failures
+
+
+def compare(results, baseline, tolerance, min_seconds=0.001):
+    """
+    Returns messages for results slower than baseline by more than tolerance.
+    Differences below min_seconds are treated as noise.
+    """
+    failures = []
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            base = baseline.get(name, {}).get(size)
+            if base is None:
+                continue
+            if (
+                result["seconds"] > base["seconds"] * tolerance
+                and result["seconds"] - base["seconds"] > min_seconds
+            ):
+                failures.append(
+                    f"{name}[{size}]: {result['seconds']:.4f}s, baseline {base['seconds']:.4f}s"
+                )
+    return failures
+
+
+def format_results(results):
+    lines = [f"{'benchmark':28} {'size':>8} {'items':>8} {'seconds':>10} {'us/item':>10}"]
+    for name, by_size in results.items():
+        for size, result in by_size.items():
+            lines.append(
+                f"{name:28} {size:>8} {result['items']:>8} {result['seconds']:>10.4f} "
+                f"{result['per_item'] * 1e6:>10.2f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the addon hot paths on a fake bpy.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="comma separated scene sizes",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, the best counts")
+    parser.add_argument("--only", action="append", default=[], help="run only this benchmark")
+    parser.add_argument("--baseline", default="", help="JSON results to compare against")
+    parser.add_argument("--save", default="", help="write the results as JSON to this file")
+    parser.add_argument(
+        "--tolerance", type=float, default=1.5, help="allowed slowdown against the baseline"
+    )
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=3.0,
+        help="allowed growth of the time per item between the two largest sizes",
+    )
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.only if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks {unknown}, choose from {list(BENCHMARKS)}")
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run_benchmarks(sizes, args.repeat, args.only)
+    print(format_results(results))
+
+    failures = check_growth(results, args.max_growth)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            failures += compare(results, json.load(f)["results"], args.tolerance)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {"python": platform.python_version(), "machine": platform.machine(), "results": results},
+                f,
+                indent=2,
+            )
+
+    for message in failures:
+        print(f"Regression: {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
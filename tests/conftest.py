@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_bpy  # noqa: E402
+
+# import every submodule up front, the tests use them all
+os.environ["DRIVER_CONSTRAINT_DEV"] = "1"
+fake_bpy.install()
+ADDON = fake_bpy.load_addon()
+ADDON.register()
+
+
+@pytest.fixture
+def addon():
+    return ADDON
+
+
+@pytest.fixture
+def bpy():
+    """A fresh, empty bpy for every test."""
+    return fake_bpy.reset()
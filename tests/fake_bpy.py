@@ -0,0 +1,1385 @@
+"""
+Pure Python stand-ins for bpy and mathutils.
+
+Just enough of Blender's data model to import the addon and drive its hot
+paths outside of Blender: ID collections with name lookup and foreach_get /
+foreach_set, objects, armatures and pose bones, constraints, actions and
+F-Curves, drivers, meshes with shape keys and text blocks. Operators get
+their annotated properties as plain attributes, with update callbacks.
+
+install() puts the fakes into sys.modules, load_addon() imports the addon
+package on top of them and reset() starts over with empty data, firing the
+load_post handlers like opening a new file would.
+"""
+
+import importlib.util
+import math
+import os
+import re
+import sys
+import types
+
+ADDON_NAME = "driver_constraint_addon"
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# mathutils
+##################################
+
+
+class Vector(list):
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        super().__init__(float(value) for value in values)
+
+    def _get(index):
+        return property(
+            lambda self: self[index],
+            lambda self, value: self.__setitem__(index, float(value)),
+        )
+
+    x = _get(0)
+    y = _get(1)
+    z = _get(2)
+    del _get
+
+    def copy(self):
+        return type(self)(self)
+
+    @property
+    def length(self):
+        return math.sqrt(sum(value * value for value in self))
+
+
+class Euler(Vector):
+    def __init__(self, values=(0.0, 0.0, 0.0), order="XYZ"):
+        super().__init__(values)
+        self.order = order
+
+
+class Quaternion(list):
+    def __init__(self, values=(1.0, 0.0, 0.0, 0.0)):
+        super().__init__(float(value) for value in values)
+
+    def _get(index):
+        return property(
+            lambda self: self[index],
+            lambda self, value: self.__setitem__(index, float(value)),
+        )
+
+    w = _get(0)
+    x = _get(1)
+    y = _get(2)
+    z = _get(3)
+    del _get
+
+    def to_euler(self, order="XYZ"):
+        w, x, y, z = self
+        length = math.sqrt(w * w + x * x + y * y + z * z) or 1.0
+        w, x, y, z = w / length, x / length, y / length, z / length
+        sinr = 2.0 * (w * x + y * z)
+        cosr = 1.0 - 2.0 * (x * x + y * y)
+        sinp = max(-1.0, min(1.0, 2.0 * (w * y - z * x)))
+        siny = 2.0 * (w * z + x * y)
+        cosy = 1.0 - 2.0 * (y * y + z * z)
+        return Euler((math.atan2(sinr, cosr), math.asin(sinp), math.atan2(siny, cosy)))
+
+
+class Matrix(list):
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [[float(i == j) for j in range(4)] for i in range(4)]
+        super().__init__(Vector(row) for row in rows)
+
+    @classmethod
+    def Identity(cls, size):
+        return cls([[float(i == j) for j in range(size)] for i in range(size)])
+
+
+# rna
+##################################
+
+
+_PATH_TOKEN = re.compile(
+    r"\.?([A-Za-z_]\w*)|\[\"((?:[^\"\\]|\\.)*)\"\]|\[(-?\d+)\]"
+)
+
+
+def _path_tokens(path):
+    pos = 0
+    tokens = []
+    while pos < len(path):
+        match = _PATH_TOKEN.match(path, pos)
+        if match is None:
+            raise ValueError(f'Path could not be resolved: "{path}"')
+        if match.group(1) is not None:
+            tokens.append(("attr", match.group(1)))
+        elif match.group(2) is not None:
+            tokens.append(("item", re.sub(r"\\(.)", r"\1", match.group(2))))
+        else:
+            tokens.append(("item", int(match.group(3))))
+        pos = match.end()
+    return tokens
+
+
+def _assign(owner, path, index, value):
+    """Writes an animated value to path in owner, like the animation system."""
+    tokens = _path_tokens(path)
+    parent = owner
+    for kind, name in tokens[:-1]:
+        parent = getattr(parent, name) if kind == "attr" else parent[name]
+    kind, name = tokens[-1]
+    current = getattr(parent, name) if kind == "attr" else parent[name]
+    if isinstance(current, list):
+        current[index] = value
+    elif kind == "attr":
+        setattr(parent, name, type(current)(value))
+    else:
+        parent[name] = type(current)(value)
+
+
+def _join_path(base, path):
+    if not base:
+        return path
+    return base + path if path.startswith("[") else base + "." + path
+
+
+class Struct:
+    """bpy_struct: pointer identity, rna paths, custom properties, drivers."""
+
+    id_data = None
+    _rna_path = ""
+
+    @property
+    def name(self):
+        try:
+            return self.__dict__["_name"]
+        except KeyError:
+            raise AttributeError("name") from None
+
+    @name.setter
+    def name(self, value):
+        old = self.__dict__.get("_name")
+        self.__dict__["_name"] = value
+        for collection in self.__dict__.get("_collections", ()):
+            collection._renamed(self, old)
+
+    def as_pointer(self):
+        return id(self)
+
+    def path_from_id(self, prop=""):
+        return _join_path(self._rna_path, prop) if prop else self._rna_path
+
+    def path_resolve(self, path, coerce=True):
+        current = self
+        try:
+            for kind, value in _path_tokens(path):
+                current = getattr(current, value) if kind == "attr" else current[value]
+        except (AttributeError, KeyError, IndexError, TypeError):
+            raise ValueError(f'Path could not be resolved: "{path}"') from None
+        return current
+
+    def _idprops(self):
+        props = self.__dict__.get("_props")
+        if props is None:
+            props = self.__dict__["_props"] = {}
+        return props
+
+    def __getitem__(self, key):
+        return self._idprops()[key]
+
+    def __setitem__(self, key, value):
+        self._idprops()[key] = value
+
+    def __delitem__(self, key):
+        del self._idprops()[key]
+
+    def __contains__(self, key):
+        return key in self._idprops()
+
+    def get(self, key, default=None):
+        return self._idprops().get(key, default)
+
+    def keys(self):
+        return self._idprops().keys()
+
+    def driver_add(self, path, index=-1):
+        try:
+            value = self.path_resolve(path)
+        except ValueError:
+            raise TypeError(f'bpy_struct.driver_add(): property "{path}" not found') from None
+        full_path = self.path_from_id(path)
+        anim_data = self.id_data.animation_data_create()
+        if index == -1 and isinstance(value, list):
+            return [anim_data.drivers.ensure(full_path, i) for i in range(len(value))]
+        return anim_data.drivers.ensure(full_path, max(index, 0))
+
+    def driver_remove(self, path, index=-1):
+        anim_data = self.id_data.animation_data
+        if anim_data is None:
+            return False
+        full_path = self.path_from_id(path)
+        removed = False
+        for curve in list(anim_data.drivers):
+            if curve.data_path == full_path and index in (-1, curve.array_index):
+                anim_data.drivers.remove(curve)
+                removed = True
+        return removed
+
+    def keyframe_insert(self, data_path, index=-1, frame=0.0):
+        value = self.path_resolve(data_path)
+        full_path = self.path_from_id(data_path)
+        anim_data = self.id_data.animation_data_create()
+        if anim_data.action is None:
+            anim_data.action = data.actions.new(f"{self.id_data.name}Action")
+        indices = range(len(value)) if index == -1 and isinstance(value, list) else [max(index, 0)]
+        for i in indices:
+            curve = anim_data.action.fcurves.find(full_path, index=i)
+            if curve is None:
+                curve = anim_data.action.fcurves.new(full_path, index=i)
+            curve.keyframe_points.insert(frame, value[i] if isinstance(value, list) else value)
+        return True
+
+
+class Collection(list):
+    """bpy_prop_collection: list with name lookup, foreach_get/foreach_set."""
+
+    def __init__(self, items=(), owner=None, path="", factory=None):
+        super().__init__()
+        self._owner = owner
+        self._path = path
+        self._factory = factory
+        self._names = {}
+        for item in items:
+            self._link(item)
+
+    def _link(self, item):
+        if isinstance(item, Struct):
+            if self._owner is not None:
+                item.id_data = self._owner.id_data if not isinstance(self._owner, ID) else self._owner
+            item.__dict__.setdefault("_collections", []).append(self)
+            if self._path and getattr(item, "name", None) is not None:
+                item._rna_path = f'{self._path}["{_escape(item.name)}"]'
+        self.append(item)
+        name = getattr(item, "name", None)
+        if name is not None:
+            self._names.setdefault(name, item)
+        return item
+
+    def _unlink(self, item):
+        if self._names.get(getattr(item, "name", None)) is item:
+            del self._names[item.name]
+        if isinstance(item, Struct):
+            item.__dict__.get("_collections", []).remove(self)
+
+    def _renamed(self, item, old):
+        if self._names.get(old) is item:
+            del self._names[old]
+        self._names.setdefault(item.name, item)
+        if self._path:
+            item._rna_path = f'{self._path}["{_escape(item.name)}"]'
+
+    def _lookup(self, name):
+        return self._names.get(name)
+
+    def unique_name(self, name):
+        if self._lookup(name) is None:
+            return name
+        number = 1
+        while self._lookup(f"{name}.{number:03d}") is not None:
+            number += 1
+        return f"{name}.{number:03d}"
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self._lookup(key)
+            if item is None:
+                raise KeyError(f'bpy_prop_collection[key]: key "{key}" not found')
+            return item
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return self._lookup(key) is not None
+        return any(item is key for item in self)
+
+    def get(self, key, default=None):
+        item = self._lookup(key)
+        return default if item is None else item
+
+    def find(self, key):
+        item = self._lookup(key)
+        if item is None:
+            return -1
+        for index, candidate in enumerate(self):
+            if candidate is item:
+                return index
+        return -1
+
+    def keys(self):
+        return [item.name for item in self]
+
+    def values(self):
+        return list(self)
+
+    def items(self):
+        return [(item.name, item) for item in self]
+
+    def new(self, *args, **kwargs):
+        return self._link(self._factory(self, *args, **kwargs))
+
+    def remove(self, item, *args, **kwargs):
+        for index, candidate in enumerate(self):
+            if candidate is item:
+                del self[index]
+                self._unlink(item)
+                return
+        raise RuntimeError("Item not found in collection")
+
+    def clear(self):
+        for item in list(self):
+            self._unlink(item)
+        del self[:]
+
+    def foreach_get(self, attr, seq):
+        values = []
+        for item in self:
+            value = getattr(item, attr)
+            if isinstance(value, (list, tuple)):
+                values.extend(value)
+            else:
+                values.append(value)
+        if len(seq) != len(values):
+            raise RuntimeError(
+                f"internal error setting the array, size {len(seq)} does not match {len(values)}"
+            )
+        seq[:] = values
+
+    def foreach_set(self, attr, seq):
+        if not len(self):
+            return
+        sample = getattr(self[0], attr)
+        width = len(sample) if isinstance(sample, (list, tuple)) else 1
+        if len(seq) != width * len(self):
+            raise RuntimeError(
+                f"internal error setting the array, size {len(seq)} does not match {width * len(self)}"
+            )
+        for index, item in enumerate(self):
+            if width == 1 and not isinstance(sample, (list, tuple)):
+                setattr(item, attr, type(sample)(seq[index]))
+            else:
+                getattr(item, attr)[:] = [float(value) for value in seq[index * width : (index + 1) * width]]
+
+
+def _escape(name):
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class ID(Struct):
+    def __init__(self, name):
+        self.name = name
+        self.animation_data = None
+        self.users = 1
+        self.use_fake_user = False
+        self.tag = False
+
+    @property
+    def id_data(self):
+        return self
+
+    @id_data.setter
+    def id_data(self, value):
+        pass
+
+    @property
+    def original(self):
+        return self
+
+    def animation_data_create(self):
+        if self.animation_data is None:
+            self.animation_data = AnimData(self)
+        return self.animation_data
+
+    def animation_data_clear(self):
+        self.animation_data = None
+
+    def evaluated_get(self, depsgraph):
+        # original and evaluated data are the same here
+        return self
+
+    def update_tag(self, refresh=set()):
+        self.update_tags = getattr(self, "update_tags", 0) + 1
+
+    def __repr__(self):
+        return f"bpy.data.{type(self).__name__.lower()}s['{self.name}']"
+
+
+# animation
+##################################
+
+
+class AnimData(Struct):
+    def __init__(self, owner):
+        self.id_data = owner
+        self.action = None
+        self.drivers = DriverCollection(owner)
+
+
+class Keyframe(Struct):
+    def __init__(self, frame=0.0, value=0.0):
+        self.co = Vector((frame, value))
+        self.handle_left = Vector((frame, value))
+        self.handle_right = Vector((frame, value))
+        self.interpolation = "BEZIER"
+        self.select_control_point = False
+
+
+class KeyframePoints(Collection):
+    def add(self, count=1):
+        for _ in range(count):
+            self._link(Keyframe())
+
+    def insert(self, frame, value, options=set(), keyframe_type="KEYFRAME"):
+        for point in self:
+            if point.co[0] == frame:
+                point.co[1] = value
+                return point
+        point = Keyframe(frame, value)
+        self._link(point)
+        self.sort(key=lambda point: point.co[0])
+        return point
+
+
+class FModifier(Struct):
+    def __init__(self, type):
+        self.type = type
+        self.mute = False
+        self.active = True
+        if type == "GENERATOR":
+            self.mode = "POLYNOMIAL"
+            self.poly_order = 1
+            self.use_additive = False
+            self.coefficients = [0.0, 1.0]
+        elif type == "LIMITS":
+            for attr in ("use_min_x", "use_max_x", "use_min_y", "use_max_y"):
+                setattr(self, attr, False)
+            self.min_x = self.max_x = self.min_y = self.max_y = 0.0
+
+    def apply(self, frame, value):
+        if self.mute:
+            return value
+        if self.type == "GENERATOR":
+            result = sum(c * value ** i for i, c in enumerate(self.coefficients))
+            return value + result if self.use_additive else result
+        if self.type == "LIMITS":
+            if self.use_min_y:
+                value = max(self.min_y, value)
+            if self.use_max_y:
+                value = min(self.max_y, value)
+        return value
+
+
+class DriverTarget(Struct):
+    def __init__(self):
+        self.id = None
+        self.id_type = "OBJECT"
+        self.bone_target = ""
+        self.data_path = ""
+        self.transform_type = "LOC_X"
+        self.transform_space = "WORLD_SPACE"
+        self.rotation_mode = "AUTO"
+
+
+class DriverVariable(Struct):
+    def __init__(self, name="var"):
+        self.name = name
+        self.type = "SINGLE_PROP"
+        self.targets = [DriverTarget(), DriverTarget()]
+
+
+class VariableCollection(Collection):
+    def new(self):
+        names = {variable.name for variable in self}
+        name = "var"
+        number = 1
+        while name in names:
+            name = f"var_{number:03d}"
+            number += 1
+        variable = DriverVariable(name)
+        self.append(variable)
+        return variable
+
+    def remove(self, variable):
+        for index, candidate in enumerate(self):
+            if candidate is variable:
+                del self[index]
+                return
+
+
+SIMPLE_FUNCTIONS = {
+    "min", "max", "abs", "fabs", "floor", "ceil", "trunc", "round", "int",
+    "sin", "cos", "tan", "asin", "acos", "atan", "atan2", "exp", "log",
+    "sqrt", "pow", "fmod", "radians", "degrees", "smoothstep", "lerp",
+    "clamp", "sign", "pi", "True", "False",
+}
+_SIMPLE_TOKEN = re.compile(
+    r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_]\w*)|(==|!=|<=|>=|[-+*/(),<>]))"
+)
+
+
+def is_simple_expression(expression, names):
+    """Approximates Blender's check for its simple expression evaluator."""
+    pos = 0
+    expression = expression.rstrip()
+    if not expression:
+        return False
+    while pos < len(expression):
+        match = _SIMPLE_TOKEN.match(expression, pos)
+        if match is None:
+            return False
+        name = match.group(2)
+        if name is not None and name not in names and name not in SIMPLE_FUNCTIONS and name not in ("if", "else", "and", "or", "not"):
+            return False
+        pos = match.end()
+    return True
+
+
+class Driver(Struct):
+    def __init__(self):
+        self.type = "SCRIPTED"
+        self.expression = "var"
+        self.use_self = False
+        self.is_valid = True
+        self.variables = VariableCollection()
+
+    @property
+    def is_simple_expression(self):
+        return self.type == "SCRIPTED" and is_simple_expression(
+            self.expression, {variable.name for variable in self.variables}
+        )
+
+
+class FCurve(Struct):
+    def __init__(self, data_path, index=0, is_driver=False):
+        self.data_path = data_path
+        self.array_index = index
+        self.mute = False
+        self.hide = False
+        self.select = False
+        self.group = None
+        self.extrapolation = "CONSTANT"
+        self.driver = Driver() if is_driver else None
+        self.modifiers = Collection(factory=lambda collection, type: FModifier(type))
+        self.keyframe_points = KeyframePoints()
+
+    def range(self):
+        if not len(self.keyframe_points):
+            return Vector((0.0, 0.0))
+        frames = [point.co[0] for point in self.keyframe_points]
+        return Vector((min(frames), max(frames)))
+
+    def evaluate(self, frame):
+        points = self.keyframe_points
+        if not len(points):
+            value = frame if self.driver is not None else 0.0
+        elif frame <= points[0].co[0]:
+            value = points[0].co[1]
+        elif frame >= points[-1].co[0]:
+            value = points[-1].co[1]
+        else:
+            for left, right in zip(points, points[1:]):
+                if left.co[0] <= frame <= right.co[0]:
+                    if left.interpolation == "CONSTANT":
+                        value = left.co[1]
+                    else:
+                        t = (frame - left.co[0]) / (right.co[0] - left.co[0])
+                        value = left.co[1] + t * (right.co[1] - left.co[1])
+                    break
+        for modifier in self.modifiers:
+            value = modifier.apply(frame, value)
+        return value
+
+    def update(self):
+        self.keyframe_points.sort(key=lambda point: point.co[0])
+
+
+class FCurveCollection(Collection):
+    def __init__(self, is_driver=False):
+        super().__init__()
+        self._is_driver = is_driver
+        self._index = {}
+
+    def find(self, data_path, index=0):
+        curve = self._index.get((data_path, index))
+        if curve is not None and curve.data_path == data_path and curve.array_index == index:
+            return curve
+        if len(self._index) != len(self) or curve is not None:
+            self._index = {(curve.data_path, curve.array_index): curve for curve in self}
+            return self._index.get((data_path, index))
+        return None
+
+    def new(self, data_path, index=0, action_group=""):
+        if self.find(data_path, index) is not None:
+            raise RuntimeError(f"F-Curve '{data_path}[{index}]' already exists in action")
+        curve = FCurve(data_path, index, self._is_driver)
+        self.append(curve)
+        self._index[(data_path, index)] = curve
+        return curve
+
+    def remove(self, curve):
+        for index, candidate in enumerate(self):
+            if candidate is curve:
+                del self[index]
+                self._index.pop((curve.data_path, curve.array_index), None)
+                return
+        raise RuntimeError("F-Curve not found")
+
+
+class DriverCollection(FCurveCollection):
+    def __init__(self, owner):
+        super().__init__(is_driver=True)
+        self._owner = owner
+
+    def ensure(self, data_path, index=0):
+        curve = self.find(data_path, index)
+        if curve is None:
+            curve = self.new(data_path, index)
+            curve.modifiers.new("GENERATOR")
+        return curve
+
+
+class Action(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.fcurves = FCurveCollection()
+        self.use_frame_range = False
+        self.frame_start = 0.0
+        self.frame_end = 0.0
+
+    @property
+    def curve_frame_range(self):
+        frames = [frame for curve in self.fcurves if len(curve.keyframe_points) for frame in curve.range()]
+        if not frames:
+            return Vector((0.0, 0.0))
+        return Vector((min(frames), max(frames)))
+
+    @property
+    def frame_range(self):
+        if self.use_frame_range:
+            return Vector((self.frame_start, self.frame_end))
+        start, end = self.curve_frame_range
+        return Vector((start, end if end > start else start + 1.0))
+
+
+# objects
+##################################
+
+
+CONSTRAINT_NAMES = {
+    "ACTION": "Action",
+    "LIMIT_LOCATION": "Limit Location",
+    "LIMIT_ROTATION": "Limit Rotation",
+    "LIMIT_SCALE": "Limit Scale",
+    "COPY_ROTATION": "Copy Rotation",
+}
+
+
+class Constraint(Struct):
+    def __init__(self, type, name):
+        self.type = type
+        self.name = name
+        self.mute = False
+        self.enabled = True
+        self.influence = 1.0
+        self.owner_space = "WORLD"
+        self.target_space = "WORLD"
+        self.target = None
+        self.subtarget = ""
+        if type == "ACTION":
+            self.action = None
+            self.transform_channel = "ROTATION_X"
+            self.min = 0.0
+            self.max = 0.0
+            self.frame_start = 1
+            self.frame_end = 1
+            self.mix_mode = "BEFORE_SPLIT"
+            self.use_eval_time = False
+        elif type in ("LIMIT_LOCATION", "LIMIT_SCALE", "LIMIT_ROTATION"):
+            for axis in "xyz":
+                setattr(self, f"min_{axis}", 0.0)
+                setattr(self, f"max_{axis}", 0.0)
+                if type == "LIMIT_ROTATION":
+                    setattr(self, f"use_limit_{axis}", False)
+                else:
+                    setattr(self, f"use_min_{axis}", False)
+                    setattr(self, f"use_max_{axis}", False)
+
+
+def _new_constraint(collection, type):
+    return Constraint(type, collection.unique_name(CONSTRAINT_NAMES.get(type, type.title())))
+
+
+class Transform(Struct):
+    def __init__(self):
+        self.location = Vector((0.0, 0.0, 0.0))
+        self.rotation_euler = Euler((0.0, 0.0, 0.0))
+        self.rotation_quaternion = Quaternion((1.0, 0.0, 0.0, 0.0))
+        self.rotation_axis_angle = [0.0, 0.0, 1.0, 0.0]
+        self.rotation_mode = "XYZ"
+        self.scale = Vector((1.0, 1.0, 1.0))
+
+
+class Bone(Struct):
+    def __init__(self, name):
+        self.name = name
+        self.select = False
+        self.hide = False
+
+
+class PoseBone(Transform):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.bone = Bone(name)
+        self.constraints = Collection(owner=self, factory=_new_constraint)
+
+    def _link_constraints(self):
+        self.constraints._owner = self
+        self.constraints._path = f"{self._rna_path}.constraints"
+
+    def __repr__(self):
+        return f"bpy.data.objects['{self.id_data.name}'].pose.bones[\"{self.name}\"]"
+
+
+class Pose(Struct):
+    def __init__(self, owner):
+        self.id_data = owner
+        self.bones = Collection(owner=owner, path="pose.bones")
+
+
+class Modifier(Struct):
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+        self.show_viewport = True
+        self.levels = 1
+
+
+class Object(ID, Transform):
+    def __init__(self, name, object_data=None):
+        ID.__init__(self, name)
+        Transform.__init__(self)
+        self.data = object_data
+        if object_data is None:
+            self.type = "EMPTY"
+        elif isinstance(object_data, Armature):
+            self.type = "ARMATURE"
+        elif isinstance(object_data, Mesh):
+            self.type = "MESH"
+        else:
+            self.type = "CURVE"
+        self.pose = Pose(self) if self.type == "ARMATURE" else None
+        self.constraints = Collection(owner=self, path="constraints", factory=_new_constraint)
+        self.modifiers = Collection(
+            owner=self,
+            path="modifiers",
+            factory=lambda collection, name, type: Modifier(collection.unique_name(name), type),
+        )
+        self.select = False
+        self.hide_viewport = False
+        self.matrix_world = Matrix()
+        # stand-in for deforming modifiers: maps a vertex coordinate to its
+        # deformed position in to_mesh
+        self.deform = None
+
+    def select_get(self):
+        return self.select
+
+    def select_set(self, state):
+        self.select = state
+
+    def add_pose_bone(self, name):
+        bone = self.pose.bones._link(PoseBone(name))
+        bone._link_constraints()
+        self.data.bones._link(bone.bone)
+        return bone
+
+    def to_mesh(self):
+        """The mesh with its shape key mix and deform applied, like an evaluated object."""
+        mesh = self.data
+        coordinates = [Vector(vertex.co) for vertex in mesh.vertices]
+        if mesh.shape_keys is not None:
+            key_blocks = mesh.shape_keys.key_blocks
+            coordinates = [Vector(point.co) for point in key_blocks[0].data]
+            for block in list(key_blocks)[1:]:
+                if block.mute or block.value == 0.0:
+                    continue
+                for co, point, relative in zip(coordinates, block.data, block.relative_key.data):
+                    for axis in range(3):
+                        co[axis] += block.value * (point.co[axis] - relative.co[axis])
+        if self.deform is not None:
+            coordinates = [Vector(self.deform(co)) for co in coordinates]
+        return Mesh(mesh.name, coordinates)
+
+    def to_mesh_clear(self):
+        pass
+
+    def shape_key_remove(self, key):
+        self.data.shape_keys.key_blocks.remove(key)
+
+    def shape_key_add(self, name="Key", from_mix=True):
+        mesh = self.data
+        if mesh.shape_keys is None:
+            mesh.shape_keys = data.shape_keys._link(Key(data.shape_keys.unique_name("Key"), mesh))
+        key = mesh.shape_keys
+        block = key.key_blocks._link(ShapeKey(key.key_blocks.unique_name(name), mesh))
+        block.relative_key = key.key_blocks[0]
+        return block
+
+
+class Armature(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.bones = Collection()
+
+
+class MeshVertex(Struct):
+    def __init__(self, co):
+        self.co = Vector(co)
+        self.select = False
+
+
+class Mesh(ID):
+    def __init__(self, name, vertices=()):
+        super().__init__(name)
+        self.vertices = Collection(MeshVertex(co) for co in vertices)
+        self.shape_keys = None
+
+    def update(self):
+        pass
+
+
+class ShapeKeyPoint(Struct):
+    def __init__(self, co):
+        self.co = Vector(co)
+
+
+class ShapeKey(Struct):
+    def __init__(self, name, mesh):
+        self.name = name
+        self.value = 0.0
+        self.slider_min = 0.0
+        self.slider_max = 1.0
+        self.mute = False
+        self.vertex_group = ""
+        self.relative_key = self
+        self.data = Collection(ShapeKeyPoint(vertex.co) for vertex in mesh.vertices)
+
+
+class Key(ID):
+    def __init__(self, name, user):
+        super().__init__(name)
+        self.user = user
+        self.use_relative = True
+        self.key_blocks = Collection(owner=self, path="key_blocks")
+
+    @property
+    def reference_key(self):
+        return self.key_blocks[0]
+
+
+class Text(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self._text = ""
+
+    def as_string(self):
+        return self._text
+
+    def from_string(self, text):
+        self._text = text
+
+    def write(self, text):
+        self._text += text
+
+    def clear(self):
+        self._text = ""
+
+
+class Scene(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.frame_current = 1
+        self.frame_start = 1
+        self.frame_end = 250
+        self.objects = Collection()
+        # unmuted drivers and Action constraints evaluated by frame_set
+        self.evaluated = 0
+
+    def frame_set(self, frame, subframe=0.0):
+        self.frame_current = int(frame)
+        for handler in list(app.handlers.frame_change_pre):
+            handler(self, None)
+        for collection in (data.objects, data.meshes, data.shape_keys):
+            for id_data in collection:
+                anim_data = id_data.animation_data
+                if anim_data is not None:
+                    # actions first, drivers override them
+                    action = anim_data.action
+                    for curve in action.fcurves if action is not None else ():
+                        if not curve.mute:
+                            _assign(id_data, curve.data_path, curve.array_index, curve.evaluate(frame))
+                    for curve in anim_data.drivers:
+                        if not curve.mute:
+                            value = curve.evaluate(frame)
+                            try:
+                                _assign(id_data, curve.data_path, curve.array_index, value)
+                            except (AttributeError, KeyError, IndexError, TypeError, ValueError):
+                                pass
+                            self.evaluated += 1
+                pose = getattr(id_data, "pose", None)
+                if pose is not None:
+                    for bone in pose.bones:
+                        for const in bone.constraints:
+                            if const.type == "ACTION" and not const.mute:
+                                self.evaluated += 1
+        for handler in list(app.handlers.frame_change_post):
+            handler(self, None)
+
+
+def _new_id(cls):
+    def factory(collection, name, *args):
+        return cls(collection.unique_name(name), *args)
+
+    return factory
+
+
+def _new_object(collection, name, object_data):
+    return Object(collection.unique_name(name), object_data)
+
+
+class BlendData(Struct):
+    def __init__(self):
+        self.objects = Collection(factory=_new_object)
+        self.meshes = Collection(factory=_new_id(Mesh))
+        self.armatures = Collection(factory=_new_id(Armature))
+        self.actions = Collection(factory=_new_id(Action))
+        self.shape_keys = Collection()
+        self.texts = Collection(factory=_new_id(Text))
+        self.scenes = Collection(factory=_new_id(Scene))
+        self.curves = Collection()
+        self.materials = Collection()
+        self.textures = Collection()
+        self.node_groups = Collection()
+        self.lights = Collection()
+        self.cameras = Collection()
+        self.worlds = Collection()
+        self.filepath = ""
+
+
+# bpy.context, bpy.ops
+##################################
+
+
+class WindowManager(Struct):
+    def __init__(self):
+        self.clipboard = ""
+        self.progress = []
+        self.modal_handlers = []
+        self.timers = []
+
+    def invoke_props_dialog(self, operator, width=300):
+        return {"RUNNING_MODAL"}
+
+    def progress_begin(self, start, end):
+        self.progress.append(("begin", start, end))
+
+    def progress_update(self, value):
+        self.progress.append(("update", value))
+
+    def progress_end(self):
+        self.progress.append(("end",))
+
+    def modal_handler_add(self, operator):
+        self.modal_handlers.append(operator)
+        return True
+
+    def event_timer_add(self, time_step, window=None):
+        timer = types.SimpleNamespace(time_step=time_step, time_duration=0.0)
+        self.timers.append(timer)
+        return timer
+
+    def event_timer_remove(self, timer):
+        self.timers.remove(timer)
+
+
+class ViewLayer(Struct):
+    def __init__(self):
+        self.objects = types.SimpleNamespace(active=None)
+        self.depsgraph = types.SimpleNamespace(updates=())
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+
+
+class WorkSpace(Struct):
+    def __init__(self):
+        self.status_text = None
+
+    def status_text_set(self, text):
+        self.status_text = text
+
+
+class Context(Struct):
+    def __init__(self):
+        self.window_manager = WindowManager()
+        self.workspace = WorkSpace()
+        self.view_layer = ViewLayer()
+        self.scene = None
+        self.selected_objects = []
+        self.selected_pose_bones = []
+        self.active_pose_bone = None
+        self.mode = "OBJECT"
+        self.area = None
+        self.window = None
+
+    @property
+    def active_object(self):
+        return self.view_layer.objects.active
+
+    @active_object.setter
+    def active_object(self, obj):
+        self.view_layer.objects.active = obj
+
+    @property
+    def object(self):
+        return self.active_object
+
+    def evaluated_depsgraph_get(self):
+        return self.view_layer.depsgraph
+
+
+class _OpsCalls:
+    def __init__(self):
+        self.calls = []
+
+    def record(self, name, kwargs):
+        self.calls.append((name, kwargs))
+        return {"FINISHED"}
+
+    def count(self, name):
+        return sum(1 for call, kwargs in self.calls if call == name)
+
+
+calls = _OpsCalls()
+
+
+class _OpsModule:
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        def operator(*args, **kwargs):
+            return calls.record(f"{self._module}.{name}", kwargs)
+
+        return operator
+
+
+class _Ops:
+    def __getattr__(self, name):
+        return _OpsModule(name)
+
+
+# bpy.props, bpy.types, bpy.utils, bpy.app
+##################################
+
+
+class Property:
+    """A deferred property as returned by bpy.props.*Property."""
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        self.kwargs = kwargs
+
+    @property
+    def default(self):
+        if "default" in self.kwargs:
+            return self.kwargs["default"]
+        return {
+            "BoolProperty": False,
+            "IntProperty": 0,
+            "FloatProperty": 0.0,
+            "StringProperty": "",
+            "EnumProperty": None,
+            "CollectionProperty": None,
+            "PointerProperty": None,
+            "FloatVectorProperty": (0.0, 0.0, 0.0),
+        }[self.kind]
+
+
+class _PropertyDescriptor:
+    def __init__(self, name, prop):
+        self.name = name
+        self.prop = prop
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self.prop
+        values = instance.__dict__.setdefault("_property_values", {})
+        if self.name in values:
+            return values[self.name]
+        default = self.prop.default
+        if self.prop.kind == "EnumProperty" and default is None:
+            items = self.prop.kwargs.get("items", ())
+            if callable(items):
+                items = items(instance, context)
+            default = items[0][0] if items else ""
+        return default
+
+    def __set__(self, instance, value):
+        instance.__dict__.setdefault("_property_values", {})[self.name] = value
+        update = self.prop.kwargs.get("update")
+        if update is not None:
+            update(instance, context)
+
+
+def _make_prop(kind):
+    def make(**kwargs):
+        return Property(kind, **kwargs)
+
+    make.__name__ = kind
+    return make
+
+
+props = types.ModuleType("bpy.props")
+for _kind in (
+    "BoolProperty",
+    "IntProperty",
+    "FloatProperty",
+    "StringProperty",
+    "EnumProperty",
+    "CollectionProperty",
+    "PointerProperty",
+    "FloatVectorProperty",
+):
+    setattr(props, _kind, _make_prop(_kind))
+
+
+class _RNAType:
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name, prop in cls.__dict__.get("__annotations__", {}).items():
+            if isinstance(prop, Property):
+                setattr(cls, name, _PropertyDescriptor(name, prop))
+
+
+class Operator(_RNAType):
+    bl_idname = ""
+    bl_label = ""
+    bl_options = set()
+
+    def __init__(self):
+        self.reports = []
+        self.layout = None
+
+    def report(self, type, message):
+        self.reports.append((frozenset(type), message))
+
+    @classmethod
+    def poll(cls, context):
+        return True
+
+
+class Panel(_RNAType):
+    pass
+
+
+class Menu(_RNAType):
+    pass
+
+
+class PropertyGroup(_RNAType):
+    pass
+
+
+class _DrawHooks:
+    _draw_funcs = None
+
+    @classmethod
+    def append(cls, func):
+        cls._draw_funcs.append(func)
+
+    @classmethod
+    def prepend(cls, func):
+        cls._draw_funcs.insert(0, func)
+
+    @classmethod
+    def remove(cls, func):
+        cls._draw_funcs.remove(func)
+
+
+def _draw_hooks(name):
+    return type(name, (_DrawHooks,), {"_draw_funcs": []})
+
+
+bpy_types = types.ModuleType("bpy.types")
+for _cls in (
+    Struct, ID, Object, PoseBone, Bone, Armature, Mesh, Key, ShapeKey, Action,
+    FCurve, Driver, DriverVariable, DriverTarget, FModifier, Constraint,
+    Scene, Text, AnimData, Operator, Panel, Menu, PropertyGroup, BlendData,
+):
+    setattr(bpy_types, _cls.__name__, _cls)
+bpy_types.bpy_struct = Struct
+bpy_types.ActionConstraint = Constraint
+for _name in (
+    "VIEW3D_MT_pose_context_menu",
+    "VIEW3D_MT_object_context_menu",
+    "VIEW3D_PT_tools_posemode_options",
+    "VIEW3D_PT_tools_active",
+):
+    setattr(bpy_types, _name, _draw_hooks(_name))
+
+
+registered_classes = []
+
+utils = types.ModuleType("bpy.utils")
+
+
+def _register_class(cls):
+    registered_classes.append(cls)
+
+
+def _unregister_class(cls):
+    registered_classes.remove(cls)
+
+
+utils.register_class = _register_class
+utils.unregister_class = _unregister_class
+
+
+HANDLER_NAMES = (
+    "depsgraph_update_pre",
+    "depsgraph_update_post",
+    "frame_change_pre",
+    "frame_change_post",
+    "undo_pre",
+    "undo_post",
+    "redo_pre",
+    "redo_post",
+    "load_pre",
+    "load_post",
+    "save_pre",
+    "save_post",
+)
+
+
+def _persistent(func):
+    func._bpy_persistent = True
+    return func
+
+
+app = types.ModuleType("bpy.app")
+app.handlers = types.SimpleNamespace(**{name: [] for name in HANDLER_NAMES})
+app.handlers.persistent = _persistent
+app.version = (4, 1, 0)
+app.background = False
+app.driver_namespace = {}
+app.timers = types.SimpleNamespace(
+    registered=[],
+    register=lambda func, first_interval=0.0, persistent=False: app.timers.registered.append(func),
+    unregister=lambda func: app.timers.registered.remove(func),
+    is_registered=lambda func: func in app.timers.registered,
+)
+
+bpy_path = types.ModuleType("bpy.path")
+bpy_path.abspath = lambda path, start=None, library=None: os.path.abspath(
+    path[2:] if path.startswith("//") else path
+)
+
+msgbus = types.ModuleType("bpy.msgbus")
+msgbus.subscriptions = []
+msgbus.subscribe_rna = lambda key, owner, args, notify, options=set(): msgbus.subscriptions.append(
+    (key, owner, notify)
+)
+msgbus.clear_by_owner = lambda owner: msgbus.subscriptions.__init__(
+    [entry for entry in msgbus.subscriptions if entry[1] is not owner]
+)
+
+
+# module setup
+##################################
+
+
+data = BlendData()
+context = Context()
+ops = _Ops()
+
+
+def fire(handler_name, *args):
+    for handler in list(getattr(app.handlers, handler_name)):
+        handler(*args)
+
+
+def install():
+    """Registers the fake bpy and mathutils modules in sys.modules."""
+    if isinstance(sys.modules.get("bpy"), types.ModuleType) and getattr(
+        sys.modules["bpy"], "__fake__", False
+    ):
+        return sys.modules["bpy"]
+    bpy = types.ModuleType("bpy")
+    bpy.__fake__ = True
+    bpy.types = bpy_types
+    bpy.props = props
+    bpy.utils = utils
+    bpy.app = app
+    bpy.ops = ops
+    bpy.msgbus = msgbus
+    bpy.path = bpy_path
+    bpy.data = data
+    bpy.context = context
+    sys.modules["bpy"] = bpy
+    sys.modules["bpy.types"] = bpy_types
+    sys.modules["bpy.props"] = props
+    sys.modules["bpy.utils"] = utils
+    sys.modules["bpy.app"] = app
+    sys.modules["bpy.msgbus"] = msgbus
+    sys.modules["bpy.path"] = bpy_path
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Euler = Euler
+    mathutils.Quaternion = Quaternion
+    mathutils.Matrix = Matrix
+    sys.modules["mathutils"] = mathutils
+    return bpy
+
+
+def load_addon():
+    """Imports the addon package from the repository as ADDON_NAME."""
+    install()
+    if ADDON_NAME in sys.modules:
+        return sys.modules[ADDON_NAME]
+    spec = importlib.util.spec_from_file_location(
+        ADDON_NAME,
+        os.path.join(ADDON_DIR, "__init__.py"),
+        submodule_search_locations=[ADDON_DIR],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_NAME] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def reset():
+    """Starts over with empty data and context, like loading a new file."""
+    global data, context
+    data = BlendData()
+    context = Context()
+    bpy = sys.modules["bpy"]
+    bpy.data = data
+    bpy.context = context
+    calls.calls.clear()
+    scene = data.scenes.new("Scene")
+    context.scene = scene
+    fire("load_post", None)
+    return bpy
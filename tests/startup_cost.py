@@ -0,0 +1,86 @@
+"""
+Measures what enabling the addon costs, on the fake bpy.
+
+    python tests/startup_cost.py --max-ms 50
+
+Every run starts a fresh interpreter, installs the fake bpy and times
+importing the addon plus register(). The best of --repeat runs is printed
+with the modules the addon pulled in. A run fails with exit code 1 when it
+is slower than --max-ms or when registering imports a module that should
+wait for first use (NumPy, the command line and batch tools).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# must not be imported by register()
+DEFERRED = ("numpy", "driver_constraint_addon.limits", "driver_constraint_addon.cli")
+
+SNIPPET = """
+import json, sys, time
+sys.path.insert(0, {tests_dir!r})
+import fake_bpy
+fake_bpy.install()
+before = set(sys.modules)
+start = time.perf_counter()
+addon = fake_bpy.load_addon()
+addon.register()
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": sorted(set(sys.modules) - before)}}))
+"""
+
+
+def measure_once():
+    env = dict(os.environ)
+    env.pop("DRIVER_CONSTRAINT_DEV", None)
+    output = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(tests_dir=TESTS_DIR)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def measure(repeat=5):
+    """Returns {"seconds", "modules", "deferred"} of the fastest of repeat runs."""
+    best = min((measure_once() for _ in range(repeat)), key=lambda result: result["seconds"])
+    best["deferred"] = [
+        name
+        for name in best["modules"]
+        if any(name == deferred or name.startswith(deferred + ".") for deferred in DEFERRED)
+    ]
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import and register() cost of the addon.")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters to start, the best counts")
+    parser.add_argument("--max-ms", type=float, default=0.0, help="fail above this many milliseconds")
+    args = parser.parse_args(argv)
+
+    result = measure(args.repeat)
+    addon_modules = [name for name in result["modules"] if name.startswith("driver_constraint_addon")]
+    print(f"import and register: {result['seconds'] * 1000.0:.1f} ms")
+    print(f"{len(result['modules'])} modules imported, {len(addon_modules)} of the addon:")
+    for name in addon_modules:
+        print(f"  {name}")
+
+    failures = []
+    if result["deferred"]:
+        failures.append(f"imported before first use: {', '.join(result['deferred'])}")
+    if args.max_ms and result["seconds"] * 1000.0 > args.max_ms:
+        failures.append(f"{result['seconds'] * 1000.0:.1f} ms is over {args.max_ms:.1f} ms")
+    for message in failures:
+        print(f"Regression: {message}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Synthetic scenes for the tests and benchmarks, built on the fake bpy.
+"""
+
+import math
+
+import fake_bpy
+
+
+def make_rig(bone_count, name="Rig", posed=True):
+    """
+    An armature object with bone_count pose bones named bone_0000, ...
+
+    Posed bones get a small offset on one channel each, cycling through
+    location, rotation and scale, so auto limit detection has work to do.
+    """
+    data = fake_bpy.data
+    rig = data.objects.new(name, data.armatures.new(name))
+    for i in range(bone_count):
+        bone = rig.add_pose_bone(f"bone_{i:04d}")
+        if posed:
+            axis = i % 3
+            kind = (i // 3) % 3
+            if kind == 0:
+                bone.location[axis] = 0.1 + 0.001 * i
+            elif kind == 1:
+                bone.rotation_euler[axis] = math.radians(10 + i % 80)
+            else:
+                bone.scale[axis] = 1.5
+    return rig
+
+
+def make_mesh(shape_count, name="Body", vertex_count=8):
+    """A mesh object with a basis and shape_count shape keys named shape_0000, ..."""
+    data = fake_bpy.data
+    mesh = data.meshes.new(name, [(i, 0.0, 0.0) for i in range(vertex_count)])
+    obj = data.objects.new(name, mesh)
+    obj.shape_key_add("Basis")
+    for i in range(shape_count):
+        obj.shape_key_add(f"shape_{i:04d}")
+    return obj
+
+
+def make_action(bones, name="Action", frames=10, channel="location", index=0):
+    """
+    An action keying one channel of every bone in bones from 0 to a bone
+    dependent value over frames.
+    """
+    action = fake_bpy.data.actions.new(name)
+    for i, bone in enumerate(bones):
+        curve = action.fcurves.new(f'pose.bones["{bone.name}"].{channel}', index=index)
+        curve.keyframe_points.insert(0.0, 0.0)
+        curve.keyframe_points.insert(float(frames), 0.1 + 0.001 * i)
+    return action
+
+
+def select(rig, bones, active=None, others=()):
+    """Makes rig active in pose mode with bones selected."""
+    context = fake_bpy.context
+    context.active_object = rig
+    context.selected_objects = [rig, *others]
+    context.selected_pose_bones = list(bones)
+    context.active_pose_bone = active
+    for bone in rig.pose.bones:
+        bone.bone.select = False
+    for bone in bones:
+        bone.bone.select = True
+    context.mode = "POSE"
+    return context
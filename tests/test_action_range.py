@@ -0,0 +1,50 @@
+import types
+
+import fake_bpy
+import synthetic
+
+
+def test_action_length(addon, bpy):
+    rig = synthetic.make_rig(3)
+    action = synthetic.make_action(rig.pose.bones, frames=30)
+    assert addon.action_range.get_action_length(action) == 30.0
+    assert addon.action_range.get_action_length(bpy.data.actions.new("Empty")) == 0
+
+
+def test_length_cached_until_action_updates(addon, bpy):
+    rig = synthetic.make_rig(1)
+    action = synthetic.make_action(rig.pose.bones, frames=10)
+    other = synthetic.make_action(rig.pose.bones, "Other", frames=5)
+    get_action_length = addon.action_range.get_action_length
+    assert get_action_length(action) == 10.0
+    assert get_action_length(other) == 5.0
+
+    action.fcurves[0].keyframe_points.insert(40.0, 1.0)
+    other.fcurves[0].keyframe_points.insert(50.0, 1.0)
+    assert get_action_length(action) == 10.0
+
+    depsgraph = types.SimpleNamespace(updates=[types.SimpleNamespace(id=action)])
+    fake_bpy.fire("depsgraph_update_post", bpy.context.scene, depsgraph)
+    assert get_action_length(action) == 40.0
+    assert get_action_length(other) == 5.0
+
+    fake_bpy.fire("undo_post", bpy.context.scene)
+    assert get_action_length(other) == 50.0
+
+
+def test_action_limits(addon, bpy):
+    rig = synthetic.make_rig(2, posed=False)
+    rig.pose.bones[1].rotation_mode = "QUATERNION"
+    action = bpy.data.actions.new("Turn")
+    curve = action.fcurves.new('pose.bones["bone_0001"].rotation_quaternion', index=0)
+    curve.keyframe_points.insert(0.0, 1.0)
+    curve.keyframe_points.insert(10.0, 0.9238795)
+    curve = action.fcurves.new('pose.bones["bone_0001"].rotation_quaternion', index=3)
+    curve.keyframe_points.insert(0.0, 0.0)
+    curve.keyframe_points.insert(10.0, 0.3826834)
+
+    found = addon.limits.detect_action_limits(action, list(rig.pose.bones))
+    assert list(found) == [1]
+    transform_type, min_value, max_value, limit_type = found[1]
+    assert (transform_type, min_value, limit_type) == ("ROT_Z", 0.0, "LIMIT_ROTATION")
+    assert round(max_value, 4) == 45.0
@@ -0,0 +1,100 @@
+import json
+import types
+
+import pytest
+
+import fake_bpy
+import synthetic
+
+SHAPE_PATH = 'bpy.data.shape_keys["Key"].key_blocks["{}"].value'
+
+
+def mesh_with_drivers(addon, count=3):
+    body = synthetic.make_mesh(count)
+    rig = synthetic.make_rig(1)
+    rows = [
+        addon.drivers.DriverRow(SHAPE_PATH.format(f"shape_{i:04d}"), "bone_0000", "LOC_X", 0.0, 1.0)
+        for i in range(count)
+    ]
+    addon.drivers.create_drivers(rows, rig, driver_mode="GENERATOR")
+    return body, rig
+
+
+def test_bake_and_unbake(addon, bpy):
+    body, rig = mesh_with_drivers(addon)
+    key = body.data.shape_keys
+    scene = bpy.context.scene
+    scene.frame_set(3)
+
+    curves, errors = addon.bake.bake_drivers(scene, 1, 10)
+    assert errors == [] and len(curves) == 3
+    assert key.animation_data.action.name == "KeyBaked"
+    assert [point.co[0] for point in curves[0].keyframe_points] == list(range(1, 11))
+    # the fake driver value is the frame
+    assert curves[1].keyframe_points[4].co[1] == 5.0
+    assert all(curve.mute for curve in key.animation_data.drivers)
+    assert json.loads(key[addon.bake.BAKE_PROP])["curves"][0][0] == 'key_blocks["shape_0000"].value'
+    assert scene.frame_current == 3
+
+    # the keys play back with the drivers muted
+    scene.frame_set(7)
+    assert key.key_blocks["shape_0002"].value == pytest.approx(7.0)
+
+    # baking again finds nothing left to bake
+    assert addon.bake.bake_drivers(scene, 1, 10) == ([], [])
+
+    assert addon.bake.unbake_drivers() == 3
+    assert key.animation_data.action is None
+    assert "KeyBaked" not in bpy.data.actions
+    assert addon.bake.BAKE_PROP not in key
+    assert not any(curve.mute for curve in key.animation_data.drivers)
+
+
+def test_bake_keeps_existing_action(addon, bpy):
+    body, rig = mesh_with_drivers(addon, 2)
+    key = body.data.shape_keys
+    key.key_blocks["shape_0001"].keyframe_insert("value", frame=1)
+    action = key.animation_data.action
+
+    curves, errors = addon.bake.bake_drivers(bpy.context.scene, 1, 4, mute=False)
+    assert [curve.data_path for curve in curves] == ['key_blocks["shape_0000"].value']
+    assert [curve.data_path for id_data, curve, message in errors] == ['key_blocks["shape_0001"].value']
+    assert not any(curve.mute for curve in key.animation_data.drivers)
+
+    assert addon.bake.unbake_drivers([key]) == 1
+    assert key.animation_data.action is action
+    assert [curve.data_path for curve in action.fcurves] == ['key_blocks["shape_0001"].value']
+
+
+def test_bake_operator_runs_modal(addon, bpy):
+    body, rig = mesh_with_drivers(addon)
+    context = synthetic.select(rig, [], others=[body])
+    context.window = object()
+    bpy.context.scene.frame_end = 400
+    operator = addon.bake.BakeDriverConstraints()
+    operator.scope = "SELECTED"
+    assert operator.execute(context) == {"RUNNING_MODAL"}
+
+    event = types.SimpleNamespace(type="TIMER", timer=context.window_manager.timers[0])
+    while operator.modal(context, event) == {"RUNNING_MODAL"}:
+        pass
+    assert len(body.data.shape_keys.animation_data.action.fcurves) == 3
+    assert fake_bpy.calls.count("ed.undo_push") == 1
+    assert operator.reports[-1] == ({"INFO"}, "3 Drivers baked from frame 1 to 400.")
+
+
+def test_bake_operator_reports_skipped(addon, bpy):
+    body, rig = mesh_with_drivers(addon, 2)
+    body.data.shape_keys.key_blocks["shape_0001"].keyframe_insert("value", frame=1)
+    context = synthetic.select(rig, [], others=[body])
+    operator = addon.bake.BakeDriverConstraints()
+    operator.scope = "SELECTED"
+    bpy.context.scene.frame_end = 4
+    assert operator.execute(context) == {"FINISHED"}
+
+    assert operator.reports[-1] == (
+        {"WARNING"},
+        f"1 Drivers baked from frame 1 to 4, 1 skipped. See the text block {addon.drivers.ERROR_TEXT}.",
+    )
+    errors = bpy.data.texts[addon.drivers.ERROR_TEXT].as_string()
+    assert errors.startswith('Could not bake Key key_blocks["shape_0001"].value[0]: property is already keyed')
@@ -0,0 +1,66 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+FAKE_BLENDER = """#!{python}
+import json, sys
+args = sys.argv[1:]
+blend_file = args[2]
+if "crash" in blend_file:
+    print("Segmentation fault")
+    sys.exit(139)
+report = {{"drivers": 3, "action_constraints": 1, "errors": []}}
+if "broken" in blend_file:
+    report["errors"] = ["drivers[0]: missing 'path'"]
+with open(args[args.index("--report") + 1], "w") as f:
+    json.dump(report, f)
+sys.exit(1 if report["errors"] else 0)
+"""
+
+
+def fake_blender(tmp_path):
+    path = tmp_path / "blender"
+    path.write_text(FAKE_BLENDER.format(python=sys.executable), encoding="utf-8")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_worker_command(addon):
+    command = addon.batch_runner.worker_command("blender", "a.blend", "spec.json", "r.json", "out.blend")
+    assert command[:4] == ["blender", "-b", "--factory-startup", "a.blend"]
+    assert command[command.index("--python-exit-code") + 1] != "0"
+    expr = command[command.index("--python-expr") + 1]
+    assert "sys.exit(cli.main())" in expr and os.path.basename(addon.batch_runner.ADDON_DIR) in expr
+    assert command[command.index("--") + 1 :] == ["spec.json", "--report", "r.json", "--output", "out.blend"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="runs a script with a shebang as Blender")
+def test_failures_are_collected(addon, tmp_path, capsys):
+    blender = fake_blender(tmp_path)
+    spec = tmp_path / "spec.json"
+    spec.write_text("{}", encoding="utf-8")
+    summary = tmp_path / "summary.json"
+    files = ["ok.blend", "broken.blend", "crash.blend"]
+
+    code = addon.batch_runner.main(
+        ["--spec", str(spec), "--blender", blender, "--summary", str(summary), "-j", "2", *files]
+    )
+    assert code == 1
+    results = json.loads(summary.read_text(encoding="utf-8"))["files"]
+    assert [result["returncode"] for result in results] == [0, 1, 139]
+    assert [result["drivers"] for result in results] == [3, 3, 0]
+    assert results[1]["errors"] == ["drivers[0]: missing 'path'"]
+    assert results[2]["errors"] == ["Segmentation fault"]
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("ok ") and lines[1].startswith("FAILED")
+    assert lines[-1].startswith("3 files, 2 failed")
+
+
+def test_missing_blender(addon, tmp_path):
+    result = addon.batch_runner.run_file(str(tmp_path / "no_blender"), "a.blend", "spec.json")
+    assert result["returncode"] is None
+    assert result["errors"][0].startswith("Could not start Blender")
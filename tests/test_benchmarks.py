@@ -0,0 +1,24 @@
+import benchmarks
+
+
+def test_benchmarks_run(addon):
+    results = benchmarks.run_benchmarks(sizes=(10, 50), repeat=1)
+    assert set(results) == set(benchmarks.BENCHMARKS)
+    for by_size in results.values():
+        assert by_size["50"]["items"] == 50
+        assert by_size["50"]["seconds"] > 0.0
+
+
+def test_regressions_are_reported():
+    result = {"seconds": 0.5, "items": 1000, "per_item": 0.0005}
+    baseline = {"f": {"1000": {"seconds": 0.1, "items": 1000, "per_item": 0.0001}}}
+    assert benchmarks.compare({"f": {"1000": result}}, baseline, 1.5)
+    assert not benchmarks.compare({"f": {"1000": result}}, baseline, 10.0)
+
+    growing = {
+        "f": {
+            "100": {"seconds": 0.01, "items": 100, "per_item": 0.0001},
+            "1000": result,
+        }
+    }
+    assert benchmarks.check_growth(growing, 3.0)
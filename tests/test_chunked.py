@@ -0,0 +1,153 @@
+import types
+
+import fake_bpy
+import synthetic
+
+SHAPE_PATH = 'bpy.data.shape_keys["Key"].key_blocks["shape_{:04d}"].value'
+
+
+def action_operator(addon, bone_count):
+    rig = synthetic.make_rig(bone_count + 1)
+    synthetic.make_action(rig.pose.bones[:1], "Smile", frames=24)
+    context = synthetic.select(rig, rig.pose.bones, rig.pose.bones[0])
+    context.window = object()
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    operator.mode = "ACTION"
+    operator.action = "Smile"
+    return rig, context, operator
+
+
+def pump(operator, context, limit=10000):
+    wm = context.window_manager
+    for _ in range(limit):
+        result = operator.modal(context, types.SimpleNamespace(type="TIMER", timer=wm.timers[0]))
+        if result != {"RUNNING_MODAL"}:
+            return result
+    raise AssertionError("job did not finish")
+
+
+def constraint_count(rig):
+    return sum(len(bone.constraints) for bone in rig.pose.bones)
+
+
+def test_job_runs_in_batches(addon):
+    seen = []
+    job = addon.chunked.ChunkedJob("Test", list(range(100)), seen.append, lambda: None, batch_size=30)
+    assert not job.run_chunk(seconds=0.0)
+    assert seen == [list(range(30))]
+    job.run_all()
+    assert [len(batch) for batch in seen] == [30, 30, 30, 10]
+
+
+def test_small_jobs_finish_at_once(addon, bpy):
+    rig, context, operator = action_operator(addon, 10)
+    assert operator.execute(context) == {"FINISHED"}
+    assert constraint_count(rig) == 10
+
+
+def test_modal_action_constraints(addon, bpy):
+    rig, context, operator = action_operator(addon, 2000)
+    assert operator.execute(context) == {"RUNNING_MODAL"}
+    assert context.window_manager.modal_handlers == [operator]
+
+    assert pump(operator, context) == {"FINISHED"}
+    assert constraint_count(rig) == 2000
+    assert fake_bpy.calls.count("ed.undo_push") == 1
+    assert context.view_layer.updates == 1
+    assert context.window_manager.progress[-1] == ("end",)
+    assert context.window_manager.timers == []
+    assert context.workspace.status_text is None
+
+
+def test_escape_rolls_back(addon, bpy, monkeypatch):
+    monkeypatch.setattr(addon.chunked, "CHUNK_SECONDS", 0.0)
+    rig, context, operator = action_operator(addon, 2000)
+    rig.pose.bones[5].constraints.new("LIMIT_LOCATION")
+    operator.execute(context)
+    wm = context.window_manager
+    operator.modal(context, types.SimpleNamespace(type="TIMER", timer=wm.timers[0]))
+    assert constraint_count(rig) > 1
+
+    assert operator.modal(context, types.SimpleNamespace(type="ESC", timer=None)) == {"CANCELLED"}
+    assert constraint_count(rig) == 1
+    assert fake_bpy.calls.count("ed.undo_push") == 0
+    assert operator.reports[-1][0] == {"WARNING"}
+
+
+def test_escape_removes_only_new_drivers(addon, bpy, monkeypatch):
+    monkeypatch.setattr(addon.chunked, "CHUNK_SECONDS", 0.0)
+    body = synthetic.make_mesh(400, vertex_count=1)
+    rig = synthetic.make_rig(1)
+    existing = body.data.shape_keys.key_blocks["shape_0000"].driver_add("value")
+    text = bpy.data.texts.new("Rows")
+    text.from_string("\n".join(f"{SHAPE_PATH.format(i)}, bone_0000" for i in range(400)))
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0], others=[body])
+    context.window = object()
+
+    operator = addon.batch_operator.CreateDriverConstraintBatch()
+    operator.text_name = "Rows"
+    assert operator.execute(context) == {"RUNNING_MODAL"}
+    wm = context.window_manager
+    operator.modal(context, types.SimpleNamespace(type="TIMER", timer=wm.timers[0]))
+    operator.modal(context, types.SimpleNamespace(type="ESC", timer=None))
+    assert list(body.data.shape_keys.animation_data.drivers) == [existing]
+
+
+def test_unchanged_drivers_push_no_undo(addon, bpy):
+    body = synthetic.make_mesh(3, vertex_count=1)
+    rig = synthetic.make_rig(1)
+    text = bpy.data.texts.new("Rows")
+    text.from_string("\n".join(f"{SHAPE_PATH.format(i)}, bone_0000" for i in range(3)))
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0], others=[body])
+
+    operator = addon.batch_operator.CreateDriverConstraintBatch()
+    operator.text_name = "Rows"
+    assert operator.execute(context) == {"FINISHED"}
+    assert fake_bpy.calls.count("ed.undo_push") == 1
+    assert operator.execute(context) == {"FINISHED"}
+    assert fake_bpy.calls.count("ed.undo_push") == 1
+    assert "0 created, 0 updated, 3 unchanged" in operator.reports[-1][1]
+
+
+def test_escape_restores_updated_drivers(addon, bpy, monkeypatch):
+    monkeypatch.setattr(addon.chunked, "CHUNK_SECONDS", 0.0)
+    body = synthetic.make_mesh(400, vertex_count=1)
+    rig = synthetic.make_rig(1)
+    rows = [addon.drivers.DriverRow(SHAPE_PATH.format(0), "bone_0000", "LOC_X", 0.0, 1.0)]
+    addon.drivers.create_drivers(rows, rig, driver_mode="GENERATOR")
+    existing = body.data.shape_keys.animation_data.drivers[0]
+    before = addon.drivers.driver_state(existing)
+
+    text = bpy.data.texts.new("Rows")
+    text.from_string("\n".join(f"{SHAPE_PATH.format(i)}, bone_0000, ROT_X, 0, 90" for i in range(400)))
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0], others=[body])
+    context.window = object()
+
+    operator = addon.batch_operator.CreateDriverConstraintBatch()
+    operator.text_name = "Rows"
+    assert operator.execute(context) == {"RUNNING_MODAL"}
+    wm = context.window_manager
+    operator.modal(context, types.SimpleNamespace(type="TIMER", timer=wm.timers[0]))
+    assert addon.drivers.driver_state(existing) != before
+
+    operator.modal(context, types.SimpleNamespace(type="ESC", timer=None))
+    assert list(body.data.shape_keys.animation_data.drivers) == [existing]
+    assert addon.drivers.driver_state(existing) == before
+    assert [modifier.type for modifier in existing.modifiers] == ["GENERATOR", "LIMITS"]
+
+
+def test_failed_rows_reach_the_user(addon, bpy):
+    body = synthetic.make_mesh(1, vertex_count=1)
+    rig = synthetic.make_rig(1)
+    text = bpy.data.texts.new("Rows")
+    text.from_string(f"{SHAPE_PATH.format(0)}, bone_0000\n{SHAPE_PATH.format(0)}, no_bone")
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0], others=[body])
+
+    operator = addon.batch_operator.CreateDriverConstraintBatch()
+    operator.text_name = "Rows"
+    assert operator.execute(context) == {"FINISHED"}
+    level, message = operator.reports[-1]
+    assert level == {"WARNING"} and addon.drivers.ERROR_TEXT in message
+    errors = bpy.data.texts[addon.drivers.ERROR_TEXT].as_string()
+    assert errors.startswith(f"Error adding driver to {SHAPE_PATH.format(0)}:")
+    assert "no_bone" in errors
@@ -0,0 +1,95 @@
+import json
+import sys
+
+import pytest
+
+import fake_bpy
+import synthetic
+
+SHAPE_PATH = 'bpy.data.shape_keys["Key"].key_blocks["{}"].value'
+
+
+def write_spec(tmp_path, spec, name="spec.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return str(path)
+
+
+def rig_spec():
+    synthetic.make_mesh(2)
+    rig = synthetic.make_rig(3)
+    synthetic.make_action(rig.pose.bones[:1], "Smile")
+    return {
+        "defaults": {"driver_object": "Rig"},
+        "drivers": [
+            {"path": SHAPE_PATH.format(f"shape_{i:04d}"), "bone": "bone_0000",
+             "type": "LOC_X", "min": 0.0, "max": 0.5, "mode": "SIMPLE_EXPRESSION"}
+            for i in range(2)
+        ],
+        "action_constraints": [
+            {"armature": "Rig", "bones": ["bone_0001", "bone_0002"], "subtarget": "bone_0000",
+             "action": "Smile", "type": "LOC_X", "min": 0.0, "max": 0.5}
+        ],
+    }
+
+
+def run(addon, tmp_path, spec, *args):
+    report_path = tmp_path / "report.json"
+    code = addon.cli.main([write_spec(tmp_path, spec), "--report", str(report_path), *args])
+    return code, json.loads(report_path.read_text(encoding="utf-8"))
+
+
+def test_apply_spec_twice(addon, bpy, tmp_path):
+    spec = rig_spec()
+    code, report = run(addon, tmp_path, spec)
+    assert code == 0 and report["errors"] == []
+    assert (report["drivers"], report["action_constraints"]) == (2, 2)
+    assert report["changes"]["drivers"] == {"created": 2, "updated": 0, "unchanged": 0}
+    assert report["changes"]["action_constraints"]["created"] == 2
+    assert fake_bpy.calls.count("wm.save_mainfile") == 1
+
+    code, report = run(addon, tmp_path, spec)
+    assert code == 0
+    assert report["changes"]["drivers"] == {"created": 0, "updated": 0, "unchanged": 2}
+    assert report["changes"]["action_constraints"]["unchanged"] == 2
+
+
+def test_bad_entry_fails_without_saving(addon, bpy, tmp_path):
+    spec = rig_spec()
+    spec["drivers"].append({"bone": "bone_0000"})
+    spec["action_constraints"].append("Smile")
+    code, report = run(addon, tmp_path, spec)
+    assert code == 1
+    assert report["errors"] == [
+        "drivers[2]: missing 'path'",
+        "action_constraints[1]: entry is no object",
+    ]
+    assert report["drivers"] == 2
+    assert fake_bpy.calls.count("wm.save_mainfile") == 0
+
+    code, report = run(addon, tmp_path, spec, "--save-on-errors")
+    assert code == 1
+    assert fake_bpy.calls.count("wm.save_mainfile") == 1
+
+
+@pytest.mark.parametrize("text", ["{not json", "[1, 2]"])
+def test_broken_spec_file(addon, bpy, tmp_path, text):
+    path = tmp_path / "spec.json"
+    path.write_text(text, encoding="utf-8")
+    report_path = tmp_path / "report.json"
+    assert addon.cli.main([str(path), "--report", str(report_path)]) == 1
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert len(report["errors"]) == 1 and report["errors"][0].startswith(str(path))
+    assert fake_bpy.calls.count("wm.save_mainfile") == 0
+
+
+def test_missing_spec_file(addon, bpy, tmp_path):
+    assert addon.cli.main([str(tmp_path / "missing.json"), "--no-save"]) == 1
+
+
+def test_toml_needs_tomllib(addon, tmp_path, monkeypatch):
+    path = tmp_path / "spec.toml"
+    path.write_text("[defaults]\n", encoding="utf-8")
+    monkeypatch.setitem(sys.modules, "tomllib", None)
+    with pytest.raises(ValueError, match="Blender 4.1"):
+        addon.cli.load_spec(str(path))
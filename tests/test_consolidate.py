@@ -0,0 +1,57 @@
+import pytest
+
+import synthetic
+
+SHAPE_PATH = 'bpy.data.shape_keys["Key"].key_blocks["{}"].value'
+
+
+def shape_rows(addon, shapes, bone="bone_0000", transform_type="LOC_X", max_value=1.0):
+    return [
+        addon.drivers.DriverRow(SHAPE_PATH.format(f"shape_{i:04d}"), bone, transform_type, 0.0, max_value)
+        for i in shapes
+    ]
+
+
+@pytest.mark.parametrize("driver_mode", ["SCRIPTED", "GENERATOR"])
+def test_consolidate(addon, bpy, driver_mode):
+    body = synthetic.make_mesh(6)
+    rig = synthetic.make_rig(2)
+    rows = shape_rows(addon, range(4)) + shape_rows(addon, [4], max_value=2.0)
+    rows += shape_rows(addon, [5], bone="bone_0001")
+    addon.drivers.create_drivers(rows, rig, driver_mode=driver_mode)
+    drivers = body.data.shape_keys.animation_data.drivers
+
+    report = addon.consolidate.consolidate(dry_run=True)
+    assert (report["drivers_rewritten"], report["shared_inputs_added"], report["evaluations_saved"]) == (4, 1, 3)
+    assert all(curve.driver.variables[0].type == "TRANSFORMS" for curve in drivers)
+
+    report = addon.consolidate.consolidate()
+    assert report["groups"][0]["shared_input"] == '["dc_bone_0000_loc_x"]'
+    hub = rig.animation_data.drivers.find('["dc_bone_0000_loc_x"]')
+    assert addon.drivers.driver_matches(hub, rig, "bone_0000", "LOC_X", "LOCAL_SPACE", 0.0, 1.0, driver_mode)
+    for curve in drivers[:4]:
+        var = curve.driver.variables[0]
+        assert (curve.driver.type, var.type, var.targets[0].id) == ("AVERAGE", "SINGLE_PROP", rig)
+        assert len(curve.modifiers) == 0
+        assert addon.drivers.is_transform_driver(curve)
+    assert [curve.driver.variables[0].type for curve in drivers[4:]] == ["TRANSFORMS"] * 2
+
+    # nothing left to share, until another driver with the same mapping shows up
+    assert addon.consolidate.consolidate()["drivers_rewritten"] == 0
+    addon.drivers.create_drivers(rows[4:5], rig, driver_mode=driver_mode)
+    addon.drivers.create_drivers(shape_rows(addon, [4]), rig, driver_mode=driver_mode)
+    report = addon.consolidate.consolidate()
+    assert (report["drivers_rewritten"], report["shared_inputs_added"]) == (1, 0)
+    assert drivers[4].driver.variables[0].targets[0].data_path == '["dc_bone_0000_loc_x"]'
+
+
+def test_consolidate_operator(addon, bpy):
+    synthetic.make_mesh(3)
+    rig = synthetic.make_rig(1)
+    addon.drivers.create_drivers(shape_rows(addon, range(3)), rig)
+    operator = addon.consolidate.ConsolidateDriverConstraints()
+    assert operator.execute(bpy.context) == {"FINISHED"}
+    assert operator.reports[-1][1] == "3 Drivers would be rewritten to read 1 shared inputs (1 new)."
+    assert "dc_bone_0000_loc_x" not in rig.keys()
+    text = bpy.data.texts[addon.consolidate.REPORT_TEXT].as_string()
+    assert "Mapping evaluations saved per frame: 2, 0 of them in Python." in text
@@ -0,0 +1,204 @@
+import pytest
+
+import fake_bpy
+import synthetic
+
+
+def make_operator(addon, **properties):
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    for name, value in properties.items():
+        setattr(operator, name, value)
+    return operator
+
+
+def test_set_defaults_from_pose(addon, bpy):
+    rig = synthetic.make_rig(5)
+    context = synthetic.select(rig, [rig.pose.bones[3]], rig.pose.bones[3])
+    operator = make_operator(addon)
+    assert operator.set_defaults(context) == "LIMIT_ROTATION"
+    assert operator.type == "ROT_X"
+    assert operator.max_value == pytest.approx(13.0)
+
+
+def test_set_defaults_from_action(addon, bpy):
+    rig = synthetic.make_rig(3, posed=False)
+    action = synthetic.make_action(rig.pose.bones, "Open", channel="scale", index=2)
+    for curve in action.fcurves:
+        curve.keyframe_points[0].co[1] = 1.0
+        curve.keyframe_points[1].co[1] = 3.0
+    context = synthetic.select(rig, [rig.pose.bones[1]], rig.pose.bones[1])
+    operator = make_operator(addon)
+    operator.driver = rig.pose.bones[1]
+    operator.limits_action = "Open"
+    operator.limits_source = "ACTION"
+    assert operator.limit_type == "LIMIT_SCALE"
+    assert (operator.type, operator.min_value, operator.max_value) == ("SCALE_Z", 1.0, 3.0)
+
+
+def test_invoke_and_create_property_driver(addon, bpy):
+    body = synthetic.make_mesh(2)
+    rig = synthetic.make_rig(2)
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0], others=[body])
+    context.window_manager.clipboard = 'bpy.data.shape_keys["Key"].key_blocks["shape_0001"].value'
+    operator = make_operator(addon, mode="DRIVER", set_driver_limit_constraint=True)
+    assert operator.invoke(context, None) == {"RUNNING_MODAL"}
+    assert operator.prop_data_path == context.window_manager.clipboard
+    assert operator.execute(context) == {"FINISHED"}
+
+    curve = body.data.shape_keys.animation_data.drivers[0]
+    assert curve.data_path == 'key_blocks["shape_0001"].value'
+    assert curve.driver.variables[0].targets[0].bone_target == "bone_0000"
+    assert "Driver Limit" in rig.pose.bones[0].constraints
+    assert operator.reports[-1][0] == {"INFO"}
+
+
+def test_invoke_reports_unresolved_clipboard(addon, bpy):
+    synthetic.make_mesh(1)
+    rig = synthetic.make_rig(1)
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0])
+    context.window_manager.clipboard = 'bpy.data.shape_keys["Key"].key_blocks["missing"].value'
+    operator = make_operator(addon, mode="DRIVER")
+    operator.invoke(context, None)
+    assert operator.property_type == "OBJECT_PROPERTY"
+    level, message = operator.reports[-1]
+    assert level == {"WARNING"}
+    assert message.startswith("Could not resolve 'key_blocks[\"missing\"]'")
+    assert message.endswith("no item named 'missing'. Using default property type.")
+
+
+def test_create_property_driver_reports_missing_path(addon, bpy):
+    rig = synthetic.make_rig(1)
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0])
+    operator = make_operator(addon, mode="DRIVER")
+    operator.prop_data_path = 'bpy.data.objects["Rig"]["missing"]'
+    assert operator.prop_data_path == ""
+    assert "missing" in operator.reports[-1][1]
+    operator.execute(context)
+    assert operator.reports[-1][0] == {"WARNING"}
+
+
+def test_create_actions_constraints(addon, bpy):
+    rig = synthetic.make_rig(6)
+    action = synthetic.make_action(rig.pose.bones[1:], "Smile", frames=24)
+    context = synthetic.select(rig, rig.pose.bones, rig.pose.bones[0])
+    operator = make_operator(addon, mode="ACTION")
+    operator.invoke(context, None)
+    assert operator.action == "Smile"
+    assert operator.action_frame_end == 24
+    operator.execute(context)
+
+    assert len(rig.pose.bones[0].constraints) == 0
+    for bone in rig.pose.bones[1:]:
+        const = bone.constraints["Action"]
+        assert (const.action, const.subtarget, const.frame_end) == (action, "bone_0000", 24)
+    assert fake_bpy.calls.count("ed.undo_push") == 1
+    assert context.view_layer.updates == 1
+
+
+def rig_with_action_constraints(addon, bpy):
+    rig = synthetic.make_rig(8)
+    smile = synthetic.make_action(rig.pose.bones[:1], "Smile")
+    frown = synthetic.make_action(rig.pose.bones[:1], "Frown")
+    bones = list(rig.pose.bones[1:])
+    addon.action_constraints.add_action_constraints(
+        bones, rig, "bone_0000", smile, "LOC_X", "LOCAL_SPACE", 0.0, 1.0, 0, 10
+    )
+    addon.action_constraints.add_action_constraints(
+        bones[:4], rig, "bone_0000", frown, "LOC_Y", "LOCAL_SPACE", 0.0, 1.0, 0, 10
+    )
+    for bone in bones:
+        bone.constraints.new("LIMIT_LOCATION")
+    return rig, smile, frown
+
+
+def action_constraint_names(rig):
+    return sorted(
+        const.name for bone in rig.pose.bones for const in bone.constraints if const.type == "ACTION"
+    )
+
+
+@pytest.mark.parametrize(
+    "scope, match, remaining",
+    [
+        ("SELECTED", "NAME", ["Action"] * 7 + ["Action.001"]),
+        ("SELECTED", "ALL", ["Action"] * 4 + ["Action.001"]),
+        ("ARMATURE", "NAME", ["Action"] * 7),
+        ("ARMATURE", "ACTION", ["Action"] * 7),
+        ("ARMATURE", "ALL", []),
+    ],
+)
+def test_delete_action_constraints(addon, bpy, scope, match, remaining):
+    rig, smile, frown = rig_with_action_constraints(addon, bpy)
+    context = synthetic.select(rig, rig.pose.bones[:4], rig.pose.bones[0])
+    operator = make_operator(addon, mode="ACTION", action_mode="DELETE_CONSTRAINT")
+    operator.delete_scope = scope
+    operator.delete_match = match
+    operator.action_constraint = "Action.001"
+    operator.action = "Frown"
+    operator.execute(context)
+
+    assert action_constraint_names(rig) == remaining
+    assert sum(len(bone.constraints) for bone in rig.pose.bones) == len(remaining) + 7
+    assert fake_bpy.calls.count("ed.undo_push") == 1
+
+
+def test_delete_lists_action_constraints_of_scope(addon, bpy):
+    rig, smile, frown = rig_with_action_constraints(addon, bpy)
+    context = synthetic.select(rig, rig.pose.bones[5:], rig.pose.bones[5])
+    operator = make_operator(addon, mode="ACTION", action_mode="DELETE_CONSTRAINT")
+    names = [item[0] for item in operator.get_action_constraints(context)]
+    assert names == ["Action", "ALL_ACTIONS"]
+    operator.delete_scope = "ARMATURE"
+    names = [item[0] for item in operator.get_action_constraints(context)]
+    assert names == ["Action", "Action.001", "ALL_ACTIONS"]
+
+
+def test_reapply_actions_constraints(addon, bpy):
+    rig = synthetic.make_rig(4)
+    synthetic.make_action(rig.pose.bones[1:], "Smile", frames=24)
+    context = synthetic.select(rig, rig.pose.bones, rig.pose.bones[0])
+    operator = make_operator(addon, mode="ACTION")
+    operator.invoke(context, None)
+    operator.execute(context)
+    assert operator.reports[-1][1] == "Action constraints: 3 created, 0 updated, 0 unchanged."
+
+    operator.execute(context)
+    assert operator.reports[-1][1] == "Action constraints: 0 created, 0 updated, 3 unchanged."
+    assert fake_bpy.calls.count("ed.undo_push") == 1
+    assert context.view_layer.updates == 1
+
+    operator.action_frame_end = 12
+    operator.execute(context)
+    assert operator.reports[-1][1] == "Action constraints: 0 created, 3 updated, 0 unchanged."
+    for bone in rig.pose.bones[1:]:
+        assert [const.frame_end for const in bone.constraints] == [12]
+
+
+def test_revert_action_constraint_changes(addon, bpy):
+    rig = synthetic.make_rig(3)
+    action = synthetic.make_action(rig.pose.bones[:1], "Smile")
+    bones = list(rig.pose.bones[1:])
+    apply = addon.action_constraints.add_action_constraints
+    apply(bones[:1], rig, "bone_0000", action, "LOC_X", "LOCAL_SPACE", 0.0, 1.0, 0, 10)
+
+    changes = []
+    apply(bones, rig, "bone_0000", action, "LOC_X", "LOCAL_SPACE", 0.0, 2.0, 0, 10, changes=changes)
+    assert [const.max for bone in bones for const in bone.constraints] == [2.0, 2.0]
+    addon.action_constraints.revert_changes(changes)
+    assert [const.max for const in bones[0].constraints] == [1.0]
+    assert len(bones[1].constraints) == 0
+
+
+def test_create_combined_property_driver(addon, bpy):
+    body = synthetic.make_mesh(1)
+    rig = synthetic.make_rig(4)
+    context = synthetic.select(rig, rig.pose.bones[:2], rig.pose.bones[1], others=[body])
+    operator = make_operator(addon, mode="DRIVER", combine="PRODUCT", type="LOC_Y", max_value=0.5)
+    operator.prop_data_path = 'bpy.data.shape_keys["Key"].key_blocks["shape_0000"].value'
+    operator.execute(context)
+
+    curve = body.data.shape_keys.animation_data.drivers[0]
+    targets = [(var.targets[0].bone_target, var.targets[0].transform_type) for var in curve.driver.variables]
+    assert targets == [("bone_0001", "LOC_Y"), ("bone_0000", "LOC_X")]
+    assert curve.driver.expression == "max(0.0,0.0+var1*2.0)*max(0.0,0.0+var2*10.0)"
+    assert operator.reports[-1][0] == {"INFO"}
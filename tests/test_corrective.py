@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import synthetic
+
+
+def twist(co):
+    # a rotation by 90 degrees around Z with a stretch along X
+    return (-co[1], 2.0 * co[0], co[2] + 1.0)
+
+
+def sculpt_of(body, offsets, name="Sculpt"):
+    """A copy of the deformed body whose vertices moved by offsets in rest space."""
+    rest = [tuple(vertex.co) for vertex in body.data.vertices]
+    moved = [tuple(np.add(co, offset)) for co, offset in zip(rest, offsets)]
+    return synthetic.fake_bpy.data.objects.new(
+        name, synthetic.fake_bpy.data.meshes.new(name, [twist(co) for co in moved])
+    )
+
+
+def test_extract_rest_coordinates(addon, bpy):
+    body = synthetic.make_mesh(0, vertex_count=5)
+    body.deform = twist
+    offsets = [(0.1 * i, -0.2, 0.05 * i) for i in range(5)]
+    sculpt = sculpt_of(body, offsets)
+
+    coordinates = addon.corrective.extract_rest_coordinates(body, sculpt)
+    expected = [np.add(vertex.co, offset) for vertex, offset in zip(body.data.vertices, offsets)]
+    assert coordinates.reshape(-1, 3) == pytest.approx(np.array(expected), abs=1e-4)
+    # the probe key is gone again
+    assert body.data.shape_keys.key_blocks.keys() == ["Basis"]
+
+
+def test_singular_deformation_keeps_offset(addon):
+    matrices = np.array([np.diag((2.0, 2.0, 2.0)), np.zeros((3, 3))])
+    targets = np.array([(2.0, 4.0, 6.0), (1.0, 1.0, 1.0)])
+    assert addon.corrective.solve_offsets(matrices, targets).tolist() == [[1.0, 2.0, 3.0], [1.0, 1.0, 1.0]]
+
+
+def test_create_corrective_shape(addon, bpy):
+    body = synthetic.make_mesh(0, vertex_count=4)
+    body.deform = twist
+    offsets = [(0.0, 0.0, 0.5)] * 4
+    sculpt = sculpt_of(body, offsets)
+    rig = synthetic.make_rig(1)
+    context = synthetic.select(rig, rig.pose.bones[:1], rig.pose.bones[0], others=[body])
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    operator.mode = "DRIVER"
+    operator.shape_name = "CREATE_NEW_SHAPE"
+    operator.new_shape_name = "Fix"
+    operator.new_shape_source = sculpt.name
+    operator.new_shape_space = "POSE"
+    operator.invoke(context, None)
+    operator.execute(context)
+
+    block = body.data.shape_keys.key_blocks["Fix"]
+    expected = np.array([(i, 0.0, 0.5) for i in range(4)])
+    assert np.array([point.co for point in block.data]) == pytest.approx(expected, abs=1e-4)
+    curve = body.data.shape_keys.animation_data.drivers[0]
+    assert curve.driver.variables[0].targets[0].transform_type == operator.type == "LOC_X"
+    assert operator.max_value == pytest.approx(0.1)
+
+    # extracting again with the key driven to 1.0 gives the same shape
+    block.value = 1.0
+    operator.execute(context)
+    assert np.array([point.co for point in block.data]) == pytest.approx(expected, abs=1e-4)
@@ -0,0 +1,75 @@
+import pytest
+
+import synthetic
+
+
+def test_compile_strips_bpy_data(addon):
+    compiled = addon.data_path.compile_path('bpy.data.objects["Cube"].modifiers["Sub.1"].levels')
+    assert compiled.from_data
+    assert compiled.parts == (("objects", "Cube"), ("modifiers", "Sub.1"), ("levels", addon.data_path.NO_KEY))
+    assert compiled.owner_source == 'objects["Cube"]'
+    assert compiled.last_part == "levels"
+
+
+def test_compile_unescapes_keys(addon):
+    compiled = addon.data_path.compile_path('["say \\"hi\\""]')
+    assert compiled.parts == ((None, 'say "hi"'),)
+    assert not compiled.from_data
+
+
+def test_compile_is_cached(addon):
+    path = 'bpy.data.objects["Cached"].location'
+    assert addon.data_path.compile_path(path) is addon.data_path.compile_path(path)
+
+
+def test_malformed_path(addon):
+    with pytest.raises(addon.data_path.PathResolveError) as error:
+        addon.data_path.compile_path('objects["Cube"]..x')
+    assert error.value.index is None
+
+
+def test_resolve_shape_key_value(addon, bpy):
+    body = synthetic.make_mesh(3)
+    compiled, parent, target = addon.data_path.resolve_path(
+        'bpy.data.shape_keys["Key"].key_blocks["shape_0001"].value'
+    )
+    assert parent is body.data.shape_keys.key_blocks["shape_0001"]
+    assert target == 0.0
+
+
+def test_resolve_relative_to_object(addon, bpy):
+    rig = synthetic.make_rig(2)
+    compiled, parent, target = addon.data_path.resolve_path('pose.bones["bone_0001"].location', rig)
+    assert parent is rig.pose.bones["bone_0001"]
+    assert target == [0.0, 0.101, 0.0]
+
+
+def test_resolve_reports_failing_part(addon, bpy):
+    synthetic.make_mesh(1)
+    with pytest.raises(addon.data_path.PathResolveError) as error:
+        addon.data_path.resolve_path('bpy.data.shape_keys["Key"].key_blocks["missing"].value')
+    assert error.value.part == 'key_blocks["missing"]'
+    assert "missing" in error.value.reason
+
+
+def test_resolved_cache_dropped_on_load(addon, bpy):
+    body = synthetic.make_mesh(1)
+    path = 'bpy.data.objects["Body"].location'
+    first = addon.data_path.resolve_path(path)
+    assert addon.data_path.resolve_path(path) is first
+
+    bpy = __import__("fake_bpy").reset()
+    other = synthetic.make_mesh(1)
+    compiled, parent, target = addon.data_path.resolve_path(path)
+    assert parent is other
+    assert parent is not body
+
+
+def test_get_prop_object(addon, bpy):
+    rig = synthetic.make_rig(1)
+    rig["driver"] = 0.5
+    operator = addon.constraint_operator
+    assert operator.get_prop_object(None, bpy.context, '["driver"]', rig) == (0.5, "PROPERTY")
+    with pytest.raises(addon.data_path.PathResolveError) as info:
+        operator.get_prop_object(None, bpy.context, '["nothing"]', rig)
+    assert info.value.part == '["nothing"]'
@@ -0,0 +1,174 @@
+import pytest
+
+import synthetic
+
+SHAPE_PATH = 'bpy.data.shape_keys["Key"].key_blocks["{}"].value'
+
+
+def test_parse_rows(addon):
+    rows = addon.drivers.parse_rows(
+        "# comment\n"
+        'bpy.data.objects["Body"]["a"], bone_0000\n'
+        'bpy.data.objects["Body"]["b"], , rot_x, 0, 45, world_space\n',
+        default_bone="root",
+    )
+    assert [row.bone_name for row in rows] == ["bone_0000", "root"]
+    assert rows[0].transform_type is None and rows[0].min_value is None
+    assert (rows[1].transform_type, rows[1].max_value, rows[1].space) == ("ROT_X", 45.0, "WORLD_SPACE")
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["x, bone, ROT_W", "x, bone, LOC_X, 0", "x, bone, LOC_X, 0, 1, NOWHERE", ", bone"],
+)
+def test_parse_rows_rejects(addon, text):
+    with pytest.raises(ValueError):
+        addon.drivers.parse_rows(text)
+
+
+def test_scripted_driver(addon, bpy):
+    synthetic.make_mesh(1)
+    rig = synthetic.make_rig(1)
+    curve = addon.drivers.add_property_driver(
+        SHAPE_PATH.format("shape_0000"), rig, "bone_0000", "LOC_X", "LOCAL_SPACE", 0.0, 0.5
+    )
+    driver = curve.driver
+    assert driver.expression == "max(0.0,var/0.5)"
+    assert len(curve.modifiers) == 0
+    target = driver.variables[0].targets[0]
+    assert (target.id, target.bone_target, target.transform_type) == (rig, "bone_0000", "LOC_X")
+
+
+def test_simple_expression_driver(addon, bpy):
+    synthetic.make_mesh(1)
+    rig = synthetic.make_rig(1)
+    curve = addon.drivers.add_property_driver(
+        SHAPE_PATH.format("shape_0000"), rig, "bone_0000", "SCALE_Y", "LOCAL_SPACE", 1.0, 2.0,
+        "SIMPLE_EXPRESSION",
+    )
+    assert curve.driver.expression == "max(0.0,-1.0+var*1.0)"
+    assert curve.driver.is_simple_expression
+    assert addon.drivers.find_python_drivers() == []
+
+
+def test_generator_driver(addon, bpy):
+    synthetic.make_mesh(1)
+    rig = synthetic.make_rig(1)
+    curve = addon.drivers.add_property_driver(
+        SHAPE_PATH.format("shape_0000"), rig, "bone_0000", "LOC_Z", "LOCAL_SPACE", 0.0, 0.25,
+        "GENERATOR",
+    )
+    assert curve.driver.type == "AVERAGE"
+    assert [modifier.type for modifier in curve.modifiers] == ["GENERATOR", "LIMITS"]
+    assert curve.evaluate(0.125) == pytest.approx(0.5)
+    assert curve.evaluate(-1.0) == 0.0
+
+
+def test_create_drivers_collects_errors(addon, bpy):
+    synthetic.make_mesh(4)
+    rig = synthetic.make_rig(2)
+    rows = [
+        addon.drivers.DriverRow(SHAPE_PATH.format(f"shape_{i:04d}"), "bone_0001") for i in range(4)
+    ]
+    rows.append(addon.drivers.DriverRow(SHAPE_PATH.format("missing"), "bone_0001"))
+    rows.append(addon.drivers.DriverRow(SHAPE_PATH.format("shape_0000"), "no_bone"))
+    curves, errors = addon.drivers.create_drivers(rows, rig)
+    assert len(curves) == 4
+    assert [row for row, message in errors] == rows[4:]
+    assert addon.drivers.find_python_drivers() == []
+
+
+def test_fill_auto_limits(addon, bpy):
+    rig = synthetic.make_rig(8)
+    rows = [addon.drivers.DriverRow("x", f"bone_{i:04d}", None, None, None) for i in (0, 4, 7)]
+    rows.append(addon.drivers.DriverRow("x", "missing", None, None, None))
+    errors = addon.limits.fill_auto_limits(rows, rig)
+    assert [(row.transform_type, row.min_value) for row in rows[:3]] == [
+        ("LOC_X", 0.0),
+        ("ROT_Y", 0.0),
+        ("SCALE_Y", 1.0),
+    ]
+    assert rows[1].max_value == pytest.approx(14.0)
+    assert [row for row, message in errors] == rows[3:]
+
+
+@pytest.mark.parametrize("driver_mode", ["SCRIPTED", "SIMPLE_EXPRESSION", "GENERATOR"])
+def test_create_drivers_reapply(addon, bpy, driver_mode):
+    body = synthetic.make_mesh(3)
+    rig = synthetic.make_rig(2)
+    rows = [
+        addon.drivers.DriverRow(SHAPE_PATH.format(f"shape_{i:04d}"), "bone_0001", "ROT_X", 0.0, 30.0)
+        for i in range(3)
+    ]
+    first = addon.drivers.new_stats()
+    addon.drivers.create_drivers(rows, rig, driver_mode=driver_mode, stats=first)
+    assert addon.drivers.format_stats(first) == "3 created, 0 updated, 0 unchanged"
+
+    rows[0].max_value = 45.0
+    again = addon.drivers.new_stats()
+    created = []
+    curves, errors = addon.drivers.create_drivers(
+        rows, rig, driver_mode=driver_mode, created=created, stats=again
+    )
+    assert addon.drivers.format_stats(again) == "0 created, 1 updated, 2 unchanged"
+    assert created == [] and errors == []
+    drivers = body.data.shape_keys.animation_data.drivers
+    assert len(drivers) == 3
+    assert addon.drivers.driver_matches(
+        curves[0], rig, "bone_0001", "ROT_X", "LOCAL_SPACE", 0.0, 45.0, driver_mode
+    )
+
+
+@pytest.mark.parametrize(
+    "combine, expected",
+    [
+        ("PRODUCT", "max(0.0,0.0+var1*2.0)*max(0.0,0.0+var2*1.0)"),
+        ("MIN", "min(max(0.0,0.0+var1*2.0),max(0.0,0.0+var2*1.0))"),
+        ("MAX", "max(max(0.0,0.0+var1*2.0),max(0.0,0.0+var2*1.0))"),
+        ("WEIGHTED_SUM", "0.5*max(0.0,0.0+var1*2.0)+0.5*max(0.0,0.0+var2*1.0)"),
+    ],
+)
+def test_combined_driver(addon, bpy, combine, expected):
+    synthetic.make_mesh(1)
+    rig = synthetic.make_rig(2)
+    inputs = [
+        addon.drivers.DriverRow("", "bone_0000", "LOC_X", 0.0, 0.5),
+        addon.drivers.DriverRow("", "bone_0001", "LOC_Y", 0.0, 1.0, "WORLD_SPACE"),
+    ]
+    stats = addon.drivers.new_stats()
+    path = SHAPE_PATH.format("shape_0000")
+    curve = addon.drivers.add_combined_driver(path, rig, inputs, combine, stats=stats)
+    assert curve.driver.expression == expected
+    assert curve.driver.is_simple_expression
+    assert len(curve.modifiers) == 0
+    targets = [(var.name, var.targets[0].bone_target, var.targets[0].transform_space) for var in curve.driver.variables]
+    assert targets == [("var1", "bone_0000", "LOCAL_SPACE"), ("var2", "bone_0001", "WORLD_SPACE")]
+
+    addon.drivers.add_combined_driver(path, rig, inputs, combine, stats=stats)
+    addon.drivers.add_combined_driver(path, rig, inputs[:1] * 3, combine, stats=stats)
+    assert addon.drivers.format_stats(stats) == "1 created, 1 updated, 1 unchanged"
+    assert len(curve.driver.variables) == 3
+
+
+def test_combined_driver_rejects(addon, bpy):
+    row = addon.drivers.DriverRow("", "bone_0000", "LOC_X", 0.0, 1.0)
+    with pytest.raises(ValueError):
+        addon.drivers.combined_expression([row, row], "WEIGHTED_SUM", [1.0])
+    with pytest.raises(ValueError):
+        addon.drivers.combined_expression([row, row], "AVERAGE")
+
+
+def test_reapply_after_mode_switch(addon, bpy):
+    body = synthetic.make_mesh(1)
+    rig = synthetic.make_rig(2)
+    rows = [addon.drivers.DriverRow(SHAPE_PATH.format("shape_0000"), "bone_0001", "ROT_X", 10.0, 30.0)]
+    addon.drivers.create_drivers(rows, rig, driver_mode="GENERATOR")
+
+    switched = addon.drivers.new_stats()
+    curves, errors = addon.drivers.create_drivers(rows, rig, driver_mode="SIMPLE_EXPRESSION", stats=switched)
+    assert addon.drivers.format_stats(switched) == "0 created, 1 updated, 0 unchanged"
+    assert list(curves[0].modifiers) == []
+
+    again = addon.drivers.new_stats()
+    addon.drivers.create_drivers(rows, rig, driver_mode="SIMPLE_EXPRESSION", stats=again)
+    assert addon.drivers.format_stats(again) == "0 created, 0 updated, 1 unchanged"
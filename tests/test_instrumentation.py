@@ -0,0 +1,59 @@
+import json
+
+import synthetic
+
+
+def driver_operator(addon, context):
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    operator.mode = "DRIVER"
+    operator.set_driver_limit_constraint = True
+    operator.invoke(context, None)
+    return operator
+
+
+def setup_scene():
+    body = synthetic.make_mesh(1)
+    rig = synthetic.make_rig(1)
+    context = synthetic.select(rig, [rig.pose.bones[0]], rig.pose.bones[0], others=[body])
+    context.window_manager.clipboard = 'bpy.data.shape_keys["Key"].key_blocks["shape_0000"].value'
+    return context
+
+
+def test_silent_by_default(addon, bpy, capsys):
+    context = setup_scene()
+    driver_operator(addon, context).execute(context)
+    assert addon.instrumentation.get_log_level() == "SILENT"
+    assert capsys.readouterr().out == ""
+
+
+def test_debug_level_logs_driver_add(addon, bpy, capsys):
+    context = setup_scene()
+    addon.instrumentation.set_log_level("debug")
+    try:
+        driver_operator(addon, context).execute(context)
+    finally:
+        addon.instrumentation.set_log_level("SILENT")
+    out = capsys.readouterr().out
+    assert "parent.driver_add('value')" in out
+    assert "Profile of object.create_driver_constraint DRIVER" in out
+
+
+def test_operator_run_profile(addon, bpy, tmp_path):
+    context = setup_scene()
+    driver_operator(addon, context).execute(context)
+
+    profile = addon.instrumentation.profile()
+    assert profile["run"] == "object.create_driver_constraint DRIVER"
+    assert {"driver_add", "variable_setup", "limit_constraint"} <= set(profile["stages"])
+    # invoke already resolved the clipboard path
+    assert profile["counters"]["resolve_cache_hits"] == 1
+    assert profile["counters"]["drivers_created"] == 1
+    assert profile["stages"]["driver_add"]["calls"] == 1
+
+    path = tmp_path / "profile.json"
+    addon.instrumentation.dump(str(path))
+    assert json.loads(path.read_text())["stages"]["driver_add"]["calls"] == 1
+
+    operator = addon.constraint_operator.DriverConstraintProfile()
+    operator.execute(context)
+    assert "driver_add" in bpy.data.texts["Driver Constraint Profile"].as_string()
@@ -0,0 +1,38 @@
+import types
+
+import fake_bpy
+import synthetic
+
+
+def test_availability_cached_until_selection_changes(addon, bpy):
+    rig = synthetic.make_rig(3)
+    context = bpy.context
+    context.view_layer.objects.active = rig
+    context.selected_objects = [rig]
+    context.mode = "POSE"
+    context.selected_pose_bones = list(rig.pose.bones)[:1]
+    addon.menu_state.invalidate()
+
+    available = addon.menu_state.availability(context)
+    assert (available.driver, available.action) == (True, False)
+
+    # transform updates keep the cache, selection updates drop it
+    context.selected_pose_bones = list(rig.pose.bones)
+    moved = types.SimpleNamespace(id=rig, is_updated_transform=True, is_updated_geometry=False)
+    fake_bpy.fire("depsgraph_update_post", context.scene, types.SimpleNamespace(updates=[moved]))
+    assert addon.menu_state.availability(context) is available
+
+    selected = types.SimpleNamespace(id=rig, is_updated_transform=False, is_updated_geometry=False)
+    fake_bpy.fire("depsgraph_update_post", context.scene, types.SimpleNamespace(updates=[selected]))
+    available = addon.menu_state.availability(context)
+    assert (available.driver, available.action) == (True, True)
+
+    # a mode change does not need a handler
+    context.mode = "OBJECT"
+    context.selected_pose_bones = None
+    available = addon.menu_state.availability(context)
+    assert (available.driver, available.action) == (True, False)
+
+    context.selected_objects = []
+    fake_bpy.fire("undo_post", context.scene)
+    assert not addon.menu_state.availability(context).driver
@@ -0,0 +1,77 @@
+import json
+
+import synthetic
+
+SHAPE_PATH = 'bpy.data.shape_keys["Key"].key_blocks["{}"].value'
+
+
+def rig_with_drivers(addon):
+    body = synthetic.make_mesh(3)
+    rig = synthetic.make_rig(4)
+    action = synthetic.make_action(rig.pose.bones[:1], "Smile")
+    rows = [
+        addon.drivers.DriverRow(SHAPE_PATH.format(f"shape_{i:04d}"), "bone_0000", "LOC_X", 0.0, 1.0)
+        for i in range(3)
+    ]
+    addon.drivers.create_drivers(rows[:2], rig, driver_mode="SIMPLE_EXPRESSION")
+    addon.drivers.create_drivers(rows[2:], rig, driver_mode="GENERATOR")
+    bones = list(rig.pose.bones[1:])
+    addon.action_constraints.add_action_constraints(
+        bones, rig, "bone_0000", action, "LOC_X", "LOCAL_SPACE", 0.0, 1.0, 0, 10
+    )
+    addon.action_constraints.add_action_constraints(
+        bones[:1], rig, "bone_0001", action, "LOC_Y", "LOCAL_SPACE", 0.0, 1.0, 0, 10
+    )
+    return body, rig
+
+
+def test_profile_playback(addon, bpy, monkeypatch):
+    body, rig = rig_with_drivers(addon)
+    curves = list(body.data.shape_keys.animation_data.drivers)
+    curves[0].mute = True
+    scene = bpy.context.scene
+    scene.frame_set(7)
+
+    module = addon.playback_profile
+    time_frames = module.time_frames
+    evaluated = []
+
+    def counting(scene, frames, repeat=1):
+        before = scene.evaluated
+        seconds = time_frames(scene, frames, repeat)
+        evaluated.append((scene.evaluated - before) // (len(frames) * repeat + 1))
+        return seconds
+
+    monkeypatch.setattr(module, "time_frames", counting)
+    profile = module.profile_playback(scene, 1, 5, repeat=2)
+
+    # all, without simple expression drivers, generators, constraints, nothing
+    assert evaluated == [7, 5, 6, 3, 0]
+    counts = {name: entry["count"] for name, entry in profile["categories"].items()}
+    assert counts == {
+        "python_driver": 0,
+        "simple_expression_driver": 2,
+        "generator_driver": 1,
+        "shared_input_driver": 0,
+        "action_constraint": 4,
+    }
+    assert profile["frames"] == [1, 5]
+    assert [(entry["bone"], entry["action_constraints"]) for entry in profile["bones"]][0] == (
+        "bone_0001",
+        2,
+    )
+    assert [curve.mute for curve in curves] == [True, False, False]
+    assert scene.frame_current == 7
+
+
+def test_format_and_dump_profile(addon, bpy, tmp_path):
+    rig_with_drivers(addon)
+    module = addon.playback_profile
+    profile = module.profile_playback(bpy.context.scene, 1, 3, repeat=1)
+    table = module.format_profile(profile, "name")
+    assert table.index("action_constraint") < table.index("generator_driver")
+    assert "python_driver" not in table
+
+    path = tmp_path / "profile.json"
+    assert module.main(["--frames", "1", "3", "--repeat", "1", "--output", str(path)]) == 0
+    assert json.loads(path.read_text())["categories"]["action_constraint"]["count"] == 4
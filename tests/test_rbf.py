@@ -0,0 +1,79 @@
+import math
+
+import fake_bpy
+import pytest
+import synthetic
+
+
+def shoulder_setup(addon):
+    body = synthetic.make_mesh(3)
+    rig = synthetic.make_rig(2, posed=False)
+    rig.pose.bones[1].rotation_mode = "QUATERNION"
+    context = synthetic.select(rig, rig.pose.bones[:2], rig.pose.bones[0], others=[body])
+    operator = addon.rbf.DriverConstraintRBF()
+    operator.solver = "Shoulder"
+    operator.output_filter = "shape_000"
+    return body, rig, context, operator
+
+
+def shape_values(body):
+    return [block.value for block in body.data.shape_keys.key_blocks]
+
+
+def test_rbf_interpolates_recorded_poses(addon, bpy):
+    body, rig, context, operator = shoulder_setup(addon)
+    blocks = body.data.shape_keys.key_blocks
+    raise_bone, twist_bone = rig.pose.bones
+
+    raise_bone.rotation_euler[0] = math.radians(90.0)
+    blocks["shape_0000"].value = 1.0
+    assert operator.execute(context) == {"FINISHED"}
+    raise_bone.rotation_euler[0] = 0.0
+    twist_bone.rotation_quaternion[:] = (math.cos(math.pi / 4), 0.0, math.sin(math.pi / 4), 0.0)
+    blocks["shape_0000"].value = 0.0
+    blocks["shape_0001"].value = 1.0
+    operator.execute(context)
+    assert operator.reports[-1][1] == "RBF solver Shoulder: 3 poses, 2 bones, 3 shape keys."
+
+    solver = addon.rbf.load_solvers(rig)["Shoulder"]
+    assert solver["bones"] == ["bone_0000", "bone_0001"]
+    assert solver["values"] == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]
+
+    # back to the first pose, every recorded pose is reproduced
+    twist_bone.rotation_quaternion[:] = (1.0, 0.0, 0.0, 0.0)
+    raise_bone.rotation_euler[0] = math.radians(90.0)
+    fake_bpy.fire("frame_change_post", context.scene, None)
+    assert shape_values(body) == pytest.approx([0.0, 1.0, 0.0, 0.0], abs=1e-6)
+    assert body.data.shape_keys.update_tags == 1
+
+    # nothing changed, nothing written
+    fake_bpy.fire("depsgraph_update_post", context.scene, None)
+    assert body.data.shape_keys.update_tags == 1
+
+    raise_bone.rotation_euler[0] = math.radians(45.0)
+    fake_bpy.fire("frame_change_post", context.scene, None)
+    assert 0.0 < blocks["shape_0000"].value < 1.0
+    assert blocks["shape_0002"].value == 0.0
+
+
+def test_rbf_mute_and_remove(addon, bpy):
+    body, rig, context, operator = shoulder_setup(addon)
+    rig.pose.bones[0].rotation_euler[2] = 1.0
+    body.data.shape_keys.key_blocks["shape_0002"].value = 1.0
+    operator.execute(context)
+
+    operator.action = "MUTE"
+    operator.execute(context)
+    body.data.shape_keys.key_blocks["shape_0002"].value = 0.5
+    fake_bpy.fire("frame_change_post", context.scene, None)
+    assert shape_values(body)[3] == 0.5
+
+    operator.action = "UNMUTE"
+    operator.execute(context)
+    fake_bpy.fire("frame_change_post", context.scene, None)
+    assert shape_values(body)[3] == pytest.approx(1.0)
+
+    operator.action = "REMOVE"
+    assert operator.execute(context) == {"FINISHED"}
+    assert addon.rbf.RBF_PROP not in rig
+    assert operator.execute(context) == {"CANCELLED"}
@@ -0,0 +1,88 @@
+import pytest
+
+import synthetic
+
+
+def test_add_shape_keys_from_source(addon, bpy):
+    body = synthetic.make_mesh(0, vertex_count=4)
+    sculpt = synthetic.make_mesh(0, "Sculpt", vertex_count=4)
+    for vertex in sculpt.data.vertices:
+        vertex.co[2] = 1.0
+
+    blocks, created = addon.shape_keys.add_shape_keys(body, ["A", "B"], sculpt)
+    assert created == 2
+    assert [block.name for block in blocks] == ["A", "B"]
+    assert [tuple(point.co) for point in blocks[1].data] == [(i, 0.0, 1.0) for i in range(4)]
+
+    # existing keys are kept, the basis is untouched
+    blocks[0].data[0].co[2] = 5.0
+    again, created = addon.shape_keys.add_shape_keys(body, ["A", "C"])
+    assert created == 1
+    assert again[0] is blocks[0] and again[0].data[0].co[2] == 5.0
+    assert [tuple(point.co) for point in again[1].data] == [(i, 0.0, 0.0) for i in range(4)]
+
+    with pytest.raises(ValueError):
+        addon.shape_keys.add_shape_keys(body, ["D"], synthetic.make_mesh(0, "Small", vertex_count=2))
+
+
+def test_create_new_shapes_for_selected_bones(addon, bpy):
+    body = synthetic.make_mesh(0)
+    rig = synthetic.make_rig(3)
+    context = synthetic.select(rig, rig.pose.bones[:3], rig.pose.bones[0], others=[body])
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    operator.mode = "DRIVER"
+    operator.shape_name = "CREATE_NEW_SHAPE"
+    operator.new_shape_scope = "SELECTED_BONES"
+    operator.new_shape_name = "Fix"
+    operator.type = "LOC_X"
+    operator.max_value = 0.1
+    operator.execute(context)
+
+    key = body.data.shape_keys
+    assert key.key_blocks.keys() == ["Basis", "Fix", "bone_0001_loc_y", "bone_0002_loc_z"]
+    targets = [
+        (curve.data_path, curve.driver.variables[0].targets[0].bone_target)
+        for curve in key.animation_data.drivers
+    ]
+    assert targets == [
+        ('key_blocks["Fix"].value', "bone_0000"),
+        ('key_blocks["bone_0001_loc_y"].value', "bone_0001"),
+        ('key_blocks["bone_0002_loc_z"].value', "bone_0002"),
+    ]
+    assert operator.reports[-1] == ({"INFO"}, "3 Shape Keys created, Drivers: 3 created, 0 updated, 0 unchanged.")
+
+    operator.execute(context)
+    assert len(key.key_blocks) == 4
+    assert operator.reports[-1][1].startswith("0 Shape Keys created, Drivers: 0 created, 0 updated, 3 unchanged")
+
+
+@pytest.mark.parametrize("selected", [[], "rig"])
+def test_create_new_shapes_without_mesh(addon, bpy, selected):
+    rig = synthetic.make_rig(1)
+    context = synthetic.select(rig, rig.pose.bones[:1], rig.pose.bones[0])
+    context.selected_objects = [rig] if selected == "rig" else []
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    operator.mode = "DRIVER"
+    operator.shape_name = "CREATE_NEW_SHAPE"
+    operator.type = "LOC_X"
+    operator.execute(context)
+    assert operator.reports[-1][0] == {"WARNING"}
+
+
+def test_skipped_shapes_reach_the_user(addon, bpy):
+    body = synthetic.make_mesh(0)
+    rig = synthetic.make_rig(2)
+    rig.pose.bones[1].location[1] = 0.0
+    context = synthetic.select(rig, rig.pose.bones[:2], rig.pose.bones[0], others=[body])
+    operator = addon.constraint_operator.CreateDriverConstraint()
+    operator.mode = "DRIVER"
+    operator.shape_name = "CREATE_NEW_SHAPE"
+    operator.new_shape_scope = "SELECTED_BONES"
+    operator.type = "LOC_X"
+    operator.max_value = 0.1
+    operator.execute(context)
+
+    level, message = operator.reports[-1]
+    assert level == {"WARNING"} and message.endswith(f"1 skipped. See the text block {addon.drivers.ERROR_TEXT}.")
+    errors = bpy.data.texts[addon.drivers.ERROR_TEXT].as_string()
+    assert errors.startswith("Could not drive a shape for bone_0001: No limits found")
@@ -0,0 +1,40 @@
+import importlib
+
+import fake_bpy
+import startup_cost
+
+
+def test_register_defers_heavy_imports():
+    result = startup_cost.measure(repeat=1)
+    assert "driver_constraint_addon.constraint_operator" in result["modules"]
+    assert result["deferred"] == []
+
+
+def own(addon, items):
+    return [item for item in items if item.__module__.startswith(addon.__name__ + ".")]
+
+
+def test_register_is_idempotent(addon):
+    operators = own(addon, fake_bpy.registered_classes)
+    assert len(operators) == len(set(operators)) == 9
+    hooks = fake_bpy.bpy_types.VIEW3D_MT_pose_context_menu._draw_funcs
+    handlers = own(addon, fake_bpy.app.handlers.load_post)
+    try:
+        addon.register()
+        assert own(addon, fake_bpy.registered_classes) == operators
+        assert hooks.count(addon.add_to_specials) == 1
+        assert own(addon, fake_bpy.app.handlers.load_post) == handlers
+
+        addon.unregister()
+        addon.unregister()
+        assert own(addon, fake_bpy.registered_classes) == []
+        assert addon.add_to_specials not in hooks
+        assert own(addon, fake_bpy.app.handlers.load_post) == []
+
+        # importing or reloading a module registers nothing by itself
+        importlib.reload(addon.data_path)
+        importlib.reload(addon.rbf)
+        for handler_name in fake_bpy.HANDLER_NAMES:
+            assert own(addon, getattr(fake_bpy.app.handlers, handler_name)) == []
+    finally:
+        addon.register()